@@ -0,0 +1,382 @@
+"""End-to-end ingestion and /answer benchmark with local stand-ins
+
+Runs fully offline: synthetic PDFs are ingested through the real pipeline
+(extraction, chunking, embedding, upserts), then the Flask or ASGI app is
+served in-process and loaded with concurrent /answer requests. Completions
+come from tools.fake_openai_server with configurable latency, vectors go
+to an in-process Qdrant (``QdrantClient(":memory:")``) or the local
+backend, and every file lives in a scratch directory:
+
+    python -m benchmarks.end_to_end --pages 20 200 --concurrency 1 4 16 --json run.json
+    python -m benchmarks.end_to_end --app asgi --vector-store local --baseline run.json
+
+Results (pages/s, chunks/s, answer latency percentiles and QPS per
+concurrency level, per-stage timings and peak RSS) are written as JSON so
+runs can be compared; ``--baseline`` prints the change against an earlier
+run. The embedding model must already be in the local model cache.
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+import requests
+from benchmarks.synthetic_pdf import Fact, write_pdf
+from tools.fake_openai_server import start_server
+
+BENCH_TEAM = "benchmark"
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def configure_environment(args: argparse.Namespace, workdir: str, completion_url: str) -> None:
+    """Point every setting at the stand-ins; must run before ``src`` is imported"""
+    os.environ.update({
+        "AZURE_OPENAI_ENDPOINT": completion_url,
+        "AZURE_OPENAI_API_KEY": "benchmark",
+        "AZURE_DEPLOYMENT_NAME": "benchmark",
+        "VECTOR_STORE_BACKEND": "local" if args.vector_store == "local" else "qdrant",
+        "QDRANT_COLLECTION_NAME": "benchmark",
+        "LOCAL_VECTOR_STORE_PATH": os.path.join(workdir, "vectors"),
+        "EMBEDDING_CACHE_ENABLED": str(args.embedding_cache).lower(),
+        "EMBEDDING_CACHE_PATH": os.path.join(workdir, "embeddings.db"),
+        "MANIFEST_DB_PATH": os.path.join(workdir, "manifests.db"),
+        "JOB_DB_PATH": os.path.join(workdir, "jobs.db"),
+        "UPLOAD_SPOOL_DIR": os.path.join(workdir, "spool"),
+        "ANSWER_CACHE_ENABLED": str(args.answer_cache).lower(),
+        # A limit of 0 disables rate limiting
+        "RATE_LIMIT_BACKEND": "memory",
+        "RATE_LIMIT_ANSWER_REQUESTS": "0",
+        "RATE_LIMIT_UPLOAD_REQUESTS": "0",
+        "AUTH_ENABLED": "true",
+        "JWT_SECRET_KEYS": f"bench:{os.urandom(16).hex()}",
+        "JWT_KEYS_FILE": "",
+        "ENABLE_HTTPS": "false",
+        "DEBUG": "false",
+    })
+
+
+def use_memory_qdrant(vector_store: Any) -> None:
+    """Swap the Qdrant client for an in-process one
+
+    The in-process async client would not share its storage, so the async
+    methods fall back to running the sync client in a thread.
+    """
+    from qdrant_client import QdrantClient
+    from src.lifecycle import resolve
+    from src.vector_store import BaseVectorStore
+
+    store = resolve(vector_store)
+    store.client = QdrantClient(":memory:")
+    store.asearch_vectors = types.MethodType(BaseVectorStore.asearch_vectors, store)
+    store.ahealth_check = types.MethodType(BaseVectorStore.ahealth_check, store)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(app_name: str) -> Tuple[str, Callable[[], None]]:
+    """Serve the app from a background thread; returns (base url, stop)"""
+    if app_name == "flask":
+        from werkzeug.serving import make_server
+        from src.api import app
+
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        thread = threading.Thread(target=server.serve_forever, name="bench-flask", daemon=True)
+        thread.start()
+
+        def stop() -> None:
+            server.shutdown()
+            thread.join()
+
+        return f"http://127.0.0.1:{server.server_port}", stop
+
+    import uvicorn
+    from src.asgi import app
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port,
+                                           log_level="warning", lifespan="on"))
+    thread = threading.Thread(target=server.run, name="bench-asgi", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("ASGI server failed to start")
+        time.sleep(0.05)
+
+    def stop() -> None:
+        server.should_exit = True
+        thread.join()
+
+    return f"http://127.0.0.1:{port}", stop
+
+
+def run_ingestion(document_processor: Any, workdir: str, pages: int,
+                  words_per_page: int, seed: int) -> Tuple[Dict[str, Any], List[Fact]]:
+    """Ingest one synthetic document and report its throughput"""
+    path = os.path.join(workdir, f"bench_{pages}.pdf")
+    facts = write_pdf(path, pages, words_per_page, seed + pages)
+
+    start = time.perf_counter()
+    progress = document_processor.process_pdf(
+        pdf_file=path,
+        team_id=BENCH_TEAM,
+        doc_name=os.path.basename(path),
+        document_id=f"bench-{pages}"
+    )
+    elapsed = time.perf_counter() - start
+
+    return {
+        "pages": progress.pages_done,
+        "chunks": progress.chunks_created,
+        "chunks_embedded": progress.chunks_embedded,
+        "points_upserted": progress.points_upserted,
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(progress.pages_done / elapsed, 2),
+        "chunks_per_sec": round(progress.chunks_created / elapsed, 2),
+        "pdf_bytes": os.path.getsize(path),
+        "peak_rss_mb": peak_rss_mb()
+    }, facts
+
+
+def run_load(base_url: str, token: str, questions: List[str], concurrency: int,
+             total: int, warmup: int) -> Dict[str, Any]:
+    """POST /answer ``total`` times from ``concurrency`` threads"""
+    local = threading.local()
+    headers = {"Authorization": f"Bearer {token}"}
+    counter = itertools.count()
+
+    def post() -> Tuple[float, bool]:
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        question = questions[next(counter) % len(questions)]
+        start = time.perf_counter()
+        try:
+            response = session.post(f"{base_url}/answer", json={"question": question},
+                                    headers=headers, timeout=60)
+            ok = response.status_code == 200 and response.json().get("status") == "success"
+        except requests.RequestException:
+            ok = False
+        return (time.perf_counter() - start) * 1000, ok
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(lambda _: post(), range(warmup)))
+
+        start = time.perf_counter()
+        results = list(executor.map(lambda _: post(), range(total)))
+        elapsed = time.perf_counter() - start
+
+    latencies = np.array([latency for latency, ok in results if ok])
+    errors = sum(1 for _, ok in results if not ok)
+
+    def percentile(q: float) -> Optional[float]:
+        return round(float(np.percentile(latencies, q)), 2) if len(latencies) else None
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "qps": round(len(latencies) / elapsed, 2),
+        "mean_ms": round(float(latencies.mean()), 2) if len(latencies) else None,
+        "p50_ms": percentile(50),
+        "p95_ms": percentile(95),
+        "p99_ms": percentile(99),
+        "max_ms": round(float(latencies.max()), 2) if len(latencies) else None,
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Relative change of the headline numbers against an earlier run"""
+    def change(new: Optional[float], old: Optional[float]) -> str:
+        if not new or not old:
+            return "n/a"
+        return f"{(new - old) / old * 100:+.1f}%"
+
+    lines = []
+    old_ingest = {row["pages"]: row for row in baseline.get("ingestion", [])}
+    for row in results["ingestion"]:
+        old = old_ingest.get(row["pages"])
+        if old:
+            lines.append(f"ingest {row['pages']:>5} pages  pages/s {change(row['pages_per_sec'], old['pages_per_sec'])}"
+                         f"  chunks/s {change(row['chunks_per_sec'], old['chunks_per_sec'])}")
+    old_answer = {row["concurrency"]: row for row in baseline.get("answer", [])}
+    for row in results["answer"]:
+        old = old_answer.get(row["concurrency"])
+        if old:
+            lines.append(f"answer c={row['concurrency']:<4}  qps {change(row['qps'], old['qps'])}"
+                         f"  p50 {change(row['p50_ms'], old['p50_ms'])}"
+                         f"  p95 {change(row['p95_ms'], old['p95_ms'])}"
+                         f"  p99 {change(row['p99_ms'], old['p99_ms'])}")
+    lines.append(f"peak RSS {change(results['peak_rss_mb'], baseline.get('peak_rss_mb'))}")
+    return lines
+
+
+def print_table(rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        return
+    header = list(rows[0].keys())
+    print("  ".join(f"{name:>15}" for name in header))
+    for row in rows:
+        print("  ".join(f"{str(row[name]):>15}" for name in header))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[20, 100],
+                        help="page count of each synthetic document to ingest")
+    parser.add_argument("--words-per-page", type=int, default=350)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=200,
+                        help="/answer requests per concurrency level")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--app", choices=("flask", "asgi"), default="flask")
+    parser.add_argument("--vector-store", choices=("qdrant-memory", "local"), default="qdrant-memory")
+    parser.add_argument("--first-token-latency", type=float, default=0.2,
+                        help="seconds the fake completion server waits before answering")
+    parser.add_argument("--token-delay", type=float, default=0.0,
+                        help="seconds per generated token")
+    parser.add_argument("--embedding-cache", action="store_true",
+                        help="keep the embedding cache on (off measures the model)")
+    parser.add_argument("--answer-cache", action="store_true",
+                        help="keep the semantic answer cache on (off measures the pipeline)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--workdir", help="scratch directory (default: a new temp dir)")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch directory")
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    parser.add_argument("--baseline", help="results file of an earlier run to compare with")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    # One line per request would drown the results
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="pdfqa-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    completions = start_server(first_token_latency=args.first_token_latency,
+                               token_delay=args.token_delay)
+    configure_environment(args, workdir, completions.url)
+
+    # Imported only now so the configuration above is what they read
+    from src.config import config
+    from src.document_processor import document_processor
+    from src.lifecycle import lifecycle
+    from src.utils.metrics import metrics
+    from src.utils.security import security_manager
+    from src.vector_store import vector_store
+
+    stop = None
+    try:
+        if args.vector_store == "qdrant-memory":
+            use_memory_qdrant(vector_store)
+        vector_store.setup_collection()
+
+        start = time.perf_counter()
+        lifecycle.start(background=False)
+        if lifecycle.error:
+            raise RuntimeError(f"Startup failed: {lifecycle.error}")
+        startup_seconds = round(time.perf_counter() - start, 3)
+        print(f"Services ready in {startup_seconds}s (peak RSS {peak_rss_mb()} MB)")
+
+        ingestion = []
+        facts: List[Fact] = []
+        for pages in args.pages:
+            row, document_facts = run_ingestion(document_processor, workdir, pages,
+                                                args.words_per_page, args.seed)
+            ingestion.append(row)
+            facts.extend(document_facts)
+            print(json.dumps(row))
+
+        questions = [fact.question for fact in facts]
+        random.Random(args.seed).shuffle(questions)
+        token = security_manager.create_jwt_token(BENCH_TEAM)
+        base_url, stop = serve(args.app)
+
+        answer = []
+        for concurrency in args.concurrency:
+            answer.append(run_load(base_url, token, questions, concurrency,
+                                   args.requests, args.warmup))
+            print(json.dumps(answer[-1]))
+
+        results = {
+            "benchmark": "end_to_end",
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "settings": {
+                **{name: value for name, value in vars(args).items()
+                   if name not in ("workdir", "keep", "json_path", "baseline")},
+                "embedding_model": config.EMBEDDING_MODEL_NAME,
+                "chunk_strategy": config.CHUNK_STRATEGY,
+                "rerank_enabled": config.RERANK_ENABLED,
+                "retrieval_limit": config.RETRIEVAL_LIMIT,
+                "embedding_batch_size": config.EMBEDDING_BATCH_SIZE
+            },
+            "startup_seconds": startup_seconds,
+            "ingestion": ingestion,
+            "answer": answer,
+            "stages": {stage: teams.get(BENCH_TEAM)
+                       for stage, teams in metrics.stage_stats().items()},
+            "peak_rss_mb": peak_rss_mb()
+        }
+
+        print()
+        print_table(ingestion)
+        print()
+        print_table(answer)
+        print(f"\nPeak RSS {results['peak_rss_mb']} MB")
+
+        if args.json_path:
+            with open(args.json_path, "w") as f:
+                json.dump(results, f, indent=2)
+        if args.baseline:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+            print(f"\nChange against {args.baseline} ({baseline.get('git_commit')}):")
+            print("\n".join(compare(results, baseline)))
+
+    finally:
+        if stop is not None:
+            stop()
+        lifecycle.shutdown()
+        completions.shutdown()
+        if not args.keep and not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Recall and latency of the Qdrant storage profiles against exact search
+
+Loads the same vectors into one scratch collection per storage profile
+(using the service's own collection settings), waits for indexing, then
+runs a query set through ``search_vectors`` and compares the hits with an
+exact (brute-force) search:
+
+    python -m benchmarks.storage_profiles --points 200000 --queries 500
+    python -m benchmarks.storage_profiles --source-collection pdf_embeddings
+
+Needs a Qdrant server (QDRANT_HOST / QDRANT_PORT); the local in-process
+client ignores quantization and on-disk settings.
+"""
+import argparse
+import json
+import time
+from typing import Any, Dict, List, Optional
+import numpy as np
+from qdrant_client import models
+from qdrant_client.models import PointStruct
+from src.vector_store import QdrantVectorStore, VECTOR_NAME
+
+BENCH_TEAM = "benchmark"
+
+# Bytes of vector data each profile keeps in RAM per 384-dim point
+RAM_BYTES_PER_VECTOR = {
+    "memory": 384 * 4,
+    "on_disk": 0,
+    "scalar": 384,
+    "product": 384 * 4 // 16,
+}
+
+
+def synthetic_vectors(count: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    """Unit vectors drawn around random centroids, like topic-clustered chunks"""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centroids[rng.integers(0, clusters, count)]
+    vectors += 0.35 * rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def sample_vectors(store: QdrantVectorStore, collection: str, count: int) -> np.ndarray:
+    """Read up to ``count`` stored embeddings from an existing collection"""
+    vectors: List[List[float]] = []
+    offset = None
+    while len(vectors) < count:
+        records, offset = store.client.scroll(
+            collection_name=collection,
+            limit=min(1024, count - len(vectors)),
+            offset=offset,
+            with_payload=False,
+            with_vectors=[VECTOR_NAME]
+        )
+        vectors.extend(record.vector[VECTOR_NAME] for record in records)
+        if offset is None:
+            break
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def load_collection(store: QdrantVectorStore, vectors: np.ndarray, batch_size: int) -> None:
+    """Create the scratch collection and wait until it is fully indexed"""
+    if store.client.collection_exists(store.collection_name):
+        store.client.delete_collection(store.collection_name)
+    store._create_collection(store.collection_name, "shared")
+
+    for start in range(0, len(vectors), batch_size):
+        batch = vectors[start:start + batch_size].tolist()
+        store.client.upsert(
+            collection_name=store.collection_name,
+            points=[
+                PointStruct(id=start + i, vector={VECTOR_NAME: vector},
+                            payload={"team_id": BENCH_TEAM, "text": "x" * 500})
+                for i, vector in enumerate(batch)
+            ]
+        )
+
+    while store.client.get_collection(store.collection_name).status != models.CollectionStatus.GREEN:
+        time.sleep(1)
+
+
+def exact_hits(store: QdrantVectorStore, queries: np.ndarray, k: int) -> List[set]:
+    """Ground truth from a brute-force search over the original vectors"""
+    return [
+        {hit.id for hit in store.client.search(
+            collection_name=store.collection_name,
+            query_vector=models.NamedVector(name=VECTOR_NAME, vector=query),
+            query_filter=store._team_filter(BENCH_TEAM),
+            limit=k,
+            search_params=models.SearchParams(
+                exact=True,
+                quantization=models.QuantizationSearchParams(ignore=True)
+            )
+        )}
+        for query in queries.tolist()
+    ]
+
+
+def run_profile(
+        store: QdrantVectorStore,
+        queries: np.ndarray,
+        truth: List[set],
+        k: int,
+        warmup: int
+) -> Dict[str, Any]:
+    """Recall@k and latency percentiles for one profile"""
+    query_list = queries.tolist()
+    for query in query_list[:warmup]:
+        store.search_vectors(BENCH_TEAM, query, k)
+
+    latencies = []
+    recalls = []
+    for query, expected in zip(query_list, truth):
+        start = time.perf_counter()
+        hits = store.search_vectors(BENCH_TEAM, query, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len({hit.id for hit in hits} & expected) / k)
+
+    ram_bytes = RAM_BYTES_PER_VECTOR[store.storage_profile]
+    return {
+        "profile": store.storage_profile,
+        f"recall@{k}": round(float(np.mean(recalls)), 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 2),
+        "vector_ram_bytes_per_point": ram_bytes,
+        "vector_ram_reduction": (
+            round(RAM_BYTES_PER_VECTOR["memory"] / ram_bytes, 1) if ram_bytes else None
+        ),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", nargs="+", default=list(QdrantVectorStore.STORAGE_PROFILES),
+                        choices=QdrantVectorStore.STORAGE_PROFILES)
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--clusters", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--batch-size", type=int, default=512)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--source-collection",
+                        help="sample real embeddings from this collection instead of synthetic ones")
+    parser.add_argument("--prefix", default="bench_storage")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch collections")
+    parser.add_argument("--json", dest="json_path", help="also write results to this file")
+    args = parser.parse_args()
+
+    sampler = QdrantVectorStore(storage_profile="memory")
+    if args.source_collection:
+        vectors = sample_vectors(sampler, args.source_collection, args.points + args.queries)
+    else:
+        vectors = synthetic_vectors(args.points + args.queries, sampler.embedding_dim,
+                                    args.clusters, args.seed)
+    # Held-out vectors stand in for query embeddings
+    data, queries = vectors[:-args.queries], vectors[-args.queries:]
+
+    truth: Optional[List[set]] = None
+    results = []
+    for profile in args.profiles:
+        store = QdrantVectorStore(layout="shared", storage_profile=profile)
+        store.client, store.async_client = sampler.client, sampler.async_client
+        store.collection_name = f"{args.prefix}_{profile}"
+
+        print(f"Loading {len(data)} points with the '{profile}' profile...")
+        load_collection(store, data, args.batch_size)
+        if truth is None:
+            truth = exact_hits(store, queries, args.k)
+        results.append(run_profile(store, queries, truth, args.k, args.warmup))
+        print(json.dumps(results[-1]))
+
+        if not args.keep:
+            store.client.delete_collection(store.collection_name)
+
+    print()
+    header = list(results[0].keys())
+    print("  ".join(f"{name:>26}" for name in header))
+    for row in results:
+        print("  ".join(f"{str(row[name]):>26}" for name in header))
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"points": len(data), "queries": len(queries), "k": args.k,
+                       "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Synthetic text PDFs for offline benchmarks
+
+Writes a valid PDF with the standard Helvetica font and no dependencies.
+Each page holds paragraphs of filler prose with one planted fact, so the
+generated questions have a known page that answers them:
+
+    python -m benchmarks.synthetic_pdf data/bench.pdf --pages 200 --words-per-page 400
+"""
+import argparse
+import random
+from typing import List, NamedTuple
+
+WORDS = (
+    "system data report quarter revenue customer service policy process "
+    "network storage budget team project review schedule contract supplier "
+    "analysis market product design quality release support incident audit "
+    "security compliance training staff office region forecast growth cost "
+    "risk strategy operation capacity demand pricing inventory logistics "
+    "the a of and to in for with on by from under over between during"
+).split()
+
+TOPICS = (
+    "hardware", "marketing", "travel", "training", "facilities", "research",
+    "licensing", "consulting", "logistics", "recruiting", "insurance", "hosting"
+)
+
+# US Letter, 10pt Helvetica on 12pt leading
+_PAGE_WIDTH, _PAGE_HEIGHT = 612, 792
+_MARGIN = 54
+_LEADING = 12
+_CHARS_PER_LINE = 95
+_LINES_PER_PAGE = (_PAGE_HEIGHT - 2 * _MARGIN) // _LEADING
+
+
+class Fact(NamedTuple):
+    """A planted statement and the question it answers"""
+    page: int
+    question: str
+    answer: str
+
+
+def _paragraphs(rng: random.Random, words: int, fact: str) -> List[str]:
+    """Filler paragraphs of about ``words`` words with ``fact`` in the middle"""
+    paragraphs = []
+    remaining = words
+    while remaining > 0:
+        size = min(remaining, rng.randint(40, 90))
+        sentences = []
+        left = size
+        while left > 0:
+            length = min(left, rng.randint(8, 18))
+            sentence = " ".join(rng.choice(WORDS) for _ in range(length))
+            sentences.append(sentence.capitalize() + ".")
+            left -= length
+        paragraphs.append(" ".join(sentences))
+        remaining -= size
+    paragraphs.insert(len(paragraphs) // 2, fact)
+    return paragraphs
+
+
+def _wrap(paragraphs: List[str]) -> List[str]:
+    """Lines of at most _CHARS_PER_LINE characters; blank lines between paragraphs"""
+    lines: List[str] = []
+    for paragraph in paragraphs:
+        line = ""
+        for word in paragraph.split():
+            if line and len(line) + 1 + len(word) > _CHARS_PER_LINE:
+                lines.append(line)
+                line = word
+            else:
+                line = f"{line} {word}" if line else word
+        if line:
+            lines.append(line)
+        lines.append("")
+    return lines[:_LINES_PER_PAGE]
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _content_stream(lines: List[str]) -> bytes:
+    ops = [f"BT /F1 10 Tf {_LEADING} TL {_MARGIN} {_PAGE_HEIGHT - _MARGIN} Td"]
+    for line in lines:
+        ops.append(f"({_escape(line)}) Tj T*" if line else "T*")
+    ops.append("ET")
+    return "\n".join(ops).encode("latin-1")
+
+
+def write_pdf(path: str, pages: int, words_per_page: int = 350, seed: int = 7) -> List[Fact]:
+    """Write a ``pages``-page PDF to ``path`` and return its planted facts
+
+    ``words_per_page`` is capped by what fits on a page (about 700 words).
+    """
+    rng = random.Random(seed)
+    facts: List[Fact] = []
+    streams: List[bytes] = []
+    for page in range(1, pages + 1):
+        topic = TOPICS[page % len(TOPICS)]
+        year = 2000 + page
+        amount = rng.randint(1000, 99999)
+        facts.append(Fact(
+            page,
+            f"What was the {topic} budget for {year}?",
+            f"{amount} units"
+        ))
+        fact = f"The {topic} budget for {year} was {amount} units, as approved by the review board."
+        streams.append(_content_stream(_wrap(_paragraphs(rng, words_per_page, fact))))
+
+    # Objects: 1 catalog, 2 page tree, 3 font, then a (page, contents) pair per page
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        ("<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            " ".join(f"{4 + 2 * i} 0 R" for i in range(pages)), pages
+        )).encode("latin-1"),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    for i, stream in enumerate(streams):
+        objects.append((
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {_PAGE_WIDTH} {_PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+        ).encode("latin-1"))
+        objects.append(
+            b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        )
+
+    output = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, xref
+    )
+
+    with open(path, "wb") as f:
+        f.write(output)
+    return facts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--words-per-page", type=int, default=350)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    facts = write_pdf(args.path, args.pages, args.words_per_page, args.seed)
+    print(f"Wrote {args.pages} pages to {args.path}; e.g. '{facts[0].question}' "
+          f"-> {facts[0].answer} (page {facts[0].page})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Gunicorn settings for either app
+
+    gunicorn -c gunicorn.conf.py src.api:app
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker src.asgi:app
+"""
+import os
+from src.config import config
+
+bind = f"0.0.0.0:{config.PORT}"
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+
+# Importing the app is cheap now that services are lazy; doing it once in the
+# master surfaces import errors before any worker is forked
+preload_app = True
+
+
+def on_starting(server):
+    from src.utils.logging import setup_logging
+
+    setup_logging()
+    # Files of a previous run's workers would be summed into /metrics
+    from src.utils.metrics import metrics
+
+    metrics.clear_directory()
+    if config.PRELOAD_BEFORE_FORK:
+        # Weights loaded here are shared copy-on-write by every worker
+        from src.models import preload_models
+
+        preload_models()
+
+
+def post_worker_init(worker):
+    # Flask has no startup hook; ASGI workers also start from the lifespan
+    from src.lifecycle import lifecycle
+
+    lifecycle.start()
@@ -1,7 +1,12 @@
-from openai import AzureOpenAI
-from sentence_transformers import SentenceTransformer
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Iterator, List
 from src.config import config
+from src.embedding_cache import embedding_cache
+from src.embedding_batcher import BatchingEmbedder
+from src.lifecycle import lazy_service
+from src.models import sentence_transformer
+import numpy as np
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,15 +18,39 @@ class AIService:
     def __init__(self):
         """Initialize AI services with configuration"""
         try:
+            from openai import AzureOpenAI, AsyncAzureOpenAI
+
             self.openai_client = AzureOpenAI(
                 azure_endpoint=config.AZURE_OPENAI_ENDPOINT,
                 api_key=config.AZURE_OPENAI_API_KEY,
                 api_version=config.AZURE_API_VERSION,
                 azure_deployment=config.AZURE_DEPLOYMENT_NAME
             )
+            self.async_openai_client = AsyncAzureOpenAI(
+                azure_endpoint=config.AZURE_OPENAI_ENDPOINT,
+                api_key=config.AZURE_OPENAI_API_KEY,
+                api_version=config.AZURE_API_VERSION,
+                azure_deployment=config.AZURE_DEPLOYMENT_NAME
+            )
+
+            # CPU-bound encoding runs here so it never blocks an event loop
+            self.embedding_executor = ThreadPoolExecutor(
+                max_workers=config.EMBEDDING_EXECUTOR_WORKERS,
+                thread_name_prefix="embedding"
+            )
 
             # Initialize embedding model
-            self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+            self.embedding_model_name = config.EMBEDDING_MODEL_NAME
+            self.embedding_model = sentence_transformer(self.embedding_model_name)
+
+            # Coalesce concurrent single-query encodes into one forward pass
+            self.query_batcher = None
+            if config.EMBEDDING_MICROBATCH_ENABLED:
+                self.query_batcher = BatchingEmbedder(
+                    self._encode_batch,
+                    max_batch_size=config.EMBEDDING_MICROBATCH_MAX_SIZE,
+                    max_wait_ms=config.EMBEDDING_MICROBATCH_MAX_WAIT_MS
+                )
 
             # Warm up model
             self._warmup()
@@ -38,14 +67,80 @@ class AIService:
             logger.error(f"Error warming up model: {str(e)}")
             raise
 
+    def close(self) -> None:
+        """Stop the micro-batcher and the embedding threads"""
+        if self.query_batcher is not None:
+            self.query_batcher.shutdown()
+        self.embedding_executor.shutdown(wait=False)
+        self.openai_client.close()
+
+    async def aclose(self) -> None:
+        """Close, including the async OpenAI client"""
+        self.close()
+        await self.async_openai_client.close()
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Encode texts in a single forward pass"""
+        return self.embedding_model.encode(
+            texts,
+            batch_size=len(texts),
+            convert_to_numpy=True,
+            show_progress_bar=False
+        ).astype(np.float32, copy=False)
+
+    def _encode_query(self, text: str) -> np.ndarray:
+        """Encode one text, through the micro-batcher when enabled"""
+        if self.query_batcher is not None:
+            return self.query_batcher.embed(text)
+        return self.embedding_model.encode(text).astype(np.float32, copy=False)
+
     def get_embedding(self, text: str) -> List[float]:
-        """Generate embeddings for text"""
+        """Generate embeddings for text, reading through the embedding cache"""
         try:
-            return self.embedding_model.encode(text).tolist()
+            vector = embedding_cache.get(self.embedding_model_name, text)
+            if vector is None:
+                vector = self._encode_query(text)
+                embedding_cache.put(self.embedding_model_name, text, vector)
+            return vector.tolist()
         except Exception as e:
             logger.error(f"Error generating embedding: {str(e)}")
             raise
 
+    def get_embeddings(self, texts: List[str],
+                       batch_size: int = config.EMBEDDING_BATCH_SIZE) -> np.ndarray:
+        """Generate embeddings for many texts in batched forward passes
+
+        Cached texts skip the model; only misses are encoded. Returns a
+        float32 array of shape (len(texts), embedding_dim).
+        """
+        try:
+            dim = self.embedding_model.get_sentence_embedding_dimension()
+            embeddings = np.empty((len(texts), dim), dtype=np.float32)
+            cached = embedding_cache.get_many(self.embedding_model_name, texts)
+
+            missing = []
+            for i, vector in enumerate(cached):
+                if vector is None:
+                    missing.append(i)
+                else:
+                    embeddings[i] = vector
+
+            if missing:
+                missing_texts = [texts[i] for i in missing]
+                encoded = self.embedding_model.encode(
+                    missing_texts,
+                    batch_size=batch_size,
+                    convert_to_numpy=True,
+                    show_progress_bar=False
+                ).astype(np.float32, copy=False)
+                embeddings[missing] = encoded
+                embedding_cache.put_many(self.embedding_model_name, missing_texts, encoded)
+
+            return embeddings
+        except Exception as e:
+            logger.error(f"Error generating batch embeddings: {str(e)}")
+            raise
+
     def get_completion(self, messages: List[dict],
                        max_tokens: int = 1000,
                        temperature: float = 0.2) -> str:
@@ -62,6 +157,93 @@ class AIService:
             logger.error(f"Error getting completion: {str(e)}")
             raise
 
+    def stream_completion(self, messages: List[dict],
+                          max_tokens: int = 1000,
+                          temperature: float = 0.2) -> Iterator[str]:
+        """Stream completion text from OpenAI as it is generated"""
+        try:
+            stream = self.openai_client.chat.completions.create(
+                model=config.AZURE_DEPLOYMENT_NAME,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True
+            )
+            for chunk in stream:
+                # Azure sends content-filter chunks without choices
+                if not chunk.choices:
+                    continue
+                content = chunk.choices[0].delta.content
+                if content:
+                    yield content
+        except Exception as e:
+            logger.error(f"Error streaming completion: {str(e)}")
+            raise
+
+    async def aget_embedding(self, text: str) -> List[float]:
+        """Generate embeddings for text without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        if self.query_batcher is None:
+            return await loop.run_in_executor(self.embedding_executor, self.get_embedding, text)
+
+        # Await the batcher directly so concurrent requests share a batch
+        try:
+            vector = await loop.run_in_executor(
+                self.embedding_executor, embedding_cache.get, self.embedding_model_name, text
+            )
+            if vector is None:
+                vector = await asyncio.wrap_future(self.query_batcher.submit(text))
+                await loop.run_in_executor(
+                    self.embedding_executor, embedding_cache.put,
+                    self.embedding_model_name, text, vector
+                )
+            return vector.tolist()
+        except Exception as e:
+            logger.error(f"Error generating embedding: {str(e)}")
+            raise
+
+    async def aget_completion(self, messages: List[dict],
+                              max_tokens: int = 1000,
+                              temperature: float = 0.2) -> str:
+        """Get completion from OpenAI without blocking the event loop"""
+        try:
+            response = await self.async_openai_client.chat.completions.create(
+                model=config.AZURE_DEPLOYMENT_NAME,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature
+            )
+            return response.choices[0].message.content.strip()
+        except Exception as e:
+            logger.error(f"Error getting completion: {str(e)}")
+            raise
+
+    async def astream_completion(self, messages: List[dict],
+                                 max_tokens: int = 1000,
+                                 temperature: float = 0.2) -> AsyncIterator[str]:
+        """Stream completion text from OpenAI without blocking the event loop"""
+        try:
+            stream = await self.async_openai_client.chat.completions.create(
+                model=config.AZURE_DEPLOYMENT_NAME,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True
+            )
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                content = chunk.choices[0].delta.content
+                if content:
+                    yield content
+        except Exception as e:
+            logger.error(f"Error streaming completion: {str(e)}")
+            raise
+
 
 # Initialize global AI service
-ai_service = AIService()
\ No newline at end of file
+ai_service = lazy_service(
+    "ai_service", AIService,
+    close=lambda service: service.close(),
+    aclose=lambda service: service.aclose()
+)
\ No newline at end of file
@@ -0,0 +1,226 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+import numpy as np
+from src.config import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _TeamCache:
+    """Cached answers for one team, in LRU order"""
+
+    def __init__(self, generation: int):
+        # Invalidation generation the entries were answered under
+        self.generation = generation
+        self.entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self.matrix: Optional[np.ndarray] = None
+        self.matrix_ids: List[int] = []
+
+    def vectors(self) -> np.ndarray:
+        """Stacked unit query vectors, rebuilt only after changes"""
+        if self.matrix is None:
+            self.matrix_ids = list(self.entries)
+            self.matrix = np.stack([self.entries[i]["vector"] for i in self.matrix_ids])
+        return self.matrix
+
+
+class AnswerCache:
+    """Per-team semantic answer cache
+
+    A question hits the cache when its embedding has cosine similarity of
+    at least ``threshold`` with a previously answered question from the
+    same team. Entries expire after ``ttl`` seconds and each team keeps at
+    most ``max_entries`` in LRU order, for at most ``max_teams`` teams.
+
+    Uploads and deletes bump the team's generation in a SQLite file shared
+    by every worker process. Entries answered under an older generation
+    are dropped on lookup, and answers generated across an invalidation
+    are not stored, whichever worker handled the upload.
+    """
+
+    def __init__(
+            self,
+            threshold: float = config.ANSWER_CACHE_THRESHOLD,
+            ttl: float = config.ANSWER_CACHE_TTL_SECONDS,
+            max_entries: int = config.ANSWER_CACHE_MAX_ENTRIES,
+            max_teams: int = config.ANSWER_CACHE_MAX_TEAMS,
+            enabled: bool = config.ANSWER_CACHE_ENABLED,
+            db_path: str = config.ANSWER_CACHE_DB_PATH
+    ):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_teams = max_teams
+        self.enabled = enabled
+        self.db_path = db_path
+        self._teams: "OrderedDict[str, _TeamCache]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def generation(self, team_id: str) -> int:
+        """Current invalidation generation for a team, shared by all processes"""
+        if not self.enabled:
+            return 0
+        row = self._connect().execute(
+            "SELECT generation FROM team_generations WHERE team_id = ?", (team_id,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def lookup(
+            self,
+            team_id: str,
+            query_vector: List[float],
+            generation: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Return a cached response for a similar question, if any
+
+        ``generation`` is the team's current generation when the caller
+        has just read it; otherwise it is read here.
+        """
+        if not self.enabled:
+            return None
+
+        if generation is None:
+            generation = self.generation(team_id)
+        query = self._normalize(query_vector)
+        now = time.time()
+
+        with self._lock:
+            team = self._teams.get(team_id)
+            if team is not None and team.generation != generation:
+                # Invalidated by an upload or delete, possibly in another worker
+                del self._teams[team_id]
+                self._stats["invalidations"] += 1
+                team = None
+            if team is not None:
+                self._expire(team, now)
+            if not team or not team.entries:
+                self._stats["misses"] += 1
+                return None
+
+            scores = team.vectors() @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self._stats["misses"] += 1
+                return None
+
+            entry_id = team.matrix_ids[best]
+            team.entries.move_to_end(entry_id)
+            self._teams.move_to_end(team_id)
+            self._stats["hits"] += 1
+            response = dict(team.entries[entry_id]["response"])
+
+        response["sources"] = list(response.get("sources", []))
+        response["cached"] = True
+        return response
+
+    def store(
+            self,
+            team_id: str,
+            question: str,
+            query_vector: List[float],
+            response: Dict[str, Any],
+            generation: int
+    ) -> None:
+        """Cache a response generated under ``generation``"""
+        if not self.enabled:
+            return
+
+        entry = {
+            "question": question,
+            "vector": self._normalize(query_vector),
+            "response": dict(response),
+            "created_at": time.time()
+        }
+
+        current = self.generation(team_id)
+        if current != generation:
+            # The team's documents changed while this answer was generated
+            return
+
+        with self._lock:
+            team = self._teams.get(team_id)
+            if team is None or team.generation != generation:
+                team = self._teams[team_id] = _TeamCache(generation)
+            self._teams.move_to_end(team_id)
+
+            team.entries[self._next_id] = entry
+            self._next_id += 1
+            while len(team.entries) > self.max_entries:
+                team.entries.popitem(last=False)
+            team.matrix = None
+
+            while len(self._teams) > self.max_teams:
+                self._teams.popitem(last=False)
+
+    def invalidate_team(self, team_id: str) -> None:
+        """Drop all cached answers for a team, in every worker process"""
+        if not self.enabled:
+            return
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                """
+                INSERT INTO team_generations (team_id, generation) VALUES (?, 1)
+                ON CONFLICT (team_id) DO UPDATE SET generation = generation + 1
+                """,
+                (team_id,)
+            )
+        with self._lock:
+            if self._teams.pop(team_id, None) is not None:
+                self._stats["invalidations"] += 1
+        logger.info("Invalidated answer cache", extra={"team_id": team_id})
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and size"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["teams"] = len(self._teams)
+            stats["entries"] = sum(len(team.entries) for team in self._teams.values())
+        return stats
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread; the file is created on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS team_generations (
+                    team_id TEXT PRIMARY KEY,
+                    generation INTEGER NOT NULL
+                ) WITHOUT ROWID
+                """
+            )
+            conn.commit()
+            self._local.conn = conn
+        return conn
+
+    def _expire(self, team: _TeamCache, now: float) -> None:
+        """Drop entries older than the TTL; caller holds the lock"""
+        expired = [entry_id for entry_id, entry in team.entries.items()
+                   if now - entry["created_at"] > self.ttl]
+        for entry_id in expired:
+            del team.entries[entry_id]
+        if expired:
+            team.matrix = None
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+# Initialize global answer cache
+answer_cache = AnswerCache()
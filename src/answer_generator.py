@@ -1,6 +1,12 @@
-from typing import Dict, Any, List, Set, Tuple
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional, Set, Tuple
 from src.ai_service import ai_service
 from src.vector_store import vector_store
+from src.answer_cache import answer_cache
+from src.context_builder import context_builder
+from src.reranker import reranker
+from src.utils.metrics import metrics
+from src.config import config
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,10 +19,17 @@ class AnswerGenerator:
         """Generate answers using only team-authorized documents"""
         try:
             # Generate question embedding
-            query_vector = ai_service.get_embedding(question)
+            with metrics.span("embed_query", team_id):
+                query_vector = ai_service.get_embedding(question)
+
+            # Reuse the answer to a near-identical recent question
+            generation = answer_cache.generation(team_id)
+            cached = answer_cache.lookup(team_id, query_vector, generation)
+            if cached:
+                return cached
 
             # Get relevant documents
-            points = vector_store.search_vectors(team_id, query_vector, limit=15)
+            points = self._retrieve(team_id, question, query_vector)
 
             if not points:
                 return {
@@ -26,16 +39,112 @@ class AnswerGenerator:
                 }
 
             # Process context and sources
-            context_parts, sources = self._process_points(points)
+            context_parts, sources = self._build_context(team_id, points, query_vector)
 
             # Generate answer
-            answer = self._generate_ai_response(context_parts, question)
+            answer = self._generate_ai_response(team_id, context_parts, question)
 
+            response = {
+                "answer": answer,
+                "sources": list(sources),
+                "status": "success"
+            }
+            answer_cache.store(team_id, question, query_vector, response, generation)
+
+            return response
+
+        except Exception as e:
+            logger.error(f"Error generating answer: {str(e)}")
             return {
+                "answer": "Error generating answer",
+                "sources": [],
+                "status": "error",
+                "error": str(e)
+            }
+
+    def stream_answer(self, team_id: str, question: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Stream an answer as (event, data) pairs
+
+        Sources are sent first, then answer tokens as the completion
+        streams, then a final ``done`` event (or ``error``).
+        """
+        try:
+            with metrics.span("embed_query", team_id):
+                query_vector = ai_service.get_embedding(question)
+
+            generation = answer_cache.generation(team_id)
+            cached = answer_cache.lookup(team_id, query_vector, generation)
+            if cached:
+                yield "sources", {"sources": cached["sources"], "cached": True}
+                yield "token", {"text": cached["answer"]}
+                yield "done", {"status": cached["status"], "cached": True}
+                return
+
+            points = self._retrieve(team_id, question, query_vector)
+
+            if not points:
+                yield "sources", {"sources": []}
+                yield "token", {"text": "No relevant documents found"}
+                yield "done", {"status": "no_context"}
+                return
+
+            context_parts, sources = self._build_context(team_id, points, query_vector)
+            sources = list(sources)
+            yield "sources", {"sources": sources}
+
+            answer_parts = []
+            messages = self._build_messages(context_parts, question)
+            with metrics.span("completion", team_id):
+                for token in ai_service.stream_completion(messages):
+                    answer_parts.append(token)
+                    yield "token", {"text": token}
+
+            response = {
+                "answer": "".join(answer_parts).strip(),
+                "sources": sources,
+                "status": "success"
+            }
+            answer_cache.store(team_id, question, query_vector, response, generation)
+
+            yield "done", {"status": "success"}
+
+        except Exception as e:
+            logger.error(f"Error streaming answer: {str(e)}")
+            yield "error", {"status": "error", "error": str(e)}
+
+    async def agenerate_answer(self, team_id: str, question: str) -> Dict[str, Any]:
+        """Async variant of generate_answer for the ASGI app"""
+        try:
+            with metrics.span("embed_query", team_id):
+                query_vector = await ai_service.aget_embedding(question)
+
+            generation, cached = await self._alookup_cached(team_id, query_vector)
+            if cached:
+                return cached
+
+            points = await self._aretrieve(team_id, question, query_vector)
+
+            if not points:
+                return {
+                    "answer": "No relevant documents found",
+                    "sources": [],
+                    "status": "no_context"
+                }
+
+            context_parts, sources = await self._abuild_context(team_id, points, query_vector)
+            with metrics.span("completion", team_id):
+                answer = await ai_service.aget_completion(
+                    self._build_messages(context_parts, question)
+                )
+
+            response = {
                 "answer": answer,
                 "sources": list(sources),
                 "status": "success"
             }
+            await self._astore_cached(team_id, question, query_vector, response, generation)
+
+            return response
 
         except Exception as e:
             logger.error(f"Error generating answer: {str(e)}")
@@ -46,31 +155,120 @@ class AnswerGenerator:
                 "error": str(e)
             }
 
-    def _process_points(self, points: List[Any]) -> Tuple[List[str], Set[Tuple[str, int]]]:
-        """Process vector search results"""
-        context_parts = []
-        sources = set()
-        seen_text = set()
-
-        for point in points:
-            if point.payload:
-                text = point.payload.get('text', '').strip()
-                if text in seen_text:
-                    continue
-
-                doc_info = f"[Document: {point.payload.get('doc_name')}, Page: {point.payload.get('page_number')}]"
-                context_parts.append(f"{doc_info}\n{text}")
-                sources.add((
-                    point.payload.get('doc_name'),
-                    point.payload.get('page_number')
-                ))
-                seen_text.add(text)
-
-        return context_parts, sources
-
-    def _generate_ai_response(self, context_parts: List[str], question: str) -> str:
+    async def astream_answer(self, team_id: str, question: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Async variant of stream_answer for the ASGI app"""
+        try:
+            with metrics.span("embed_query", team_id):
+                query_vector = await ai_service.aget_embedding(question)
+
+            generation, cached = await self._alookup_cached(team_id, query_vector)
+            if cached:
+                yield "sources", {"sources": cached["sources"], "cached": True}
+                yield "token", {"text": cached["answer"]}
+                yield "done", {"status": cached["status"], "cached": True}
+                return
+
+            points = await self._aretrieve(team_id, question, query_vector)
+
+            if not points:
+                yield "sources", {"sources": []}
+                yield "token", {"text": "No relevant documents found"}
+                yield "done", {"status": "no_context"}
+                return
+
+            context_parts, sources = await self._abuild_context(team_id, points, query_vector)
+            sources = list(sources)
+            yield "sources", {"sources": sources}
+
+            answer_parts = []
+            messages = self._build_messages(context_parts, question)
+            with metrics.span("completion", team_id):
+                async for token in ai_service.astream_completion(messages):
+                    answer_parts.append(token)
+                    yield "token", {"text": token}
+
+            response = {
+                "answer": "".join(answer_parts).strip(),
+                "sources": sources,
+                "status": "success"
+            }
+            await self._astore_cached(team_id, question, query_vector, response, generation)
+
+            yield "done", {"status": "success"}
+
+        except Exception as e:
+            logger.error(f"Error streaming answer: {str(e)}")
+            yield "error", {"status": "error", "error": str(e)}
+
+    async def _alookup_cached(
+            self,
+            team_id: str,
+            query_vector: List[float]
+    ) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """The team's cache generation and any cached answer, read off the event loop"""
+        def lookup() -> Tuple[int, Optional[Dict[str, Any]]]:
+            generation = answer_cache.generation(team_id)
+            return generation, answer_cache.lookup(team_id, query_vector, generation)
+
+        return await asyncio.get_running_loop().run_in_executor(None, lookup)
+
+    async def _astore_cached(self, team_id: str, question: str, query_vector: List[float],
+                             response: Dict[str, Any], generation: int) -> None:
+        """answer_cache.store off the event loop; it reads the shared generation"""
+        await asyncio.get_running_loop().run_in_executor(
+            None, answer_cache.store, team_id, question, query_vector, response, generation
+        )
+
+    def _retrieve(self, team_id: str, question: str, query_vector: List[float]) -> List[Any]:
+        """Search the team's chunks, reranking a larger candidate set if enabled"""
+        with metrics.span("vector_search", team_id):
+            points = vector_store.search_vectors(
+                team_id, query_vector, limit=self._candidate_limit(), query_text=question,
+                with_vectors=True
+            )
+        if not reranker.enabled:
+            return points
+        with metrics.span("rerank", team_id):
+            return reranker.rerank(question, points)
+
+    async def _aretrieve(self, team_id: str, question: str, query_vector: List[float]) -> List[Any]:
+        """Async variant of _retrieve"""
+        with metrics.span("vector_search", team_id):
+            points = await vector_store.asearch_vectors(
+                team_id, query_vector, limit=self._candidate_limit(), query_text=question,
+                with_vectors=True
+            )
+        if not reranker.enabled:
+            return points
+        with metrics.span("rerank", team_id):
+            return await reranker.arerank(question, points)
+
+    def _candidate_limit(self) -> int:
+        return reranker.candidates if reranker.enabled else config.RETRIEVAL_LIMIT
+
+    def _build_context(self, team_id: str, points: List[Any],
+                       query_vector: List[float]) -> Tuple[List[str], Set[Tuple[str, int]]]:
+        """Context parts and sources; rerank scores drive MMR when present"""
+        relevance = [point.score for point in points] if reranker.enabled else None
+        with metrics.span("build_context", team_id):
+            return context_builder.build(points, query_vector, relevance)
+
+    async def _abuild_context(self, team_id: str, points: List[Any],
+                              query_vector: List[float]) -> Tuple[List[str], Set[Tuple[str, int]]]:
+        """Async variant of _build_context"""
+        relevance = [point.score for point in points] if reranker.enabled else None
+        with metrics.span("build_context", team_id):
+            return await context_builder.abuild(points, query_vector, relevance)
+
+    def _generate_ai_response(self, team_id: str, context_parts: List[str], question: str) -> str:
         """Generate AI response using context"""
-        messages = [
+        with metrics.span("completion", team_id):
+            return ai_service.get_completion(self._build_messages(context_parts, question))
+
+    def _build_messages(self, context_parts: List[str], question: str) -> List[dict]:
+        """Build the chat messages for a question and its context"""
+        context = "\n\n".join(context_parts)
+        return [
             {
                 "role": "system",
                 "content": (
@@ -84,14 +282,12 @@ class AnswerGenerator:
                 "content": (
                     f"Answer this question using only the context provided. "
                     f"If you cannot answer based on the context, say so.\n\n"
-                    f"Context:\n{' '.join(context_parts)}\n\n"
+                    f"Context:\n{context}\n\n"
                     f"Question: {question}"
                 )
             }
         ]
 
-        return ai_service.get_completion(messages)
-
 
 # Initialize global answer generator
 answer_generator = AnswerGenerator()
\ No newline at end of file
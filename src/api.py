@@ -1,15 +1,30 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from werkzeug.utils import secure_filename
-from src.utils.auth import require_team_auth, RateLimiter
+from src.utils.auth import require_team_auth
+from src.utils.rate_limit import rate_limiter
+from src.utils.security import security_manager
+from src.utils.metrics import metrics
+from src.utils.sse import stream_sse
+from src.ai_service import ai_service
 from src.answer_generator import answer_generator
-from src.document_processor import document_processor
+from src.jobs import job_manager
 from src.vector_store import vector_store
+from src.embedding_cache import embedding_cache
+from src.answer_cache import answer_cache
+from src.context_builder import context_builder
+from src.reranker import reranker
+from src.manifest import document_manifest
+from src.lifecycle import is_initialized, lifecycle, stats_if_initialized
 from src.config import config
+from src.utils.logging import ensure_logging, logging_stats
 from flask_talisman import Talisman
 from datetime import datetime
 import logging
 import time
 
+# Flask has no startup hook; gunicorn.conf.py may already have set this up
+ensure_logging()
+
 # Initialize Flask app
 app = Flask(__name__)
 
@@ -28,12 +43,6 @@ Talisman(app,
          }
          )
 
-# Initialize rate limiter
-rate_limiter = RateLimiter(
-    window=60,  # 60 seconds window
-    max_requests=100  # 100 requests per window
-)
-
 # Setup logging
 logger = logging.getLogger(__name__)
 
@@ -42,18 +51,23 @@ logger = logging.getLogger(__name__)
 def before_request():
     """Pre-request processing"""
     request.start_time = time.time()
+    metrics.start_trace()
+    # Warm services in the background on the first request (usually a probe)
+    lifecycle.start()
 
 
 @app.after_request
 def after_request(response):
     """Post-request processing"""
     duration = time.time() - request.start_time
+    # Set by require_team_auth on authenticated routes
+    team_id = g.get('team_id')
 
-    # Try to access JSON only if it exists, to prevent JSONDecodeError
-    team_id = None
-    if request.is_json:
-        json_data = request.get_json(silent=True)  # silent=True prevents error if JSON is invalid
-        team_id = json_data.get('team_id') if json_data else None
+    # The route template, not the path, keeps the series count bounded
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.record_request(route, request.method, response.status_code,
+                           duration * 1000, team_id)
+    trace = metrics.current_trace()
 
     # Log request details
     logger.info(
@@ -63,7 +77,8 @@ def after_request(response):
             "method": request.method,
             "duration": duration,
             "status_code": response.status_code,
-            "team_id": request.args.get('team_id') or team_id
+            "team_id": team_id,
+            "stages": trace.summary() if trace else None
         }
     )
 
@@ -90,28 +105,61 @@ def handle_error(error):
 
 @app.route("/health", methods=['GET'])
 def health_check():
-    """System health check endpoint"""
+    """Liveness endpoint; checks no dependencies and builds no services"""
+    return jsonify({
+        "status": "healthy",
+        "timestamp": datetime.utcnow().isoformat(),
+        "ready": lifecycle.ready,
+        "embedding_cache": stats_if_initialized(embedding_cache),
+        "answer_cache": answer_cache.stats(),
+        "context_builder": context_builder.stats(),
+        "reranker": stats_if_initialized(reranker),
+        "auth": stats_if_initialized(security_manager),
+        "logging": logging_stats(),
+        "embedding_batcher": (
+            ai_service.query_batcher.stats()
+            if is_initialized(ai_service) and ai_service.query_batcher else None
+        )
+    })
+
+
+@app.route("/ready", methods=['GET'])
+def readiness_check():
+    """Readiness endpoint: services warmed up and the vector store reachable"""
+    readiness = lifecycle.readiness()
     try:
+        if not readiness["ready"]:
+            return jsonify({
+                "status": "starting" if not readiness["error"] else "failed",
+                "timestamp": datetime.utcnow().isoformat(),
+                **readiness
+            }), 503
+
         # Check vector store connection
-        vector_store.client.get_collections()
+        vector_store.health_check()
 
-        # Return health status
         return jsonify({
-            "status": "healthy",
+            "status": "ready",
             "timestamp": datetime.utcnow().isoformat(),
-            "components": {
-                "vector_store": "healthy",
-                "api": "healthy"
-            }
+            **readiness
         })
 
     except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
+        logger.error(f"Readiness check failed: {str(e)}")
         return jsonify({
-            "status": "unhealthy",
+            "status": "unavailable",
             "timestamp": datetime.utcnow().isoformat(),
             "error": str(e)
-        }), 500
+        }), 503
+
+
+@app.route("/metrics", methods=['GET'])
+def metrics_endpoint():
+    """Stage latency histograms and request counters in Prometheus text format"""
+    if not metrics.enabled:
+        return jsonify({"error": "Metrics are disabled"}), 404
+    return Response(metrics.render_prometheus(),
+                    content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 @app.route("/answer", methods=['POST'])
@@ -122,26 +170,41 @@ def get_answer():
 
     Expected JSON body:
     {
-        "team_id": "string",
+        "team_id": "string (optional with bearer auth; must match the token)",
         "question": "string"
     }
+
+    Query parameters:
+    - stream: "true" to receive server-sent events (sources, token..., done)
     """
     try:
         # Validate request
         data = request.json
-        if not data:
+        if not isinstance(data, dict) or not data:
             return jsonify({"error": "No JSON data provided"}), 400
 
-        team_id = data.get('team_id')
+        team_id = g.team_id
         question = data.get('question')
 
         if not question:
             return jsonify({"error": "Question is required"}), 400
 
         # Check rate limit
-        if not rate_limiter.is_allowed(team_id):
+        if not rate_limiter.is_allowed(team_id, "answer"):
             return jsonify({"error": "Rate limit exceeded"}), 429
 
+        # Stream sources then tokens as server-sent events
+        if request.args.get('stream', 'false').lower() == 'true':
+            events = answer_generator.stream_answer(team_id, question)
+            return Response(
+                stream_with_context(stream_sse(events)),
+                mimetype='text/event-stream',
+                headers={
+                    'Cache-Control': 'no-cache',
+                    'X-Accel-Buffering': 'no'
+                }
+            )
+
         # Generate answer
         response = answer_generator.generate_answer(team_id, question)
 
@@ -150,7 +213,7 @@ def get_answer():
     except Exception as e:
         logger.error(
             f"Error generating answer: {str(e)}",
-            extra={"team_id": data.get('team_id') if data else None}
+            extra={"team_id": g.get('team_id')}
         )
         return jsonify({"error": str(e)}), 500
 
@@ -159,12 +222,14 @@ def get_answer():
 @require_team_auth
 def upload_file():
     """
-    Upload and process PDF within team scope
+    Accept a PDF within team scope and queue it for background processing
 
     Form data:
     - file: PDF file
-    - team_id: string
+    - team_id: string (optional with bearer auth; must match the token)
     - document_id: string
+
+    Returns a job id; poll GET /jobs/<job_id> for progress.
     """
     try:
         # Validate file
@@ -179,32 +244,59 @@ def upload_file():
             return jsonify({"error": "Only PDF files are allowed"}), 400
 
         # Get form data
-        team_id = request.form['team_id']
+        team_id = g.team_id
         document_id = request.form['document_id']
 
         # Check rate limit
-        if not rate_limiter.is_allowed(team_id):
+        if not rate_limiter.is_allowed(team_id, "upload"):
             return jsonify({"error": "Rate limit exceeded"}), 429
 
-        # Process file
-        chunks = document_processor.process_pdf(
-            pdf_file=file,
-            team_id=team_id,
-            doc_name=secure_filename(file.filename),
-            document_id=document_id
-        )
+        # Spool file and queue processing
+        job = job_manager.submit_upload(file, team_id, document_id)
 
         return jsonify({
-            "status": "success",
-            "chunks_processed": len(chunks),
+            "status": "accepted",
+            "job_id": job["job_id"],
             "document_id": document_id,
             "filename": secure_filename(file.filename)
-        })
+        }), 202
 
     except Exception as e:
         logger.error(
             f"Error processing upload: {str(e)}",
-            extra={"team_id": request.form.get('team_id')}
+            extra={"team_id": g.get('team_id')}
+        )
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/jobs/<job_id>", methods=['GET'])
+@require_team_auth
+def get_job(job_id):
+    """
+    Get the status of an upload job
+
+    Path parameters:
+    - job_id: string
+
+    Query parameters:
+    - team_id: string (optional with bearer auth; must match the token)
+    """
+    try:
+        team_id = g.team_id
+
+        job = job_manager.get_job(job_id)
+        if not job or job["team_id"] != team_id:
+            return jsonify({"error": "Job not found"}), 404
+
+        return jsonify({
+            "status": "success",
+            "job": job
+        })
+
+    except Exception as e:
+        logger.error(
+            f"Error fetching job: {str(e)}",
+            extra={"team_id": g.get('team_id'), "job_id": job_id}
         )
         return jsonify({"error": str(e)}), 500
 
@@ -216,10 +308,10 @@ def list_documents():
     List documents available for a team
 
     Query parameters:
-    - team_id: string
+    - team_id: string (optional with bearer auth; must match the token)
     """
     try:
-        team_id = request.args.get('team_id')
+        team_id = g.team_id
 
         # Get documents from vector store
         documents = vector_store.get_team_documents(team_id)
@@ -232,7 +324,7 @@ def list_documents():
     except Exception as e:
         logger.error(
             f"Error listing documents: {str(e)}",
-            extra={"team_id": request.args.get('team_id')}
+            extra={"team_id": g.get('team_id')}
         )
         return jsonify({"error": str(e)}), 500
 
@@ -247,16 +339,18 @@ def delete_document(document_id):
     - document_id: string
 
     Query parameters:
-    - team_id: string
+    - team_id: string (optional with bearer auth; must match the token)
     """
     try:
-        team_id = request.args.get('team_id')
+        team_id = g.team_id
 
         # Delete document vectors
         deleted_count = vector_store.delete_document(
             team_id=team_id,
             document_id=document_id
         )
+        document_manifest.delete(team_id, document_id)
+        answer_cache.invalidate_team(team_id)
 
         return jsonify({
             "status": "success",
@@ -268,7 +362,7 @@ def delete_document(document_id):
         logger.error(
             f"Error deleting document: {str(e)}",
             extra={
-                "team_id": request.args.get('team_id'),
+                "team_id": g.get('team_id'),
                 "document_id": document_id
             }
         )
@@ -290,6 +384,9 @@ if __name__ == "__main__":
     # Initialize vector store collection on startup
     vector_store.setup_collection()
 
+    # Warm services and pick up uploads still queued when the last process stopped
+    lifecycle.start()
+
     # Start server
     app.run(
         host='0.0.0.0',
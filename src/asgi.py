@@ -0,0 +1,412 @@
+from contextlib import asynccontextmanager
+from datetime import datetime
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+from werkzeug.utils import secure_filename
+from src.utils.auth import require_team_auth_async
+from src.utils.rate_limit import rate_limiter
+from src.utils.security import security_manager
+from src.utils.metrics import metrics
+from src.utils.sse import format_sse
+from src.answer_generator import answer_generator
+from src.answer_cache import answer_cache
+from src.context_builder import context_builder
+from src.reranker import reranker
+from src.manifest import document_manifest
+from src.lifecycle import is_initialized, lifecycle, stats_if_initialized
+from src.embedding_cache import embedding_cache
+from src.ai_service import ai_service
+from src.vector_store import vector_store
+from src.jobs import job_manager
+from src.config import config
+from src.utils.logging import ensure_logging, logging_stats
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class RequestContextMiddleware(BaseHTTPMiddleware):
+    """Request logging plus the security and CORS headers the Flask app sets"""
+
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.time()
+        # Shared with the endpoint task, which records its stages into it
+        trace = metrics.start_trace()
+        response = await call_next(request)
+        duration = time.time() - start_time
+        # Set by require_team_auth_async on authenticated routes
+        team_id = getattr(request.state, 'team_id', None)
+
+        metrics.record_request(_route_template(request), request.method,
+                               response.status_code, duration * 1000, team_id)
+
+        response.headers['X-Content-Type-Options'] = 'nosniff'
+        response.headers['X-Frame-Options'] = 'SAMEORIGIN'
+        response.headers['Content-Security-Policy'] = (
+            "default-src 'self'; img-src *; script-src 'self'"
+        )
+        if config.ENABLE_HTTPS:
+            response.headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
+
+        if config.ENABLE_CORS:
+            response.headers['Access-Control-Allow-Origin'] = '*'
+            response.headers['Access-Control-Allow-Headers'] = 'Content-Type,Authorization'
+            response.headers['Access-Control-Allow-Methods'] = 'GET,PUT,POST,DELETE'
+
+        logger.info(
+            "Request processed",
+            extra={
+                "path": request.url.path,
+                "method": request.method,
+                "duration": duration,
+                "status_code": response.status_code,
+                "team_id": team_id,
+                "stages": trace.summary()
+            }
+        )
+        return response
+
+
+def _route_template(request: Request) -> str:
+    """The matched route's path template, which keeps metric labels bounded"""
+    endpoint = request.scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    for route in request.app.routes:
+        if getattr(route, "endpoint", None) is endpoint:
+            return route.path
+    return "unmatched"
+
+
+async def handle_error(request: Request, error: Exception) -> JSONResponse:
+    """Global error handler"""
+    logger.error(
+        f"Unhandled error: {str(error)}",
+        exc_info=error,
+        extra={
+            "path": request.url.path,
+            "method": request.method
+        }
+    )
+
+    return JSONResponse({
+        "error": "Internal server error",
+        "message": str(error) if config.DEBUG else "An unexpected error occurred"
+    }, status_code=500)
+
+
+async def health_check(request: Request) -> JSONResponse:
+    """Liveness endpoint; checks no dependencies and builds no services"""
+    return JSONResponse({
+        "status": "healthy",
+        "timestamp": datetime.utcnow().isoformat(),
+        "ready": lifecycle.ready,
+        "embedding_cache": stats_if_initialized(embedding_cache),
+        "answer_cache": answer_cache.stats(),
+        "context_builder": context_builder.stats(),
+        "reranker": stats_if_initialized(reranker),
+        "auth": stats_if_initialized(security_manager),
+        "logging": logging_stats(),
+        "embedding_batcher": (
+            ai_service.query_batcher.stats()
+            if is_initialized(ai_service) and ai_service.query_batcher else None
+        )
+    })
+
+
+async def readiness_check(request: Request) -> JSONResponse:
+    """Readiness endpoint: services warmed up and the vector store reachable"""
+    readiness = lifecycle.readiness()
+    try:
+        if not readiness["ready"]:
+            return JSONResponse({
+                "status": "starting" if not readiness["error"] else "failed",
+                "timestamp": datetime.utcnow().isoformat(),
+                **readiness
+            }, status_code=503)
+
+        # Check vector store connection
+        await vector_store.ahealth_check()
+
+        return JSONResponse({
+            "status": "ready",
+            "timestamp": datetime.utcnow().isoformat(),
+            **readiness
+        })
+
+    except Exception as e:
+        logger.error(f"Readiness check failed: {str(e)}")
+        return JSONResponse({
+            "status": "unavailable",
+            "timestamp": datetime.utcnow().isoformat(),
+            "error": str(e)
+        }, status_code=503)
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    """Stage latency histograms and request counters in Prometheus text format"""
+    if not metrics.enabled:
+        return JSONResponse({"error": "Metrics are disabled"}, status_code=404)
+    return PlainTextResponse(metrics.render_prometheus(),
+                             media_type='text/plain; version=0.0.4')
+
+
+@require_team_auth_async
+async def get_answer(request: Request) -> Response:
+    """
+    Generate answer for question within team scope
+
+    Expected JSON body:
+    {
+        "team_id": "string (optional with bearer auth; must match the token)",
+        "question": "string"
+    }
+
+    Query parameters:
+    - stream: "true" to receive server-sent events (sources, token..., done)
+    """
+    data = None
+    try:
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
+        if not isinstance(data, dict) or not data:
+            return JSONResponse({"error": "No JSON data provided"}, status_code=400)
+
+        team_id = request.state.team_id
+        question = data.get('question')
+
+        if not question:
+            return JSONResponse({"error": "Question is required"}, status_code=400)
+
+        # Check rate limit; shared backends block, so keep it off the event loop
+        if not await run_in_threadpool(rate_limiter.is_allowed, team_id, "answer"):
+            return JSONResponse({"error": "Rate limit exceeded"}, status_code=429)
+
+        # Stream sources then tokens as server-sent events
+        if request.query_params.get('stream', 'false').lower() == 'true':
+            async def events():
+                async for event, payload in answer_generator.astream_answer(team_id, question):
+                    yield format_sse(event, payload)
+
+            return StreamingResponse(
+                events(),
+                media_type='text/event-stream',
+                headers={
+                    'Cache-Control': 'no-cache',
+                    'X-Accel-Buffering': 'no'
+                }
+            )
+
+        # Generate answer
+        response = await answer_generator.agenerate_answer(team_id, question)
+
+        return JSONResponse(response)
+
+    except Exception as e:
+        logger.error(
+            f"Error generating answer: {str(e)}",
+            extra={"team_id": request.state.team_id}
+        )
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+@require_team_auth_async
+async def upload_file(request: Request) -> JSONResponse:
+    """
+    Accept a PDF within team scope and queue it for background processing
+
+    Form data:
+    - file: PDF file
+    - team_id: string (optional with bearer auth; must match the token)
+    - document_id: string
+
+    Returns a job id; poll GET /jobs/<job_id> for progress.
+    """
+    form = None
+    try:
+        form = await request.form()
+
+        # Validate file
+        if 'file' not in form:
+            return JSONResponse({"error": "No file part"}, status_code=400)
+
+        file = form['file']
+        if not getattr(file, 'filename', None):
+            return JSONResponse({"error": "No selected file"}, status_code=400)
+
+        if not file.filename.endswith('.pdf'):
+            return JSONResponse({"error": "Only PDF files are allowed"}, status_code=400)
+
+        # Get form data
+        team_id = request.state.team_id
+        document_id = form['document_id']
+
+        # Check rate limit; shared backends block, so keep it off the event loop
+        if not await run_in_threadpool(rate_limiter.is_allowed, team_id, "upload"):
+            return JSONResponse({"error": "Rate limit exceeded"}, status_code=429)
+
+        # Spooling copies the file to disk, so keep it off the event loop
+        job = await run_in_threadpool(job_manager.submit_upload, file, team_id, document_id)
+
+        return JSONResponse({
+            "status": "accepted",
+            "job_id": job["job_id"],
+            "document_id": document_id,
+            "filename": secure_filename(file.filename)
+        }, status_code=202)
+
+    except Exception as e:
+        logger.error(
+            f"Error processing upload: {str(e)}",
+            extra={"team_id": request.state.team_id}
+        )
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+@require_team_auth_async
+async def get_job(request: Request) -> JSONResponse:
+    """
+    Get the status of an upload job
+
+    Path parameters:
+    - job_id: string
+
+    Query parameters:
+    - team_id: string (optional with bearer auth; must match the token)
+    """
+    job_id = request.path_params['job_id']
+    try:
+        team_id = request.state.team_id
+
+        job = await run_in_threadpool(job_manager.get_job, job_id)
+        if not job or job["team_id"] != team_id:
+            return JSONResponse({"error": "Job not found"}, status_code=404)
+
+        return JSONResponse({
+            "status": "success",
+            "job": job
+        })
+
+    except Exception as e:
+        logger.error(
+            f"Error fetching job: {str(e)}",
+            extra={"team_id": request.state.team_id, "job_id": job_id}
+        )
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+@require_team_auth_async
+async def list_documents(request: Request) -> JSONResponse:
+    """
+    List documents available for a team
+
+    Query parameters:
+    - team_id: string (optional with bearer auth; must match the token)
+    """
+    try:
+        team_id = request.state.team_id
+
+        documents = await run_in_threadpool(vector_store.get_team_documents, team_id)
+
+        return JSONResponse({
+            "status": "success",
+            "documents": documents
+        })
+
+    except Exception as e:
+        logger.error(
+            f"Error listing documents: {str(e)}",
+            extra={"team_id": request.state.team_id}
+        )
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+@require_team_auth_async
+async def delete_document(request: Request) -> JSONResponse:
+    """
+    Delete a document and its vectors
+
+    Path parameters:
+    - document_id: string
+
+    Query parameters:
+    - team_id: string (optional with bearer auth; must match the token)
+    """
+    document_id = request.path_params['document_id']
+    try:
+        team_id = request.state.team_id
+
+        deleted_count = await run_in_threadpool(
+            vector_store.delete_document,
+            team_id=team_id,
+            document_id=document_id
+        )
+        await run_in_threadpool(document_manifest.delete, team_id, document_id)
+        await run_in_threadpool(answer_cache.invalidate_team, team_id)
+
+        return JSONResponse({
+            "status": "success",
+            "document_id": document_id,
+            "vectors_deleted": deleted_count
+        })
+
+    except Exception as e:
+        logger.error(
+            f"Error deleting document: {str(e)}",
+            extra={
+                "team_id": request.state.team_id,
+                "document_id": document_id
+            }
+        )
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    """Warm services and resume jobs in the background; release clients on shutdown"""
+    ensure_logging()
+    lifecycle.start()
+    yield
+    await lifecycle.ashutdown()
+
+
+app = Starlette(
+    debug=config.DEBUG,
+    routes=[
+        Route("/health", health_check, methods=["GET"]),
+        Route("/ready", readiness_check, methods=["GET"]),
+        Route("/metrics", metrics_endpoint, methods=["GET"]),
+        Route("/answer", get_answer, methods=["POST"]),
+        Route("/upload", upload_file, methods=["POST"]),
+        Route("/jobs/{job_id}", get_job, methods=["GET"]),
+        Route("/documents", list_documents, methods=["GET"]),
+        Route("/documents/{document_id}", delete_document, methods=["DELETE"]),
+    ],
+    middleware=[Middleware(RequestContextMiddleware)],
+    exception_handlers={Exception: handle_error},
+    lifespan=lifespan
+)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    ensure_logging()
+
+    # Initialize vector store collection on startup
+    vector_store.setup_collection()
+
+    uvicorn.run(
+        app,
+        host='0.0.0.0',
+        port=config.PORT,
+        log_level="debug" if config.DEBUG else "info"
+    )
@@ -0,0 +1,298 @@
+import copy
+import re
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from src.config import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ("paragraph", "sentence", "fixed")
+
+# Special tokens ([CLS], [SEP]) the model adds around every input
+_SPECIAL_TOKENS = 2
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+_SENTENCE_END = re.compile(r"[.!?:;][\"')\]]*$")
+
+
+class Chunk(NamedTuple):
+    """A chunk of text and the pages it spans"""
+    page_start: int
+    page_end: int
+    index: int
+    text: str
+
+
+class _Unit(NamedTuple):
+    """A sentence, or a piece of one that exceeds the token limit"""
+    page_start: int
+    page_end: int
+    text: str
+    tokens: int
+    paragraph_start: bool
+
+
+class BaseChunker(ABC):
+    """Split a stream of (page_number, text) pages into chunks
+
+    Chunks are numbered per starting page, so an edit on one page does not
+    renumber the chunks of the pages after it.
+    """
+
+    @abstractmethod
+    def iter_chunks(self, pages: Iterable[Tuple[int, str]]) -> Iterator[Chunk]:
+        pass
+
+
+class CharacterChunker(BaseChunker):
+    """Fixed character windows with a 50-character look-back, one page at a time"""
+
+    def __init__(self, chunk_size: int = 500, overlap: int = 50):
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+
+    def iter_chunks(self, pages: Iterable[Tuple[int, str]]) -> Iterator[Chunk]:
+        for page_num, text in pages:
+            for i, start in enumerate(range(0, len(text), self.chunk_size)):
+                yield Chunk(page_num, page_num,
+                            i, text[max(0, start - self.overlap):start + self.chunk_size])
+
+
+class SentenceChunker(BaseChunker):
+    """Pack whole sentences into chunks of at most ``max_tokens`` model tokens
+
+    Sizes are measured with the embedding model's own tokenizer, capped at
+    its sequence length so no chunk is silently truncated when embedded.
+    Consecutive chunks share up to ``overlap_tokens`` tokens of trailing
+    sentences. A sentence longer than the limit is cut at token boundaries.
+
+    With ``across_pages``, a sentence broken by a page break is joined back
+    together, and a page's last chunk is carried into the next page while it
+    is shorter than ``min_tokens``. Chunks record the pages they span.
+    """
+
+    def __init__(
+            self,
+            tokenizer: Any,
+            max_seq_length: Optional[int] = None,
+            max_tokens: int = config.CHUNK_MAX_TOKENS,
+            overlap_tokens: int = config.CHUNK_OVERLAP_TOKENS,
+            min_tokens: int = config.CHUNK_MIN_TOKENS,
+            across_pages: bool = config.CHUNK_ACROSS_PAGES
+    ):
+        model_limit = max_seq_length or getattr(tokenizer, "model_max_length", None)
+        if model_limit:
+            max_tokens = min(max_tokens, model_limit - _SPECIAL_TOKENS)
+        self.max_tokens = max(1, max_tokens)
+        self.overlap_tokens = min(overlap_tokens, self.max_tokens // 2)
+        self.min_tokens = min(min_tokens, self.max_tokens)
+        self.across_pages = across_pages
+        # A private copy: fast tokenizers are not safe to share between threads
+        self._tokenizer = copy.deepcopy(tokenizer)
+        self._lock = threading.Lock()
+
+    def iter_chunks(self, pages: Iterable[Tuple[int, str]]) -> Iterator[Chunk]:
+        pending: List[_Unit] = []
+        carried: Optional[_Unit] = None
+        numbering = _ChunkNumbering()
+
+        for page_num, text in pages:
+            units = self._units(page_num, text)
+            if carried is not None:
+                units = self._join_carried(carried, units)
+                carried = None
+            if not units:
+                continue
+
+            if self.across_pages and not _SENTENCE_END.search(units[-1].text):
+                # The last sentence continues on the next page
+                carried = units.pop()
+
+            for chunk_units in self._pack(pending, units):
+                yield numbering.chunk(chunk_units)
+
+            # Ending chunks at page breaks keeps later chunk boundaries stable
+            if not self.across_pages or sum(u.tokens for u in pending) >= self.min_tokens:
+                if pending:
+                    yield numbering.chunk(pending)
+                pending = []
+
+        if carried is not None:
+            for chunk_units in self._pack(pending, [carried]):
+                yield numbering.chunk(chunk_units)
+        if pending:
+            yield numbering.chunk(pending)
+
+    def _units(self, page_num: int, text: str) -> List[_Unit]:
+        """Sentences of a page with their token counts"""
+        sentences = []
+        for paragraph in _PARAGRAPH_BREAK.split(text):
+            for i, sentence in enumerate(_SENTENCE_BREAK.split(paragraph)):
+                # PDF line wraps become spaces
+                sentence = " ".join(sentence.split())
+                if sentence:
+                    sentences.append((sentence, i == 0))
+        if not sentences:
+            return []
+
+        counts = self._count_tokens([sentence for sentence, _ in sentences])
+        units = []
+        for (sentence, paragraph_start), tokens in zip(sentences, counts):
+            unit = _Unit(page_num, page_num, sentence, tokens, paragraph_start)
+            units.extend(self._split_long(unit) if tokens > self.max_tokens else [unit])
+        return units
+
+    def _join_carried(self, carried: _Unit, units: List[_Unit]) -> List[_Unit]:
+        """Prepend the end of the previous page's last sentence"""
+        if not units or units[0].paragraph_start and _starts_sentence(units[0].text):
+            return [carried] + units
+        text = f"{carried.text} {units[0].text}"
+        joined = _Unit(carried.page_start, units[0].page_end, text,
+                       self._count_tokens([text])[0], carried.paragraph_start)
+        head = self._split_long(joined) if joined.tokens > self.max_tokens else [joined]
+        return head + units[1:]
+
+    def _pack(self, pending: List[_Unit], units: List[_Unit]) -> Iterator[List[_Unit]]:
+        """Yield full chunks; what is left over stays in ``pending``"""
+        used = sum(u.tokens for u in pending)
+        for unit in units:
+            if pending and self._should_break(pending, used, unit, units):
+                yield list(pending)
+                tail = [] if self._clean_break(unit) else self._overlap(pending)
+                # The overlap must leave room for the unit itself
+                while tail and sum(u.tokens for u in tail) + unit.tokens > self.max_tokens:
+                    tail.pop(0)
+                pending[:] = tail
+                used = sum(u.tokens for u in pending)
+            pending.append(unit)
+            used += unit.tokens
+
+    def _should_break(self, pending: List[_Unit], used: int, unit: _Unit,
+                      units: List[_Unit]) -> bool:
+        return used + unit.tokens > self.max_tokens
+
+    def _clean_break(self, unit: _Unit) -> bool:
+        """Whether a chunk starting at ``unit`` needs no overlap"""
+        return False
+
+    def _overlap(self, units: List[_Unit]) -> List[_Unit]:
+        """Trailing units of a chunk that fit in ``overlap_tokens``"""
+        tail: List[_Unit] = []
+        used = 0
+        for unit in reversed(units):
+            if used + unit.tokens > self.overlap_tokens:
+                break
+            tail.insert(0, unit)
+            used += unit.tokens
+        return tail
+
+    def _split_long(self, unit: _Unit) -> List[_Unit]:
+        """Cut a unit longer than ``max_tokens`` at token boundaries"""
+        with self._lock:
+            encoding = self._tokenizer(
+                unit.text,
+                add_special_tokens=False,
+                return_offsets_mapping=True,
+                return_attention_mask=False,
+                return_token_type_ids=False
+            )
+        offsets = encoding["offset_mapping"]
+
+        pieces = []
+        for start in range(0, len(offsets), self.max_tokens):
+            window = offsets[start:start + self.max_tokens]
+            begin = window[0][0]
+            end = offsets[start + self.max_tokens][0] if start + self.max_tokens < len(offsets) else len(unit.text)
+            text = unit.text[begin:end].strip()
+            if text:
+                pieces.append(_Unit(unit.page_start, unit.page_end, text, len(window),
+                                    unit.paragraph_start and not pieces))
+        return pieces
+
+    def _count_tokens(self, texts: List[str]) -> List[int]:
+        """Token counts without special tokens, in one batched call"""
+        with self._lock:
+            encoding = self._tokenizer(
+                texts,
+                add_special_tokens=False,
+                return_attention_mask=False,
+                return_token_type_ids=False
+            )
+        return [len(ids) for ids in encoding["input_ids"]]
+
+
+class ParagraphChunker(SentenceChunker):
+    """Sentence packing that prefers to start chunks at paragraph boundaries
+
+    A paragraph that would not fit in the current chunk but fits in an
+    empty one starts a new chunk, without overlap, once the current chunk
+    has ``min_tokens``. Longer paragraphs are packed sentence by sentence.
+    """
+
+    def _should_break(self, pending: List[_Unit], used: int, unit: _Unit,
+                      units: List[_Unit]) -> bool:
+        if used + unit.tokens > self.max_tokens:
+            return True
+        if not unit.paragraph_start or used < self.min_tokens:
+            return False
+        paragraph = _paragraph_tokens(unit, units)
+        return used + paragraph > self.max_tokens >= paragraph
+
+    def _clean_break(self, unit: _Unit) -> bool:
+        return unit.paragraph_start
+
+
+class _ChunkNumbering:
+    """Build chunks from units, numbering them per starting page"""
+
+    def __init__(self):
+        self.page: Optional[int] = None
+        self.index = 0
+
+    def chunk(self, units: List[_Unit]) -> Chunk:
+        page_start = units[0].page_start
+        if page_start != self.page:
+            self.page, self.index = page_start, 0
+        else:
+            self.index += 1
+
+        text = units[0].text
+        for unit in units[1:]:
+            text += ("\n\n" if unit.paragraph_start else " ") + unit.text
+        return Chunk(page_start, max(u.page_end for u in units), self.index, text)
+
+
+def _paragraph_tokens(unit: _Unit, units: List[_Unit]) -> int:
+    """Tokens in the paragraph that starts with ``unit``"""
+    position = next(i for i, u in enumerate(units) if u is unit)
+    tokens = unit.tokens
+    for following in units[position + 1:]:
+        if following.paragraph_start:
+            break
+        tokens += following.tokens
+    return tokens
+
+
+def _starts_sentence(text: str) -> bool:
+    return bool(re.match(r"[\"'(\[]?[A-Z0-9]", text))
+
+
+def create_chunker(
+        tokenizer: Any = None,
+        max_seq_length: Optional[int] = None,
+        strategy: str = config.CHUNK_STRATEGY,
+        chunk_size: int = 500
+) -> BaseChunker:
+    """Chunker for ``strategy``; the token-based ones need the model's tokenizer"""
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown chunk strategy '{strategy}', expected one of {STRATEGIES}")
+    if strategy == "fixed":
+        return CharacterChunker(chunk_size)
+    if tokenizer is None:
+        raise ValueError(f"Chunk strategy '{strategy}' needs the embedding model's tokenizer")
+    if strategy == "sentence":
+        return SentenceChunker(tokenizer, max_seq_length)
+    return ParagraphChunker(tokenizer, max_seq_length)
@@ -17,6 +17,135 @@ class Config:
     QDRANT_PORT = int(os.getenv("QDRANT_PORT", 6333))
     QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
     QDRANT_HTTPS = os.getenv("QDRANT_HTTPS", "false").lower() == "true"
+    QDRANT_COLLECTION_NAME = os.getenv("QDRANT_COLLECTION_NAME", "pdf_embeddings")
+    # shared: one collection with tenant indexes; shard_key: one shard key per team
+    QDRANT_LAYOUT = os.getenv("QDRANT_LAYOUT", "shared")
+    QDRANT_PAYLOAD_M = int(os.getenv("QDRANT_PAYLOAD_M", 16))
+    # memory, on_disk, scalar (int8) or product (PQ); see QdrantVectorStore
+    QDRANT_STORAGE_PROFILE = os.getenv("QDRANT_STORAGE_PROFILE", "memory")
+    QDRANT_QUANTIZATION_OVERSAMPLING = float(os.getenv("QDRANT_QUANTIZATION_OVERSAMPLING", 2.0))
+
+    # Retrieval: "hybrid" fuses dense and BM25 sparse results, "dense" is vectors only
+    RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+    RETRIEVAL_LIMIT = int(os.getenv("RETRIEVAL_LIMIT", 15))
+    # Candidates taken from each of the dense and sparse searches before fusion
+    HYBRID_PREFETCH_LIMIT = int(os.getenv("HYBRID_PREFETCH_LIMIT", 50))
+    BM25_K1 = float(os.getenv("BM25_K1", 1.2))
+    BM25_B = float(os.getenv("BM25_B", 0.75))
+    # Typical chunk length in terms after stopword removal
+    BM25_AVG_DOC_LENGTH = float(os.getenv("BM25_AVG_DOC_LENGTH", 60))
+
+    # Optional cross-encoder rerank of a larger candidate set down to RERANK_TOP_K
+    RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+    RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+    RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", 30))
+    RERANK_TOP_K = int(os.getenv("RERANK_TOP_K", 5))
+    RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", 32))
+    RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", 10000))
+
+    # Prompt context assembly
+    CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 3000))
+    CONTEXT_MMR_LAMBDA = float(os.getenv("CONTEXT_MMR_LAMBDA", 0.7))
+    # Hits at least this similar to an already chosen chunk are dropped
+    CONTEXT_DUPLICATE_THRESHOLD = float(os.getenv("CONTEXT_DUPLICATE_THRESHOLD", 0.95))
+    CONTEXT_TOKENIZER = os.getenv("CONTEXT_TOKENIZER", "cl100k_base")
+
+    # Bearer token auth; the team comes from the token's team_id claim.
+    # JWT_SECRET_KEYS is "kid:secret,kid:secret" (the first signs); JWT_KEYS_FILE
+    # is a JSON object of kid to secret, re-read when it changes
+    AUTH_ENABLED = os.getenv("AUTH_ENABLED", "true").lower() == "true"
+    JWT_SECRET_KEYS = os.getenv("JWT_SECRET_KEYS", "")
+    JWT_KEYS_FILE = os.getenv("JWT_KEYS_FILE")
+    JWT_KEYS_RELOAD_SECONDS = float(os.getenv("JWT_KEYS_RELOAD_SECONDS", 30))
+    JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+    AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", 10000))
+    AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", 300))
+
+    # Rate limiting per team and action over a sliding window; memory is per
+    # process, sqlite is shared by the processes of one host, redis across hosts
+    RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "sqlite")
+    RATE_LIMIT_WINDOW_SECONDS = float(os.getenv("RATE_LIMIT_WINDOW_SECONDS", 60))
+    RATE_LIMIT_ANSWER_REQUESTS = int(os.getenv("RATE_LIMIT_ANSWER_REQUESTS", 100))
+    RATE_LIMIT_UPLOAD_REQUESTS = int(os.getenv("RATE_LIMIT_UPLOAD_REQUESTS", 100))
+    RATE_LIMIT_DB_PATH = os.getenv("RATE_LIMIT_DB_PATH", "data/ratelimit.db")
+    RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+
+    # Prometheus /metrics: per-stage latency histograms; teams beyond
+    # METRICS_MAX_TEAMS share the "other" label to bound series cardinality
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_PREFIX = os.getenv("METRICS_PREFIX", "pdfqa")
+    METRICS_MAX_TEAMS = int(os.getenv("METRICS_MAX_TEAMS", 100))
+    # Each process writes its series here so /metrics sums all workers;
+    # empty keeps them per process
+    METRICS_DIR = os.getenv("METRICS_DIR", "data/metrics")
+    METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", 5))
+
+    # Logging: records go through a bounded queue to a background writer;
+    # below-WARNING records are dropped when it is full and can be sampled
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+    LOG_INFO_SAMPLE_RATE = float(os.getenv("LOG_INFO_SAMPLE_RATE", 1.0))
+
+    # Startup: build and warm every service when the server starts (otherwise
+    # on first use), and load model weights in the gunicorn master before forking
+    WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+    PRELOAD_BEFORE_FORK = os.getenv("PRELOAD_BEFORE_FORK", "true").lower() == "true"
+
+    # Embedding settings
+    EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 64))
+    # Threads that run CPU-bound encoding for the async server
+    EMBEDDING_EXECUTOR_WORKERS = int(os.getenv("EMBEDDING_EXECUTOR_WORKERS", 2))
+    # Cross-request micro-batching of query embeddings
+    EMBEDDING_MICROBATCH_ENABLED = os.getenv("EMBEDDING_MICROBATCH_ENABLED", "true").lower() == "true"
+    EMBEDDING_MICROBATCH_MAX_SIZE = int(os.getenv("EMBEDDING_MICROBATCH_MAX_SIZE", 32))
+    EMBEDDING_MICROBATCH_MAX_WAIT_MS = float(os.getenv("EMBEDDING_MICROBATCH_MAX_WAIT_MS", 5))
+
+    # Embedding cache shared by ingestion and querying
+    EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "data/embeddings.db")
+    EMBEDDING_CACHE_MEMORY_MB = int(os.getenv("EMBEDDING_CACHE_MEMORY_MB", 64))
+
+    # Semantic answer cache for /answer
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", 0.95))
+    ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", 600))
+    ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", 256))
+    ANSWER_CACHE_MAX_TEAMS = int(os.getenv("ANSWER_CACHE_MAX_TEAMS", 1024))
+    # Per-team invalidation counters shared by every worker process
+    ANSWER_CACHE_DB_PATH = os.getenv("ANSWER_CACHE_DB_PATH", "data/answer_cache.db")
+
+    # Ingestion pipeline settings
+    INGEST_UPSERT_BATCH_SIZE = int(os.getenv("INGEST_UPSERT_BATCH_SIZE", 256))
+    INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", 8))
+    # Per-document chunk manifests for incremental re-ingestion
+    MANIFEST_DB_PATH = os.getenv("MANIFEST_DB_PATH", "data/manifests.db")
+
+    # Background upload jobs
+    JOB_DB_PATH = os.getenv("JOB_DB_PATH", "data/jobs.db")
+    UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR", "data/spool")
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+    # A running job whose process has not renewed it for this long is re-queued
+    JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", 120))
+
+    # Chunking: paragraph or sentence (token-based), or fixed 500-character windows
+    CHUNK_STRATEGY = os.getenv("CHUNK_STRATEGY", "paragraph")
+    # Capped at the embedding model's sequence length
+    CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", 256))
+    CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", 32))
+    CHUNK_MIN_TOKENS = int(os.getenv("CHUNK_MIN_TOKENS", 64))
+    CHUNK_ACROSS_PAGES = os.getenv("CHUNK_ACROSS_PAGES", "true").lower() == "true"
+
+    # PDF text extraction: pdfplumber, pypdfium2 or pdfminer
+    PDF_EXTRACT_BACKEND = os.getenv("PDF_EXTRACT_BACKEND", "pdfplumber")
+    # 0 sizes the pool automatically, 1 extracts in-process
+    PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", 0))
+    PDF_EXTRACT_PAGES_PER_TASK = int(os.getenv("PDF_EXTRACT_PAGES_PER_TASK", 8))
+
+    # Vector store backend: qdrant, or local for in-process memory-mapped storage
+    VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "qdrant")
+    LOCAL_VECTOR_STORE_PATH = os.getenv("LOCAL_VECTOR_STORE_PATH", "data/vectors")
+    # Build an HNSW index (requires hnswlib) once a team has this many points; 0 disables
+    LOCAL_HNSW_MIN_POINTS = int(os.getenv("LOCAL_HNSW_MIN_POINTS", 0))
 
     # Application settings
     DEBUG = os.getenv("DEBUG", "false").lower() == "true"
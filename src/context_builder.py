@@ -0,0 +1,248 @@
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+import numpy as np
+from src.vector_store import VECTOR_NAME
+from src.config import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Longest chunk overlap looked for when merging neighbours; covers both the
+# 50-character and the CHUNK_OVERLAP_TOKENS overlap
+_MAX_OVERLAP = 1000
+
+
+class _Candidate:
+    """A retrieved chunk with its source and vector"""
+
+    __slots__ = ("doc_name", "page_number", "page_end", "chunk_index", "text", "vector", "rank",
+                 "relevance")
+
+    def __init__(self, payload: Dict[str, Any], vector: Optional[np.ndarray], rank: int,
+                 relevance: Optional[float] = None):
+        self.doc_name = payload.get("doc_name")
+        self.page_number = payload.get("page_number")
+        # Chunks may run onto following pages
+        self.page_end = payload.get("page_end") or self.page_number
+        self.chunk_index = payload.get("chunk_index")
+        self.text = payload.get("text", "").strip()
+        self.vector = vector
+        self.rank = rank
+        self.relevance = relevance
+
+
+class ContextBuilder:
+    """Assemble prompt context from search hits within a token budget
+
+    Hits are ordered by maximal marginal relevance over their vectors, so
+    near-duplicates rank low (or are dropped above ``duplicate_threshold``),
+    then added until ``token_budget`` tokens are used. Neighbouring chunks
+    of the same page are merged into one part with their overlap removed.
+    Token counts use the completion model's tokenizer (tiktoken).
+    """
+
+    def __init__(
+            self,
+            token_budget: int = config.CONTEXT_TOKEN_BUDGET,
+            mmr_lambda: float = config.CONTEXT_MMR_LAMBDA,
+            duplicate_threshold: float = config.CONTEXT_DUPLICATE_THRESHOLD,
+            encoding_name: str = config.CONTEXT_TOKENIZER
+    ):
+        self.token_budget = token_budget
+        self.mmr_lambda = mmr_lambda
+        self.duplicate_threshold = duplicate_threshold
+        self.encoding_name = encoding_name
+        self._encoding = None
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "tokens_in": 0, "tokens_out": 0,
+                       "chunks_in": 0, "chunks_out": 0}
+
+    def count_tokens(self, text: str) -> int:
+        """Tokens in ``text`` for the completion model"""
+        if self._encoding is None:
+            # Loaded on first use; tiktoken fetches the BPE file once and caches it
+            import tiktoken
+
+            self._encoding = tiktoken.get_encoding(self.encoding_name)
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+    def build(
+            self,
+            points: Sequence[Any],
+            query_vector: Sequence[float],
+            relevance: Optional[Sequence[float]] = None
+    ) -> Tuple[List[str], Set[Tuple[str, int]]]:
+        """Context parts and the (doc_name, page) sources they cite
+
+        ``relevance`` overrides query similarity in MMR, e.g. with rerank
+        scores; it is aligned with ``points``.
+        """
+        candidates = self._candidates(points, relevance)
+        if not candidates:
+            return [], set()
+
+        selected = []
+        used = 0
+        for candidate in self._mmr_order(candidates, np.asarray(query_vector, dtype=np.float32),
+                                         relevance is not None):
+            cost = self.count_tokens(self._format(candidate.doc_name, candidate.page_number,
+                                                  candidate.text, candidate.page_end))
+            if used + cost > self.token_budget:
+                # A shorter chunk further down may still fit
+                continue
+            selected.append(candidate)
+            used += cost
+
+        context_parts = self._merge(selected)
+        sources = {(c.doc_name, c.page_number) for c in selected}
+        self._record(points, candidates, context_parts, len(selected))
+        return context_parts, sources
+
+    async def abuild(
+            self,
+            points: Sequence[Any],
+            query_vector: Sequence[float],
+            relevance: Optional[Sequence[float]] = None
+    ) -> Tuple[List[str], Set[Tuple[str, int]]]:
+        """Build without blocking the event loop"""
+        if not points:
+            return [], set()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.build, points, query_vector, relevance)
+
+    def stats(self) -> Dict[str, Any]:
+        """Token counters across requests"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["tokens_saved"] = stats["tokens_in"] - stats["tokens_out"]
+        stats["budget"] = self.token_budget
+        return stats
+
+    def _candidates(
+            self,
+            points: Sequence[Any],
+            relevance: Optional[Sequence[float]] = None
+    ) -> List[_Candidate]:
+        """Hits with text, exact duplicates removed"""
+        candidates = []
+        seen_text = set()
+        for rank, point in enumerate(points):
+            if not point.payload:
+                continue
+            vector = point.vector.get(VECTOR_NAME) if isinstance(point.vector, dict) else None
+            candidate = _Candidate(
+                point.payload,
+                np.asarray(vector, dtype=np.float32) if vector is not None else None,
+                rank,
+                relevance[rank] if relevance is not None else None
+            )
+            if not candidate.text or candidate.text in seen_text:
+                continue
+            seen_text.add(candidate.text)
+            candidates.append(candidate)
+        return candidates
+
+    def _mmr_order(
+            self,
+            candidates: List[_Candidate],
+            query: np.ndarray,
+            given_relevance: bool = False
+    ) -> List[_Candidate]:
+        """Greedy MMR ranking; search order when vectors are missing"""
+        if any(c.vector is None for c in candidates):
+            return candidates
+
+        vectors = np.stack([c.vector for c in candidates])
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        if given_relevance:
+            relevance = np.asarray([c.relevance for c in candidates], dtype=np.float32)
+        else:
+            query = query / max(float(np.linalg.norm(query)), 1e-12)
+            relevance = vectors @ query
+        similarity = vectors @ vectors.T
+
+        order = []
+        remaining = list(range(len(candidates)))
+        redundancy = np.full(len(candidates), -np.inf)
+        while remaining:
+            scores = [
+                self.mmr_lambda * relevance[i] - (1 - self.mmr_lambda) * max(redundancy[i], 0.0)
+                for i in remaining
+            ]
+            best = remaining.pop(int(np.argmax(scores)))
+            if redundancy[best] >= self.duplicate_threshold:
+                continue
+            order.append(best)
+            redundancy = np.maximum(redundancy, similarity[best])
+        return [candidates[i] for i in order]
+
+    def _merge(self, selected: List[_Candidate]) -> List[str]:
+        """One part per run of consecutive chunks on a page, in selection order"""
+        groups: Dict[Tuple[str, int], List[_Candidate]] = {}
+        for candidate in selected:
+            groups.setdefault((candidate.doc_name, candidate.page_number), []).append(candidate)
+
+        parts = []
+        for (doc_name, page_number), group in groups.items():
+            group.sort(key=lambda c: (c.chunk_index is None, c.chunk_index or 0))
+            runs = [[group[0]]]
+            for candidate in group[1:]:
+                previous = runs[-1][-1]
+                if (candidate.chunk_index is not None and previous.chunk_index is not None
+                        and candidate.chunk_index == previous.chunk_index + 1):
+                    runs[-1].append(candidate)
+                else:
+                    runs.append([candidate])
+
+            for run in sorted(runs, key=lambda r: min(c.rank for c in r)):
+                text = run[0].text
+                for candidate in run[1:]:
+                    overlap = _overlap(text, candidate.text)
+                    # Chunks starting at a paragraph share no text with the previous one
+                    text += candidate.text[overlap:] if overlap else "\n\n" + candidate.text
+                parts.append(self._format(doc_name, page_number, text,
+                                          max(c.page_end for c in run)))
+        return parts
+
+    @staticmethod
+    def _format(doc_name: str, page_number: int, text: str, page_end: Optional[int] = None) -> str:
+        if page_end and page_end != page_number:
+            return f"[Document: {doc_name}, Pages: {page_number}-{page_end}]\n{text}"
+        return f"[Document: {doc_name}, Page: {page_number}]\n{text}"
+
+    def _record(
+            self,
+            points: Sequence[Any],
+            candidates: List[_Candidate],
+            context_parts: List[str],
+            chunks_out: int
+    ) -> None:
+        """Count tokens against the unbudgeted context of every hit"""
+        unbudgeted = " ".join(
+            self._format(c.doc_name, c.page_number, c.text, c.page_end) for c in candidates
+        )
+        tokens_in = self.count_tokens(unbudgeted)
+        tokens_out = self.count_tokens("\n\n".join(context_parts))
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["tokens_in"] += tokens_in
+            self._stats["tokens_out"] += tokens_out
+            self._stats["chunks_in"] += len(points)
+            self._stats["chunks_out"] += chunks_out
+        logger.info(
+            f"Built context of {tokens_out} tokens from {len(points)} hits "
+            f"({tokens_in - tokens_out} tokens saved)"
+        )
+
+
+def _overlap(left: str, right: str) -> int:
+    """Length of the longest suffix of ``left`` that prefixes ``right``"""
+    for size in range(min(len(left), len(right), _MAX_OVERLAP), 0, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+# Initialize global context builder
+context_builder = ContextBuilder()
@@ -1,10 +1,19 @@
-import pdfplumber
-from typing import List, Any
+from typing import List, Any, Dict, Tuple, Optional, Callable, Iterable, Iterator, Set
 from werkzeug.utils import secure_filename
 from src.ai_service import ai_service
-from src.vector_store import vector_store
+from src.vector_store import SPARSE_VECTOR_NAME, VECTOR_NAME, vector_store
+from src.hybrid import sparse_encoder
+from src.pdf_extraction import page_extractor
+from src.chunking import CharacterChunker, Chunk, create_chunker
+from src.manifest import chunk_hash, document_manifest, point_id
+from src.config import config
+from src.lifecycle import lazy_service
+from src.utils.metrics import metrics
+from src.ingestion import (
+    IngestionError, IngestionProgress, ProgressReporter, batched, threaded_stage
+)
 from qdrant_client.models import PointStruct
-import uuid
+import time
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,83 +22,271 @@ logger = logging.getLogger(__name__)
 class DocumentProcessor:
     """Secure document processing with team isolation"""
 
+    def __init__(self):
+        """Initialize the chunker with the embedding model's tokenizer"""
+        try:
+            model = ai_service.embedding_model
+            self.chunker = create_chunker(model.tokenizer, model.max_seq_length)
+        except Exception as e:
+            logger.error(f"Error initializing chunker: {str(e)}")
+            raise
+
     def process_pdf(
             self,
             pdf_file: Any,
             team_id: str,
             doc_name: str,
             document_id: str,
-            chunk_size: int = 500
-    ) -> List[PointStruct]:
-        """Process PDF with team-scoped authorization"""
-        try:
-            points = []
-            doc_name = secure_filename(doc_name)
+            chunk_size: int = 500,
+            on_progress: Optional[Callable[[IngestionProgress], None]] = None
+    ) -> IngestionProgress:
+        """Process PDF with team-scoped authorization
 
-            with pdfplumber.open(pdf_file) as pdf:
-                for page_num, page in enumerate(pdf.pages, start=1):
-                    text = page.extract_text()
-                    if not text:
-                        continue
+        Pages are streamed through extraction, chunking, batched embedding
+        and batched upserts, with bounded queues between the stages so
+        memory stays flat regardless of document size. On failure an
+        IngestionError is raised carrying how far each stage got.
 
-                    # Create chunks
-                    chunks = self._create_chunks(text, chunk_size)
+        Point ids are derived from (team, document, page, chunk hash), so
+        re-uploading a document only embeds chunks that are not already
+        stored and deletes the points of chunks that are gone.
 
-                    # Generate embeddings
-                    embeddings = [ai_service.get_embedding(chunk) for chunk in chunks]
+        ``chunk_size`` (characters) only applies to the fixed chunk strategy.
+        """
+        progress = IngestionProgress(team_id, document_id)
+        reporter = ProgressReporter(progress, on_progress)
+        doc_name = secure_filename(doc_name)
+        embedded = None
+
+        # A rename changes every payload, so nothing can be skipped
+        stored = document_manifest.get_chunks(team_id, document_id)
+        unchanged = stored if document_manifest.get_doc_name(team_id, document_id) == doc_name else {}
+        seen = set()
+        started = time.perf_counter()
+
+        try:
+            pages = threaded_stage(
+                self._guard_stage("extract", self._iter_pages(pdf_file, progress), progress),
+                config.INGEST_QUEUE_SIZE,
+                "extract"
+            )
+            chunks = self._iter_changed(
+                self._iter_chunks(pages, chunk_size, progress),
+                team_id, document_id, unchanged, seen, progress
+            )
+            embedded = threaded_stage(
+                self._guard_stage(
+                    "embed",
+                    self._iter_embedded(chunks, team_id, doc_name, document_id,
+                                        progress, reporter),
+                    progress
+                ),
+                config.INGEST_QUEUE_SIZE,
+                "embed"
+            )
+            points = (point for batch in embedded for point in batch)
 
-                    # Create points
-                    points.extend(self._create_points(
-                        chunks, embeddings, team_id, doc_name,
-                        document_id, page_num
-                    ))
+            for batch in batched(points, config.INGEST_UPSERT_BATCH_SIZE):
+                try:
+                    with metrics.span("ingest_upsert", team_id):
+                        vector_store.upsert_points(batch)
+                except Exception:
+                    progress.failed_stage = progress.failed_stage or "upsert"
+                    raise
+                # Recorded per batch so a failed run's points are still tracked
+                document_manifest.add_chunks(team_id, document_id, doc_name, [
+                    (str(point.id), point.payload["page_number"],
+                     point.payload["chunk_index"], point.payload["chunk_hash"])
+                    for point in batch
+                ])
+                progress.points_upserted += len(batch)
+                progress.upsert_batches += 1
+                reporter.report("upsert")
 
-            # Store vectors
-            if points:
-                vector_store.upsert_points(points)
+            self._delete_stale(team_id, document_id, stored, seen, progress)
+            try:
+                with metrics.span("ingest_register", team_id):
+                    vector_store.register_document(team_id, document_id, doc_name,
+                                                   progress.pages_done, len(seen))
+            except Exception:
+                progress.failed_stage = progress.failed_stage or "register"
+                raise
 
-            return points
+            progress.stage = "completed"
+            progress.finished_at = time.time()
+            reporter.report(force=True)
+            return progress
 
         except Exception as e:
-            logger.error(f"Error processing PDF: {str(e)}")
+            progress.stage = "failed"
+            progress.error = str(e)
+            progress.finished_at = time.time()
+            reporter.report(force=True)
+            logger.error(
+                f"Error processing PDF in stage '{progress.failed_stage}' after "
+                f"{progress.pages_done} pages and {progress.points_upserted} "
+                f"upserted points: {str(e)}"
+            )
+            raise IngestionError(str(e), progress) from e
+
+        finally:
+            # Stops the background stages if the upsert stage bailed out early
+            if embedded is not None:
+                embedded.close()
+            metrics.observe("ingest_document", (time.perf_counter() - started) * 1000, team_id)
+
+    def _guard_stage(
+            self,
+            name: str,
+            items: Iterator[Any],
+            progress: IngestionProgress
+    ) -> Iterator[Any]:
+        """Record the first stage that fails"""
+        try:
+            yield from items
+        except Exception:
+            progress.failed_stage = progress.failed_stage or name
             raise
 
-    def _create_chunks(self, text: str, chunk_size: int) -> List[str]:
-        """Create overlapping chunks from text"""
-        chunks = []
-        for i in range(0, len(text), chunk_size):
-            chunk = text[max(0, i - 50):i + chunk_size]
-            chunks.append(chunk)
-        return chunks
+    def _iter_pages(
+            self,
+            pdf_file: Any,
+            progress: IngestionProgress
+    ) -> Iterator[Tuple[int, str]]:
+        """Yield (page_number, text) for each page with text"""
+        # Timed per page, excluding time blocked on the downstream queue
+        start = time.perf_counter()
+        for page_num, text in page_extractor.iter_pages(pdf_file):
+            metrics.observe("ingest_extract", (time.perf_counter() - start) * 1000,
+                            progress.team_id)
+            progress.pages_done += 1
+            if text:
+                yield page_num, text
+            start = time.perf_counter()
 
-    def _create_points(
+    def _iter_chunks(
             self,
-            chunks: List[str],
-            embeddings: List[List[float]],
+            pages: Iterable[Tuple[int, str]],
+            chunk_size: int,
+            progress: IngestionProgress
+    ) -> Iterator[Chunk]:
+        """Yield the chunks of the document's pages"""
+        chunker = self.chunker
+        if isinstance(chunker, CharacterChunker) and chunker.chunk_size != chunk_size:
+            chunker = CharacterChunker(chunk_size)
+        for chunk in chunker.iter_chunks(pages):
+            progress.chunks_created += 1
+            yield chunk
+
+    def _iter_changed(
+            self,
+            chunks: Iterable[Chunk],
+            team_id: str,
+            document_id: str,
+            unchanged: Dict[str, int],
+            seen: Set[str],
+            progress: IngestionProgress
+    ) -> Iterator[Tuple[Chunk, str, str]]:
+        """Assign point ids and drop chunks that are already stored as-is
+
+        Yields (chunk, point_id, chunk_hash). Every id is added to ``seen``;
+        repeats of a chunk on the same starting page collapse into one point.
+        """
+        for chunk in chunks:
+            digest = chunk_hash(chunk.text)
+            chunk_id = point_id(team_id, document_id, chunk.page_start, digest)
+            if chunk_id in seen:
+                continue
+            seen.add(chunk_id)
+            if unchanged.get(chunk_id) == chunk.index:
+                progress.chunks_skipped += 1
+                continue
+            yield chunk, chunk_id, digest
+
+    def _delete_stale(
+            self,
+            team_id: str,
+            document_id: str,
+            stored: Dict[str, int],
+            seen: Set[str],
+            progress: IngestionProgress
+    ) -> None:
+        """Delete points of chunks that are no longer in the document"""
+        stale = [chunk_id for chunk_id in stored if chunk_id not in seen]
+        try:
+            for batch in batched(stale, config.INGEST_UPSERT_BATCH_SIZE):
+                with metrics.span("ingest_delete", team_id):
+                    vector_store.delete_points(team_id, batch)
+                document_manifest.remove_chunks(team_id, document_id, batch)
+                progress.points_deleted += len(batch)
+        except Exception:
+            progress.failed_stage = progress.failed_stage or "delete"
+            raise
+
+    def _iter_embedded(
+            self,
+            chunks: Iterable[Tuple[Chunk, str, str]],
             team_id: str,
             doc_name: str,
             document_id: str,
-            page_num: int
+            progress: IngestionProgress,
+            reporter: ProgressReporter
+    ) -> Iterator[List[PointStruct]]:
+        """Embed chunks in batches and yield the resulting points"""
+        for batch in batched(chunks, config.EMBEDDING_BATCH_SIZE):
+            points = self._embed_batch(batch, team_id, doc_name, document_id)
+            progress.chunks_embedded += len(points)
+            reporter.report("embed")
+            yield points
+
+    def _embed_batch(
+            self,
+            batch: List[Tuple[Chunk, str, str]],
+            team_id: str,
+            doc_name: str,
+            document_id: str
     ) -> List[PointStruct]:
-        """Create points for vector storage"""
-        points = []
-        for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-            point = PointStruct(
-                id=str(uuid.uuid4()),
-                vector={"custom_vector": embedding},
-                payload={
-                    "team_id": team_id,
-                    "doc_name": doc_name,
-                    "document_id": document_id,
-                    "page_number": page_num,
-                    "chunk_index": i,
-                    "text": chunk,
-                    "embedding_model": "all-MiniLM-L6-v2"
-                }
-            )
-            points.append(point)
-        return points
+        """Embed a batch of chunks in one forward pass and build points"""
+        with metrics.span("ingest_embed", team_id):
+            embeddings = ai_service.get_embeddings([chunk.text for chunk, _, _ in batch])
+
+        # One conversion for the whole batch instead of one per chunk
+        vectors = embeddings.tolist()
+        return [
+            self._create_point(chunk, vector, team_id, doc_name, document_id, chunk_id, digest)
+            for (chunk, chunk_id, digest), vector in zip(batch, vectors)
+        ]
+
+    def _create_point(
+            self,
+            chunk: Chunk,
+            embedding: List[float],
+            team_id: str,
+            doc_name: str,
+            document_id: str,
+            chunk_id: str,
+            digest: str
+    ) -> PointStruct:
+        """Create a point for vector storage"""
+        vector = {VECTOR_NAME: embedding}
+        if vector_store.supports_sparse():
+            vector[SPARSE_VECTOR_NAME] = sparse_encoder.encode_document(chunk.text)
+        return PointStruct(
+            id=chunk_id,
+            vector=vector,
+            payload={
+                "team_id": team_id,
+                "doc_name": doc_name,
+                "document_id": document_id,
+                "page_number": chunk.page_start,
+                "page_end": chunk.page_end,
+                "chunk_index": chunk.index,
+                "text": chunk.text,
+                "chunk_hash": digest,
+                "embedding_model": config.EMBEDDING_MODEL_NAME
+            }
+        )
 
 
 # Initialize global document processor
-document_processor = DocumentProcessor()
\ No newline at end of file
+document_processor = lazy_service("document_processor", DocumentProcessor)
\ No newline at end of file
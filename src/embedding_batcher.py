@@ -0,0 +1,130 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BatchingEmbedder:
+    """Coalesces concurrent single-text embedding requests into batches
+
+    Callers submit one text and get a Future. A worker thread waits up to
+    ``max_wait_ms`` after the first queued text (or until ``max_batch_size``
+    texts are queued), encodes them in one forward pass and resolves each
+    caller's future with its row.
+    """
+
+    def __init__(
+            self,
+            encode_fn: Callable[[List[str]], np.ndarray],
+            max_batch_size: int = 32,
+            max_wait_ms: float = 5.0
+    ):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._stats = {"batches": 0, "items": 0, "max_batch": 0, "errors": 0}
+
+    def submit(self, text: str) -> "Future[np.ndarray]":
+        """Queue a text for the next batch"""
+        future: "Future[np.ndarray]" = Future()
+        # Under the lock shutdown drains with, so nothing is queued after the drain
+        with self._lock:
+            if self._stopped.is_set():
+                raise RuntimeError("Embedding batcher is shut down")
+            self._ensure_worker()
+            self._queue.put((text, future))
+        return future
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embed a single text through the batcher, blocking until done"""
+        return self.submit(text).result()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and batch size counters"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self._queue.qsize()
+        stats["avg_batch"] = round(stats["items"] / stats["batches"], 2) if stats["batches"] else 0.0
+        return stats
+
+    def shutdown(self) -> None:
+        """Stop the worker; queued requests still in flight are failed"""
+        with self._lock:
+            self._stopped.set()
+            worker = self._worker
+        # The worker takes the lock to count batches, so join outside it
+        if worker is not None:
+            worker.join(timeout=5)
+        with self._lock:
+            while True:
+                try:
+                    _, future = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(RuntimeError("Embedding batcher is shut down"))
+
+    def _ensure_worker(self) -> None:
+        """Start the worker on first use; caller holds the lock"""
+        if self._worker is None:
+            self._worker = threading.Thread(
+                target=self._run, name="embedding-batcher", daemon=True
+            )
+            self._worker.start()
+
+    def _collect(self) -> List[Tuple[str, Future]]:
+        """Block for the first request, then gather more until full or timed out"""
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+
+            batch = [(text, future) for text, future in batch
+                     if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                vectors = self.encode_fn([text for text, _ in batch])
+            except Exception as e:
+                logger.error(f"Error encoding embedding batch: {str(e)}")
+                with self._lock:
+                    self._stats["errors"] += 1
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            with self._lock:
+                self._stats["batches"] += 1
+                self._stats["items"] += len(batch)
+                self._stats["max_batch"] = max(self._stats["max_batch"], len(batch))
+
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
@@ -0,0 +1,188 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from src.config import config
+from src.lifecycle import lazy_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Keep IN (...) lists well under SQLite's host parameter limit
+_SQL_BATCH = 500
+
+
+class EmbeddingCache:
+    """Persistent embedding cache with an in-process LRU front
+
+    Entries are keyed by (model name, hash of whitespace-normalized text)
+    and stored as float32 blobs in SQLite. The LRU front is bounded by the
+    total size of the cached vectors.
+    """
+
+    def __init__(
+            self,
+            db_path: str = config.EMBEDDING_CACHE_PATH,
+            memory_bytes: int = config.EMBEDDING_CACHE_MEMORY_MB * 1024 * 1024,
+            enabled: bool = config.EMBEDDING_CACHE_ENABLED
+    ):
+        self.db_path = db_path
+        self.memory_bytes = memory_bytes
+        self.enabled = enabled
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._memory_used = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        if self.enabled:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            conn = self._connect()
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    dim INTEGER NOT NULL,
+                    vector BLOB NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(model_name: str, text: str) -> str:
+        """Cache key for a model and text"""
+        normalized = " ".join(text.split())
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        return f"{model_name}:{digest}"
+
+    def get_many(self, model_name: str, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Look up embeddings, returning None for each miss"""
+        if not self.enabled:
+            return [None] * len(texts)
+
+        keys = [self.make_key(model_name, text) for text in texts]
+        results: List[Optional[np.ndarray]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    results[i] = vector
+                else:
+                    missing.setdefault(key, []).append(i)
+
+        if missing:
+            found = self._load(list(missing))
+            with self._lock:
+                for key, positions in missing.items():
+                    vector = found.get(key)
+                    if vector is None:
+                        self._stats["misses"] += len(positions)
+                        continue
+                    self._stats["disk_hits"] += len(positions)
+                    self._remember(key, vector)
+                    for i in positions:
+                        results[i] = vector
+
+        return results
+
+    def put_many(self, model_name: str, texts: Sequence[str], vectors: np.ndarray) -> None:
+        """Store embeddings for texts, row i of ``vectors`` for ``texts[i]``"""
+        if not self.enabled or not len(texts):
+            return
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        now = time.time()
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = self.make_key(model_name, text)
+                vector = vector.copy()
+                vector.flags.writeable = False
+                self._remember(key, vector)
+                rows.append((key, model_name, vector.shape[0], vector.tobytes(), now))
+
+        try:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, dim, vector, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            # The cache is an optimization; never fail the caller over it
+            logger.error(f"Error writing embedding cache: {str(e)}")
+
+    def get(self, model_name: str, text: str) -> Optional[np.ndarray]:
+        """Look up a single embedding"""
+        return self.get_many(model_name, [text])[0]
+
+    def put(self, model_name: str, text: str, vector: np.ndarray) -> None:
+        """Store a single embedding"""
+        self.put_many(model_name, [text], np.asarray(vector, dtype=np.float32)[None, :])
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and memory usage"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_used
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _load(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        try:
+            conn = self._connect()
+            for start in range(0, len(keys), _SQL_BATCH):
+                batch = keys[start:start + _SQL_BATCH]
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings "
+                    f"WHERE key IN ({', '.join('?' for _ in batch)})",
+                    batch
+                ).fetchall()
+                for key, blob in rows:
+                    # frombuffer over bytes is already read-only
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        except sqlite3.Error as e:
+            logger.error(f"Error reading embedding cache: {str(e)}")
+        return found
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        """Insert into the LRU front, evicting by size; caller holds the lock"""
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_used -= previous.nbytes
+        self._memory[key] = vector
+        self._memory_used += vector.nbytes
+
+        while self._memory_used > self.memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= evicted.nbytes
+            self._stats["evictions"] += 1
+
+
+# Initialize global embedding cache
+embedding_cache = lazy_service("embedding_cache", EmbeddingCache)
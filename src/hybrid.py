@@ -0,0 +1,80 @@
+import re
+import zlib
+from collections import Counter
+from typing import Any, Dict, Hashable, List, Sequence
+from qdrant_client.models import SparseVector
+from src.config import config
+
+# Keeps identifiers such as "4.2.1", "sku-10023" and "a/b" as single terms
+_TOKEN_RE = re.compile(r"\w+(?:[.\-/]\w+)*")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or "
+    "that the this to was were which will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word and identifier terms without stopwords"""
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in _STOPWORDS]
+
+
+class SparseEncoder:
+    """BM25 term weights as sparse vectors
+
+    Terms are hashed to stable 31-bit ids, so no vocabulary has to be
+    stored or shared between processes. Documents carry the BM25
+    term-frequency component; the IDF component depends on the corpus and
+    is applied at query time by the store (Qdrant's IDF modifier, or the
+    local backend's posting counts), so query terms have unit weight.
+    """
+
+    def __init__(self, k1: float = config.BM25_K1, b: float = config.BM25_B,
+                 avg_doc_length: float = config.BM25_AVG_DOC_LENGTH):
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_length = avg_doc_length
+
+    @staticmethod
+    def term_id(term: str) -> int:
+        return zlib.crc32(term.encode("utf-8")) & 0x7FFFFFFF
+
+    def encode_document(self, text: str) -> SparseVector:
+        """BM25 term-frequency weights for a chunk"""
+        tokens = tokenize(text)
+        norm = self.k1 * (1 - self.b + self.b * len(tokens) / self.avg_doc_length)
+        weights: Dict[int, float] = {}
+        for term, tf in Counter(tokens).items():
+            term_id = self.term_id(term)
+            weights[term_id] = weights.get(term_id, 0.0) + tf * (self.k1 + 1) / (tf + norm)
+        return SparseVector(indices=list(weights), values=list(weights.values()))
+
+    def encode_query(self, text: str) -> SparseVector:
+        """Unit weights for the distinct query terms"""
+        term_ids = sorted({self.term_id(term) for term in tokenize(text)})
+        return SparseVector(indices=term_ids, values=[1.0] * len(term_ids))
+
+
+def reciprocal_rank_fusion(
+        result_lists: Sequence[Sequence[Any]],
+        limit: int,
+        k: int = 60
+) -> List[Any]:
+    """Fuse ranked result lists by summing 1 / (k + rank)
+
+    Results are matched on their ``id``; the fused score replaces
+    ``score`` on the first copy of each result seen.
+    """
+    scores: Dict[Hashable, float] = {}
+    first: Dict[Hashable, Any] = {}
+    for results in result_lists:
+        for rank, result in enumerate(results, start=1):
+            scores[result.id] = scores.get(result.id, 0.0) + 1.0 / (k + rank)
+            first.setdefault(result.id, result)
+
+    fused = sorted(scores, key=scores.get, reverse=True)[:limit]
+    return [first[point_id].model_copy(update={"score": scores[point_id]}) for point_id in fused]
+
+
+# Initialize global sparse encoder
+sparse_encoder = SparseEncoder()
@@ -0,0 +1,165 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_END = object()
+
+
+class IngestionProgress:
+    """Per-stage counters for a single document ingestion"""
+
+    def __init__(self, team_id: str, document_id: str):
+        self.team_id = team_id
+        self.document_id = document_id
+        self.stage = "pending"
+        self.failed_stage: Optional[str] = None
+        self.pages_done = 0
+        self.chunks_created = 0
+        self.chunks_embedded = 0
+        self.chunks_skipped = 0
+        self.points_upserted = 0
+        self.points_deleted = 0
+        self.upsert_batches = 0
+        self.error: Optional[str] = None
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize progress for logs and API responses"""
+        finished = self.finished_at or time.time()
+        return {
+            "team_id": self.team_id,
+            "document_id": self.document_id,
+            "stage": self.stage,
+            "failed_stage": self.failed_stage,
+            "pages_done": self.pages_done,
+            "chunks_created": self.chunks_created,
+            "chunks_embedded": self.chunks_embedded,
+            "chunks_skipped": self.chunks_skipped,
+            "points_upserted": self.points_upserted,
+            "points_deleted": self.points_deleted,
+            "upsert_batches": self.upsert_batches,
+            "error": self.error,
+            "elapsed_seconds": round(finished - self.started_at, 3)
+        }
+
+
+class IngestionError(Exception):
+    """Raised when an ingestion pipeline fails part-way through
+
+    ``progress`` records how far each stage got before the failure, so
+    callers can report that everything up to ``points_upserted`` is stored.
+    """
+
+    def __init__(self, message: str, progress: IngestionProgress):
+        super().__init__(message)
+        self.progress = progress
+
+
+class _StageFailure:
+    """Carries an exception from a background stage to its consumer"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Group an iterable into lists of at most ``size`` items"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def threaded_stage(items: Iterable[T], maxsize: int, name: str) -> Iterator[T]:
+    """Run a producer in a background thread behind a bounded queue
+
+    The producer blocks once ``maxsize`` items are waiting, which caps
+    memory between stages. Producer exceptions are re-raised in the
+    consumer. Closing the returned generator stops the producer.
+    """
+    buffer: "queue.Queue[Any]" = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_StageFailure(e))
+        finally:
+            close = getattr(items, "close", None)
+            if close:
+                close()
+            put(_END)
+
+    worker = threading.Thread(target=produce, name=f"ingest-{name}", daemon=True)
+    worker.start()
+
+    try:
+        while True:
+            item = buffer.get()
+            if item is _END:
+                break
+            if isinstance(item, _StageFailure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        worker.join(timeout=5)
+
+
+class ProgressReporter:
+    """Throttled progress callback plus per-stage logging"""
+
+    def __init__(
+            self,
+            progress: IngestionProgress,
+            callback: Optional[Callable[[IngestionProgress], None]] = None,
+            interval: float = 1.0
+    ):
+        self.progress = progress
+        self.callback = callback
+        self.interval = interval
+        self._last_report = 0.0
+        self._lock = threading.Lock()
+
+    def report(self, stage: Optional[str] = None, force: bool = False) -> None:
+        """Notify the callback at most once per ``interval`` unless forced"""
+        with self._lock:
+            if stage:
+                self.progress.stage = stage
+            now = time.time()
+            if not force and now - self._last_report < self.interval:
+                return
+            self._last_report = now
+
+        logger.info(
+            f"Ingestion progress for document '{self.progress.document_id}'",
+            extra=self.progress.to_dict()
+        )
+        if self.callback:
+            try:
+                self.callback(self.progress)
+            except Exception as e:
+                logger.error(f"Error in ingestion progress callback: {str(e)}")
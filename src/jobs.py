@@ -0,0 +1,373 @@
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from werkzeug.utils import secure_filename
+from src.config import config
+from src.lifecycle import lazy_service
+from src.document_processor import document_processor
+from src.answer_cache import answer_cache
+from src.ingestion import IngestionError, IngestionProgress
+import logging
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+_COLUMNS = (
+    "job_id", "team_id", "document_id", "doc_name", "file_path", "status",
+    "stage", "pages_done", "chunks_embedded", "points_upserted", "error",
+    "attempts", "created_at", "updated_at", "finished_at", "owner", "heartbeat_at"
+)
+
+# Columns added after the table was first created
+_ADDED_COLUMNS = (("owner", "TEXT"), ("heartbeat_at", "REAL"))
+
+
+def _process_id() -> str:
+    """Identifies this process as the owner of the jobs it runs"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _owner_alive(owner: Optional[str], heartbeat_at: Optional[float], lease_seconds: float) -> bool:
+    """Whether the process that claimed a job may still be running it
+
+    The owner must have renewed its lease recently; on this host its pid
+    must also still exist, so a crashed worker's jobs resume at once.
+    """
+    if not owner or heartbeat_at is None or time.time() - heartbeat_at > lease_seconds:
+        return False
+    host, _, pid = owner.rpartition(":")
+    if host != socket.gethostname():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, ValueError):
+        pass
+    return True
+
+
+class JobStore:
+    """SQLite-backed persistence for upload jobs"""
+
+    def __init__(self, db_path: str = config.JOB_DB_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    team_id TEXT NOT NULL,
+                    document_id TEXT NOT NULL,
+                    doc_name TEXT NOT NULL,
+                    file_path TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    stage TEXT,
+                    pages_done INTEGER NOT NULL DEFAULT 0,
+                    chunks_embedded INTEGER NOT NULL DEFAULT 0,
+                    points_upserted INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    finished_at REAL,
+                    owner TEXT,
+                    heartbeat_at REAL
+                )
+                """
+            )
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, column_type in _ADDED_COLUMNS:
+                if column not in existing:
+                    try:
+                        conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+                    except sqlite3.OperationalError as e:
+                        # Another worker added it first
+                        if "duplicate column" not in str(e):
+                            raise
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def create(self, team_id: str, document_id: str, doc_name: str, file_path: str,
+               job_id: Optional[str] = None) -> Dict[str, Any]:
+        """Record a new queued job"""
+        now = time.time()
+        job = {
+            "job_id": job_id or str(uuid.uuid4()),
+            "team_id": team_id,
+            "document_id": document_id,
+            "doc_name": doc_name,
+            "file_path": file_path,
+            "status": QUEUED,
+            "stage": None,
+            "pages_done": 0,
+            "chunks_embedded": 0,
+            "points_upserted": 0,
+            "error": None,
+            "attempts": 0,
+            "created_at": now,
+            "updated_at": now,
+            "finished_at": None,
+            "owner": None,
+            "heartbeat_at": None
+        }
+        with self._connect() as conn:
+            conn.execute(
+                f"INSERT INTO jobs ({', '.join(_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in _COLUMNS)})",
+                [job[column] for column in _COLUMNS]
+            )
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch a job by id"""
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return dict(zip(_COLUMNS, row)) if row else None
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        """Update job fields and bump updated_at"""
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE job_id = ?",
+                [*fields.values(), job_id]
+            )
+
+    def claim(self, job_id: str, owner: str) -> bool:
+        """Move a queued job to running for ``owner``; False if another process got it"""
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, owner = ?, heartbeat_at = ?, "
+                "attempts = attempts + 1, error = NULL, updated_at = ? "
+                "WHERE job_id = ? AND status = ?",
+                (RUNNING, owner, now, now, job_id, QUEUED)
+            )
+        return cursor.rowcount == 1
+
+    def release(self, job_id: str, owner: str) -> bool:
+        """Re-queue a running job still held by ``owner`` (a dead process)"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, updated_at = ? "
+                "WHERE job_id = ? AND status = ? AND owner IS ?",
+                (QUEUED, time.time(), job_id, RUNNING, owner)
+            )
+        return cursor.rowcount == 1
+
+    def renew(self, owner: str) -> None:
+        """Extend the lease on every job ``owner`` is running"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status = ?",
+                (time.time(), owner, RUNNING)
+            )
+
+    def list_unfinished(self) -> List[Dict[str, Any]]:
+        """Jobs that are queued or running, here or in another process"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs "
+                f"WHERE status IN (?, ?) ORDER BY created_at",
+                (QUEUED, RUNNING)
+            ).fetchall()
+        return [dict(zip(_COLUMNS, row)) for row in rows]
+
+
+class JobManager:
+    """Background ingestion of spooled uploads on a local worker pool
+
+    Every gunicorn worker runs one, sharing the job table. A job runs in
+    whichever process claims it first; the claim is a lease renewed every
+    ``lease_seconds / 4`` while the process lives. At the same interval,
+    running jobs whose owner is gone are re-queued and run here.
+    """
+
+    def __init__(
+            self,
+            store: Optional[JobStore] = None,
+            spool_dir: str = config.UPLOAD_SPOOL_DIR,
+            workers: int = config.JOB_WORKERS,
+            lease_seconds: float = config.JOB_LEASE_SECONDS
+    ):
+        self.store = store or JobStore()
+        self.spool_dir = spool_dir
+        self.lease_seconds = lease_seconds
+        self.owner = _process_id()
+        os.makedirs(spool_dir, exist_ok=True)
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="upload-job"
+        )
+        self._lock = threading.Lock()
+        self._active = set()
+        self._stopped = threading.Event()
+        threading.Thread(target=self._maintain_leases, name="upload-job-lease", daemon=True).start()
+
+    def submit_upload(self, file: Any, team_id: str, document_id: str) -> Dict[str, Any]:
+        """Spool an uploaded file to disk and queue it for ingestion
+
+        ``file`` is a werkzeug FileStorage or any object with ``filename``
+        and a readable ``file`` stream (such as a Starlette UploadFile).
+        """
+        job_id = str(uuid.uuid4())
+        doc_name = secure_filename(file.filename)
+        file_path = os.path.join(self.spool_dir, f"{job_id}.pdf")
+        if hasattr(file, "save"):
+            file.save(file_path)
+        else:
+            with open(file_path, "wb") as spooled:
+                shutil.copyfileobj(file.file, spooled)
+
+        job = self.store.create(team_id, document_id, doc_name, file_path, job_id=job_id)
+        self._schedule(job_id)
+        logger.info(f"Queued upload job '{job_id}'", extra={"team_id": team_id})
+        return job
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Public job status, without server-side paths"""
+        job = self.store.get(job_id)
+        if job:
+            job.pop("file_path", None)
+            job.pop("owner", None)
+        return job
+
+    def resume_pending(self) -> int:
+        """Queue unclaimed jobs and re-queue those whose process has died
+
+        Jobs running in a live process are left alone; of the processes
+        that queue the same job, only the first to claim it runs it.
+        """
+        resumed = 0
+        for job in self.store.list_unfinished():
+            if job["status"] == RUNNING and not self._release_if_abandoned(job):
+                continue
+            self._schedule(job["job_id"])
+            resumed += 1
+
+        if resumed:
+            logger.info(f"Resumed {resumed} unfinished upload jobs")
+        return resumed
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting jobs; unfinished ones resume on next start"""
+        self._stopped.set()
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _maintain_leases(self) -> None:
+        while not self._stopped.wait(self.lease_seconds / 4):
+            try:
+                if self._active:
+                    self.store.renew(self.owner)
+                for job in self.store.list_unfinished():
+                    if job["status"] == RUNNING and self._release_if_abandoned(job):
+                        logger.info(f"Re-queued abandoned upload job '{job['job_id']}'")
+                        self._schedule(job["job_id"])
+            except Exception as e:
+                logger.error(f"Error maintaining upload job leases: {str(e)}")
+
+    def _release_if_abandoned(self, job: Dict[str, Any]) -> bool:
+        """Re-queue a running job whose owner has died; False if it is still owned"""
+        if job["job_id"] in self._active:
+            return False
+        # Our own id on a job we are not running was left by an earlier process with our pid
+        if job["owner"] != self.owner and _owner_alive(
+                job["owner"], job["heartbeat_at"], self.lease_seconds):
+            return False
+        return self.store.release(job["job_id"], job["owner"])
+
+    def _schedule(self, job_id: str) -> None:
+        with self._lock:
+            if job_id in self._active:
+                return
+            self._active.add(job_id)
+        self.executor.submit(self._run, job_id)
+
+    def _run(self, job_id: str) -> None:
+        """Claim a single job, process it and persist its progress"""
+        job = None
+        try:
+            if not self.store.claim(job_id, self.owner):
+                # Finished, or claimed by another process
+                return
+            job = self.store.get(job_id)
+
+            if not os.path.exists(job["file_path"]):
+                self.store.update(job_id, status=FAILED, error="Spooled upload is missing",
+                                  finished_at=time.time())
+                return
+
+            try:
+                progress = document_processor.process_pdf(
+                    pdf_file=job["file_path"],
+                    team_id=job["team_id"],
+                    doc_name=job["doc_name"],
+                    document_id=job["document_id"],
+                    on_progress=lambda p: self._record_progress(job_id, p)
+                )
+                self._record_progress(job_id, progress, status=COMPLETED)
+
+            except IngestionError as e:
+                self._record_progress(job_id, e.progress, status=FAILED, error=str(e))
+
+            # New or partially ingested chunks change what answers are correct
+            answer_cache.invalidate_team(job["team_id"])
+
+        except Exception as e:
+            logger.error(f"Error running upload job '{job_id}': {str(e)}")
+            self.store.update(job_id, status=FAILED, error=str(e), finished_at=time.time())
+
+        finally:
+            # Only the process that claimed the job owns its spooled file
+            if job is not None:
+                try:
+                    os.unlink(job["file_path"])
+                except FileNotFoundError:
+                    pass
+            with self._lock:
+                self._active.discard(job_id)
+
+    def _record_progress(
+            self,
+            job_id: str,
+            progress: IngestionProgress,
+            status: Optional[str] = None,
+            error: Optional[str] = None
+    ) -> None:
+        fields = {
+            "stage": progress.stage,
+            "pages_done": progress.pages_done,
+            "chunks_embedded": progress.chunks_embedded,
+            "points_upserted": progress.points_upserted
+        }
+        if status:
+            fields["status"] = status
+            fields["finished_at"] = time.time()
+        if error:
+            fields["error"] = error
+        self.store.update(job_id, **fields)
+
+
+# Initialize global job manager
+job_manager = lazy_service(
+    "job_manager", JobManager,
+    close=lambda manager: manager.shutdown(wait=False)
+)
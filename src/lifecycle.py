@@ -0,0 +1,205 @@
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from src.config import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LazyService:
+    """A global service that is built on first use
+
+    Every attribute other than dunders and ``_lazy_*`` is forwarded to the
+    instance, so modules import and call the global as before while nothing
+    is constructed at import time. The proxy is managed through the module
+    functions (``resolve``, ``is_initialized``, ``close_service``, ...) so
+    that none of its own names hide the service's.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            factory: Callable[[], Any],
+            close: Optional[Callable[[Any], None]] = None,
+            aclose: Optional[Callable[[Any], Awaitable[None]]] = None
+    ):
+        # Set through __dict__ so __getattr__ never sees them missing
+        self.__dict__.update(
+            _lazy_name=name, _lazy_factory=factory, _lazy_close=close, _lazy_aclose=aclose,
+            _lazy_instance=None, _lazy_lock=threading.Lock(), _lazy_error=None,
+            _lazy_init_seconds=None
+        )
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(resolve(self), attribute)
+
+    def __setattr__(self, attribute: str, value: Any) -> None:
+        setattr(resolve(self), attribute, value)
+
+    def __repr__(self) -> str:
+        return f"<LazyService {self._lazy_name} ({_status(self)['status']})>"
+
+
+def resolve(service: LazyService) -> Any:
+    """The instance behind a lazy service, building it on first call"""
+    instance = service._lazy_instance
+    if instance is not None:
+        return instance
+
+    with service._lazy_lock:
+        if service._lazy_instance is None:
+            name = service._lazy_name
+            start = time.perf_counter()
+            try:
+                service.__dict__["_lazy_instance"] = service._lazy_factory()
+            except Exception as e:
+                service.__dict__["_lazy_error"] = str(e)
+                logger.error(f"Error initializing {name}: {str(e)}")
+                raise
+            service.__dict__["_lazy_error"] = None
+            service.__dict__["_lazy_init_seconds"] = round(time.perf_counter() - start, 3)
+            logger.info(f"Initialized {name} in {service._lazy_init_seconds}s")
+        return service._lazy_instance
+
+
+def is_initialized(service: LazyService) -> bool:
+    return service._lazy_instance is not None
+
+
+def close_service(service: LazyService) -> None:
+    """Release the instance; the next use builds a new one"""
+    with service._lazy_lock:
+        instance, service.__dict__["_lazy_instance"] = service._lazy_instance, None
+    if instance is not None and service._lazy_close is not None:
+        service._lazy_close(instance)
+
+
+async def aclose_service(service: LazyService) -> None:
+    """Release the instance, awaiting its async close if it has one"""
+    with service._lazy_lock:
+        instance, service.__dict__["_lazy_instance"] = service._lazy_instance, None
+    if instance is None:
+        return
+    if service._lazy_aclose is not None:
+        await service._lazy_aclose(instance)
+    elif service._lazy_close is not None:
+        service._lazy_close(instance)
+
+
+def _status(service: LazyService) -> Dict[str, Any]:
+    if service._lazy_instance is not None:
+        return {"status": "ready", "init_seconds": service._lazy_init_seconds}
+    if service._lazy_error is not None:
+        return {"status": "failed", "error": service._lazy_error}
+    return {"status": "not_initialized"}
+
+
+_services: List[LazyService] = []
+
+
+def lazy_service(
+        name: str,
+        factory: Callable[[], Any],
+        close: Optional[Callable[[Any], None]] = None,
+        aclose: Optional[Callable[[Any], Awaitable[None]]] = None
+) -> Any:
+    """Register a lazily built global service"""
+    service = LazyService(name, factory, close, aclose)
+    _services.append(service)
+    return service
+
+
+def init_services() -> None:
+    """Build every registered service that is not built yet"""
+    for service in list(_services):
+        resolve(service)
+
+
+def close_services() -> None:
+    """Release services in reverse order of registration"""
+    for service in reversed(_services):
+        try:
+            close_service(service)
+        except Exception as e:
+            logger.error(f"Error closing {service._lazy_name}: {str(e)}")
+
+
+async def aclose_services() -> None:
+    """Release services, awaiting async clients"""
+    for service in reversed(_services):
+        try:
+            await aclose_service(service)
+        except Exception as e:
+            logger.error(f"Error closing {service._lazy_name}: {str(e)}")
+
+
+def service_status() -> Dict[str, Dict[str, Any]]:
+    return {service._lazy_name: _status(service) for service in _services}
+
+
+def stats_if_initialized(service: LazyService) -> Optional[Dict[str, Any]]:
+    """A service's stats, without building it just to report them"""
+    return service.stats() if is_initialized(service) else None
+
+
+class Lifecycle:
+    """Process startup and readiness
+
+    ``start`` warms every service and resumes queued upload jobs, in a
+    background thread by default so the process answers liveness probes
+    while models load. Readiness is reported once warm-up has finished.
+    """
+
+    def __init__(self, warmup: bool = config.WARMUP_ON_STARTUP):
+        self.warmup = warmup
+        self.started = False
+        self.ready = False
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def start(self, background: bool = True) -> None:
+        """Start once per process; later calls are no-ops"""
+        with self._lock:
+            if self.started:
+                return
+            self.started = True
+
+        if background:
+            threading.Thread(target=self._start, name="startup", daemon=True).start()
+        else:
+            self._start()
+
+    def _start(self) -> None:
+        start = time.perf_counter()
+        try:
+            if self.warmup:
+                init_services()
+            # Imported here as the services themselves import this module
+            from src.jobs import job_manager
+
+            job_manager.resume_pending()
+            self.ready = True
+            logger.info(f"Startup finished in {time.perf_counter() - start:.3f}s")
+        except Exception as e:
+            self.error = str(e)
+            logger.error(f"Error during startup: {str(e)}")
+
+    def readiness(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "error": self.error,
+            "services": service_status()
+        }
+
+    def shutdown(self) -> None:
+        self.ready = False
+        close_services()
+
+    async def ashutdown(self) -> None:
+        self.ready = False
+        await aclose_services()
+
+
+# Initialize global lifecycle
+lifecycle = Lifecycle()
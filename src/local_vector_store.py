@@ -0,0 +1,620 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from qdrant_client.models import PointStruct, ScoredPoint, SparseVector
+from src.vector_store import BaseVectorStore, SPARSE_VECTOR_NAME, VECTOR_NAME
+from src.hybrid import reciprocal_rank_fusion, sparse_encoder
+from src.config import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+_INITIAL_CAPACITY = 1024
+_SQL_BATCH = 500
+
+
+class _TeamIndex:
+    """Memory-mapped vectors for one team
+
+    Rows are unit-normalized float32 vectors, so the inner product is the
+    cosine similarity. Deleted rows are tombstoned in ``alive`` and handed
+    out again to later inserts, so re-ingesting a document does not grow
+    the arrays (or the HNSW index, whose labels are the rows).
+    """
+
+    def __init__(self, directory: str, dim: int, count: int, capacity: int):
+        self.directory = directory
+        self.dim = dim
+        self.count = count
+        self.capacity = capacity
+        self.hnsw = None
+        # Tombstoned rows below count, found on first use
+        self._free: Optional[List[int]] = None
+        os.makedirs(directory, exist_ok=True)
+        self.vectors = self._open("vectors.f32", np.float32, (capacity, dim))
+        self.alive = self._open("alive.u8", np.uint8, (capacity,))
+
+    def _open(self, name: str, dtype: Any, shape: Tuple[int, ...]) -> np.memmap:
+        path = os.path.join(self.directory, name)
+        mode = "r+" if os.path.exists(path) else "w+"
+        return np.memmap(path, dtype=dtype, mode=mode, shape=shape)
+
+    def allocate(self, n: int) -> List[int]:
+        """Rows for ``n`` new points, reusing tombstoned rows first"""
+        if self._free is None:
+            self._free = np.flatnonzero(self.alive[:self.count] == 0).tolist()
+        reused = n if n <= len(self._free) else len(self._free)
+        rows = self._free[len(self._free) - reused:]
+        del self._free[len(self._free) - reused:]
+        rows.extend(range(self.count, self.count + n - reused))
+        self.count += n - reused
+        return rows
+
+    def release(self, rows: List[int]) -> None:
+        """Tombstone rows and make them available to allocate"""
+        self.alive[rows] = 0
+        self.flush()
+        if self.hnsw is not None:
+            for row in rows:
+                self.hnsw.mark_deleted(row)
+        if self._free is not None:
+            self._free.extend(rows)
+
+    def grow(self, needed: int) -> None:
+        """Double capacity until ``needed`` rows fit"""
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self.capacity:
+            return
+
+        self.flush()
+        for name, dtype, shape in (
+                ("vectors.f32", np.float32, (self.dim,)),
+                ("alive.u8", np.uint8, ())
+        ):
+            path = os.path.join(self.directory, name)
+            current = np.memmap(path, dtype=dtype, mode="r", shape=(self.capacity, *shape))
+            grown = np.memmap(f"{path}.tmp", dtype=dtype, mode="w+", shape=(capacity, *shape))
+            grown[:self.capacity] = current
+            grown.flush()
+            del grown, current
+            os.replace(f"{path}.tmp", path)
+
+        self.capacity = capacity
+        self.vectors = self._open("vectors.f32", np.float32, (capacity, self.dim))
+        self.alive = self._open("alive.u8", np.uint8, (capacity,))
+        if self.hnsw is not None:
+            self.hnsw.resize_index(capacity)
+
+    def flush(self) -> None:
+        self.vectors.flush()
+        self.alive.flush()
+
+    def search(self, query: np.ndarray, limit: int) -> List[Tuple[int, float]]:
+        """Top rows by cosine similarity as (row, score)"""
+        if self.hnsw is not None:
+            return self._search_hnsw(query, limit)
+
+        if not self.count:
+            return []
+        scores = self.vectors[:self.count] @ query
+        scores[self.alive[:self.count] == 0] = -np.inf
+        k = min(limit, self.count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(row), float(scores[row])) for row in top if np.isfinite(scores[row])]
+
+    def _search_hnsw(self, query: np.ndarray, limit: int) -> List[Tuple[int, float]]:
+        k = min(limit, int(self.alive[:self.count].sum()))
+        if not k:
+            return []
+        self.hnsw.set_ef(max(64, k * 2))
+        labels, distances = self.hnsw.knn_query(query, k=k)
+        # hnswlib's "ip" space returns 1 - inner product
+        return [(int(row), float(1.0 - dist)) for row, dist in zip(labels[0], distances[0])]
+
+    def build_hnsw(self) -> None:
+        """Build an HNSW index over the live rows"""
+        import hnswlib
+
+        index = hnswlib.Index(space="ip", dim=self.dim)
+        index.init_index(max_elements=self.capacity, ef_construction=200, M=16)
+        rows = np.flatnonzero(self.alive[:self.count])
+        if len(rows):
+            index.add_items(np.asarray(self.vectors[rows]), rows)
+        self.hnsw = index
+
+
+class LocalVectorStore(BaseVectorStore):
+    """In-process vector store backed by memory-mapped NumPy arrays
+
+    Vectors are partitioned per team into memory-mapped float32 arrays and
+    searched with a vectorized brute-force scan, or with an HNSW index
+    (hnswlib) once a team reaches ``LOCAL_HNSW_MIN_POINTS``. Payloads and
+    BM25 sparse postings live in SQLite next to the arrays.
+    """
+
+    def __init__(self, root: str = config.LOCAL_VECTOR_STORE_PATH):
+        self.root = root
+        self.hnsw_min_points = config.LOCAL_HNSW_MIN_POINTS
+        self._teams: Dict[str, _TeamIndex] = {}
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        os.makedirs(root, exist_ok=True)
+        self.setup_collection()
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.root, "index.db"), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def setup_collection(self) -> bool:
+        """Create the payload tables if they do not exist"""
+        try:
+            conn = self._connect()
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS teams (
+                    team_id TEXT PRIMARY KEY,
+                    directory TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    capacity INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS points (
+                    team_id TEXT NOT NULL,
+                    point_id TEXT NOT NULL,
+                    row INTEGER NOT NULL,
+                    document_id TEXT,
+                    payload TEXT NOT NULL,
+                    PRIMARY KEY (team_id, point_id)
+                );
+                CREATE INDEX IF NOT EXISTS points_row ON points (team_id, row);
+                CREATE INDEX IF NOT EXISTS points_document ON points (team_id, document_id);
+                CREATE TABLE IF NOT EXISTS documents (
+                    team_id TEXT NOT NULL,
+                    document_id TEXT NOT NULL,
+                    doc_name TEXT,
+                    page_count INTEGER NOT NULL,
+                    chunk_count INTEGER NOT NULL,
+                    uploaded_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (team_id, document_id)
+                );
+                CREATE TABLE IF NOT EXISTS sparse_postings (
+                    team_id TEXT NOT NULL,
+                    term INTEGER NOT NULL,
+                    row INTEGER NOT NULL,
+                    weight REAL NOT NULL,
+                    PRIMARY KEY (team_id, term, row)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS sparse_postings_row ON sparse_postings (team_id, row);
+                """
+            )
+            conn.commit()
+
+            # Stores written before the registry existed
+            if (conn.execute("SELECT 1 FROM points LIMIT 1").fetchone()
+                    and not conn.execute("SELECT 1 FROM documents LIMIT 1").fetchone()):
+                self.rebuild_document_registry()
+            if (conn.execute("SELECT 1 FROM points LIMIT 1").fetchone()
+                    and not conn.execute("SELECT 1 FROM sparse_postings LIMIT 1").fetchone()):
+                self._backfill_postings()
+            logger.info(f"Local vector store ready at '{self.root}'")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error setting up local vector store: {str(e)}")
+            raise
+
+    def health_check(self) -> None:
+        """Raise if the payload database is unusable"""
+        self._connect().execute("SELECT 1").fetchone()
+
+    def _team(self, team_id: str, create: bool = False) -> Optional[_TeamIndex]:
+        """Open (or create) a team's arrays; caller holds the lock"""
+        team = self._teams.get(team_id)
+        if team is not None:
+            return team
+
+        row = self._connect().execute(
+            "SELECT directory, count, capacity FROM teams WHERE team_id = ?", (team_id,)
+        ).fetchone()
+        if row:
+            directory, count, capacity = row
+        elif create:
+            directory = hashlib.sha256(team_id.encode("utf-8")).hexdigest()[:32]
+            count, capacity = 0, _INITIAL_CAPACITY
+        else:
+            return None
+
+        team = _TeamIndex(os.path.join(self.root, directory), self.embedding_dim, count, capacity)
+        if self.hnsw_min_points and count >= self.hnsw_min_points:
+            self._build_hnsw(team_id, team)
+        self._teams[team_id] = team
+        return team
+
+    def _build_hnsw(self, team_id: str, team: _TeamIndex) -> None:
+        try:
+            team.build_hnsw()
+            logger.info(f"Built HNSW index over {team.count} rows", extra={"team_id": team_id})
+        except ImportError:
+            logger.error("LOCAL_HNSW_MIN_POINTS is set but hnswlib is not installed")
+            self.hnsw_min_points = 0
+
+    def search_vectors(
+            self,
+            team_id: str,
+            query_vector: List[float],
+            limit: int = 10,
+            query_text: Optional[str] = None,
+            with_vectors: bool = False
+    ) -> List[ScoredPoint]:
+        """Search vectors within team's authorization scope"""
+        try:
+            sparse_query = (sparse_encoder.encode_query(query_text)
+                            if query_text and config.RETRIEVAL_MODE == "hybrid" else None)
+            hybrid = sparse_query is not None and bool(sparse_query.indices)
+
+            query = self._normalize(np.asarray(query_vector, dtype=np.float32))
+            with self._lock:
+                team = self._team(team_id)
+                if team is None:
+                    return []
+                hits = team.search(query, config.HYBRID_PREFETCH_LIMIT if hybrid else limit)
+
+            if not hybrid:
+                return self._scored_points(team_id, hits, with_vectors)
+
+            sparse_hits = self._sparse_search(team_id, sparse_query, config.HYBRID_PREFETCH_LIMIT)
+            return reciprocal_rank_fusion(
+                [self._scored_points(team_id, hits, with_vectors),
+                 self._scored_points(team_id, sparse_hits, with_vectors)],
+                limit
+            )
+
+        except Exception as e:
+            logger.error(f"Error searching vectors: {str(e)}")
+            raise
+
+    def _scored_points(
+            self,
+            team_id: str,
+            hits: List[Tuple[int, float]],
+            with_vectors: bool = False
+    ) -> List[ScoredPoint]:
+        payloads = self._payloads_by_row(team_id, [row for row, _ in hits])
+        team = self._teams.get(team_id) if with_vectors else None
+        return [
+            ScoredPoint(
+                id=payloads[row][0],
+                version=0,
+                score=score,
+                payload=payloads[row][1],
+                vector={VECTOR_NAME: team.vectors[row].tolist()} if team is not None else None
+            )
+            for row, score in hits if row in payloads
+        ]
+
+    def _sparse_search(self, team_id: str, query: SparseVector, limit: int) -> List[Tuple[int, float]]:
+        """BM25 over the team's postings as (row, score)
+
+        IDF uses the same formula as Qdrant's IDF modifier.
+        """
+        conn = self._connect()
+        (total,) = conn.execute(
+            "SELECT COUNT(*) FROM points WHERE team_id = ?", (team_id,)
+        ).fetchone()
+        if not total:
+            return []
+
+        placeholders = ",".join("?" * len(query.indices))
+        doc_freq = dict(conn.execute(
+            f"SELECT term, COUNT(*) FROM sparse_postings "
+            f"WHERE team_id = ? AND term IN ({placeholders}) GROUP BY term",
+            (team_id, *query.indices)
+        ))
+        terms = [
+            (term, value * np.log((total - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5) + 1.0))
+            for term, value in zip(query.indices, query.values) if term in doc_freq
+        ]
+        if not terms:
+            return []
+
+        rows = conn.execute(
+            f"""
+            WITH query (term, weight) AS (VALUES {",".join("(?, ?)" for _ in terms)})
+            SELECT postings.row, SUM(postings.weight * query.weight) AS score
+            FROM sparse_postings AS postings JOIN query ON postings.term = query.term
+            WHERE postings.team_id = ?
+            GROUP BY postings.row ORDER BY score DESC LIMIT ?
+            """,
+            (*[value for term in terms for value in term], team_id, limit)
+        )
+        return [(row, float(score)) for row, score in rows]
+
+    def upsert_points(self, points: List[PointStruct]) -> bool:
+        """Insert or update points"""
+        try:
+            by_team: Dict[str, List[PointStruct]] = {}
+            for point in points:
+                by_team.setdefault(point.payload["team_id"], []).append(point)
+
+            with self._lock:
+                conn = self._connect()
+                for team_id, team_points in by_team.items():
+                    self._upsert_team(conn, team_id, team_points)
+                conn.commit()
+
+            logger.info(f"Successfully upserted {len(points)} points")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error upserting points: {str(e)}")
+            raise
+
+    def _upsert_team(self, conn: sqlite3.Connection, team_id: str, points: List[PointStruct]) -> None:
+        team = self._team(team_id, create=True)
+        ids = [str(point.id) for point in points]
+        existing = dict(self._rows_for_ids(conn, team_id, ids))
+
+        new_ids = [point_id for point_id in dict.fromkeys(ids) if point_id not in existing]
+        existing.update(zip(new_ids, team.allocate(len(new_ids))))
+        rows = [existing[point_id] for point_id in ids]
+        team.grow(team.count)
+
+        vectors = np.asarray([self._point_vector(point) for point in points], dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        team.vectors[rows] = vectors
+        team.alive[rows] = 1
+        team.flush()
+
+        if team.hnsw is not None:
+            # A reused row's label was marked deleted; adding it again restores it
+            team.hnsw.add_items(vectors, rows)
+        elif self.hnsw_min_points and team.count >= self.hnsw_min_points:
+            self._build_hnsw(team_id, team)
+
+        self._write_postings(conn, team_id, rows, points)
+        conn.executemany(
+            "INSERT OR REPLACE INTO points (team_id, point_id, row, document_id, payload) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                (team_id, point_id, row, point.payload.get("document_id"), json.dumps(point.payload))
+                for point_id, row, point in zip(ids, rows, points)
+            ]
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO teams (team_id, directory, count, capacity) VALUES (?, ?, ?, ?)",
+            (team_id, os.path.basename(team.directory), team.count, team.capacity)
+        )
+
+    def supports_sparse(self) -> bool:
+        """Sparse vectors are kept as SQLite postings"""
+        return True
+
+    def _write_postings(
+            self,
+            conn: sqlite3.Connection,
+            team_id: str,
+            rows: List[int],
+            points: List[PointStruct]
+    ) -> None:
+        """Replace the BM25 postings of upserted rows"""
+        self._delete_postings(conn, team_id, rows)
+        postings = []
+        for row, point in zip(rows, points):
+            sparse = point.vector.get(SPARSE_VECTOR_NAME) if isinstance(point.vector, dict) else None
+            if sparse is not None:
+                postings.extend(
+                    (team_id, term, row, weight)
+                    for term, weight in zip(sparse.indices, sparse.values)
+                )
+        conn.executemany(
+            "INSERT OR REPLACE INTO sparse_postings (team_id, term, row, weight) VALUES (?, ?, ?, ?)",
+            postings
+        )
+
+    def _backfill_postings(self) -> None:
+        """Build BM25 postings for points stored before hybrid retrieval"""
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute("SELECT team_id, row, json_extract(payload, '$.text') FROM points")
+            postings = []
+            for team_id, row, text in rows:
+                sparse = sparse_encoder.encode_document(text or "")
+                postings.extend(
+                    (team_id, term, row, weight)
+                    for term, weight in zip(sparse.indices, sparse.values)
+                )
+            conn.executemany(
+                "INSERT OR REPLACE INTO sparse_postings (team_id, term, row, weight) VALUES (?, ?, ?, ?)",
+                postings
+            )
+            conn.commit()
+        logger.info(f"Built {len(postings)} BM25 postings for existing points")
+
+    def _delete_postings(self, conn: sqlite3.Connection, team_id: str, rows: List[int]) -> None:
+        for i in range(0, len(rows), _SQL_BATCH):
+            batch = rows[i:i + _SQL_BATCH]
+            conn.execute(
+                f"DELETE FROM sparse_postings WHERE team_id = ? "
+                f"AND row IN ({','.join('?' * len(batch))})",
+                (team_id, *batch)
+            )
+
+    def delete_document(self, team_id: str, document_id: str) -> int:
+        """Delete a document's vectors and return how many were removed"""
+        try:
+            deleted = self._delete_where(team_id, "document_id = ?", [document_id])
+            conn = self._connect()
+            conn.execute(
+                "DELETE FROM documents WHERE team_id = ? AND document_id = ?",
+                (team_id, document_id)
+            )
+            conn.commit()
+            logger.info(f"Deleted {deleted} points for document '{document_id}'",
+                        extra={"team_id": team_id})
+            return deleted
+
+        except Exception as e:
+            logger.error(f"Error deleting document: {str(e)}")
+            raise
+
+    def delete_points(self, team_id: str, point_ids: List[str]) -> None:
+        """Delete points by id within a team's scope"""
+        try:
+            deleted = 0
+            for i in range(0, len(point_ids), _SQL_BATCH):
+                batch = [str(point_id) for point_id in point_ids[i:i + _SQL_BATCH]]
+                deleted += self._delete_where(
+                    team_id, f"point_id IN ({','.join('?' * len(batch))})", batch
+                )
+            logger.info(f"Deleted {deleted} points", extra={"team_id": team_id})
+
+        except Exception as e:
+            logger.error(f"Error deleting points: {str(e)}")
+            raise
+
+    def _delete_where(self, team_id: str, condition: str, params: List[Any]) -> int:
+        """Tombstone a team's rows matching ``condition`` and drop their records"""
+        with self._lock:
+            conn = self._connect()
+            rows = [row for (row,) in conn.execute(
+                f"SELECT row FROM points WHERE team_id = ? AND {condition}",
+                (team_id, *params)
+            )]
+            if not rows:
+                return 0
+
+            self._delete_postings(conn, team_id, rows)
+            conn.execute(
+                f"DELETE FROM points WHERE team_id = ? AND {condition}",
+                (team_id, *params)
+            )
+            conn.commit()
+
+            # After the commit, so a row is never free while a point still refers to it
+            team = self._team(team_id)
+            if team is not None:
+                team.release(rows)
+        return len(rows)
+
+    def get_team_documents(self, team_id: str) -> List[Dict[str, Any]]:
+        """List the documents stored for a team from the registry"""
+        try:
+            conn = self._connect()
+            conn.row_factory = sqlite3.Row
+            try:
+                rows = conn.execute(
+                    """
+                    SELECT document_id, doc_name, page_count, chunk_count, uploaded_at, updated_at
+                    FROM documents WHERE team_id = ? ORDER BY document_id
+                    """,
+                    (team_id,)
+                ).fetchall()
+            finally:
+                conn.row_factory = None
+            return [dict(row) for row in rows]
+
+        except Exception as e:
+            logger.error(f"Error listing documents: {str(e)}")
+            raise
+
+    def register_document(
+            self,
+            team_id: str,
+            document_id: str,
+            doc_name: str,
+            page_count: int,
+            chunk_count: int
+    ) -> None:
+        """Record a document in the team's registry after ingestion"""
+        try:
+            now = time.time()
+            conn = self._connect()
+            conn.execute(
+                """
+                INSERT INTO documents
+                    (team_id, document_id, doc_name, page_count, chunk_count, uploaded_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (team_id, document_id) DO UPDATE SET
+                    doc_name = excluded.doc_name,
+                    page_count = excluded.page_count,
+                    chunk_count = excluded.chunk_count,
+                    updated_at = excluded.updated_at
+                """,
+                (team_id, document_id, doc_name, page_count, chunk_count, now, now)
+            )
+            conn.commit()
+
+        except Exception as e:
+            logger.error(f"Error registering document: {str(e)}")
+            raise
+
+    def rebuild_document_registry(self, batch_size: int = 1024) -> int:
+        """Rebuild the document registry from stored payloads"""
+        try:
+            now = time.time()
+            with self._lock:
+                conn = self._connect()
+                conn.execute("DELETE FROM documents")
+                cursor = conn.execute(
+                    """
+                    INSERT INTO documents
+                        (team_id, document_id, doc_name, page_count, chunk_count, uploaded_at, updated_at)
+                    SELECT team_id, document_id,
+                           json_extract(MIN(payload), '$.doc_name'),
+                           MAX(json_extract(payload, '$.page_number')),
+                           COUNT(*), ?, ?
+                    FROM points GROUP BY team_id, document_id
+                    """,
+                    (now, now)
+                )
+                conn.commit()
+            logger.info(f"Rebuilt document registry with {cursor.rowcount} documents")
+            return cursor.rowcount
+
+        except Exception as e:
+            logger.error(f"Error rebuilding document registry: {str(e)}")
+            raise
+
+    def _rows_for_ids(self, conn: sqlite3.Connection, team_id: str, ids: List[str]) -> List[Tuple[str, int]]:
+        found = []
+        for start in range(0, len(ids), _SQL_BATCH):
+            batch = ids[start:start + _SQL_BATCH]
+            found.extend(conn.execute(
+                f"SELECT point_id, row FROM points WHERE team_id = ? "
+                f"AND point_id IN ({', '.join('?' for _ in batch)})",
+                [team_id, *batch]
+            ))
+        return found
+
+    def _payloads_by_row(self, team_id: str, rows: List[int]) -> Dict[int, Tuple[str, Dict[str, Any]]]:
+        if not rows:
+            return {}
+        result = self._connect().execute(
+            f"SELECT row, point_id, payload FROM points WHERE team_id = ? "
+            f"AND row IN ({', '.join('?' for _ in rows)})",
+            [team_id, *rows]
+        )
+        return {row: (point_id, json.loads(payload)) for row, point_id, payload in result}
+
+    @staticmethod
+    def _point_vector(point: PointStruct) -> List[float]:
+        vector = point.vector
+        return vector[VECTOR_NAME] if isinstance(vector, dict) else vector
+
+    @staticmethod
+    def _normalize(vector: np.ndarray) -> np.ndarray:
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
@@ -0,0 +1,86 @@
+"""Operational commands for the vector store and API tokens
+
+    python -m src.manage setup
+    python -m src.manage tenant-config
+    python -m src.manage migrate [--layout shard_key]
+    python -m src.manage rebuild-registry
+    python -m src.manage storage-profile --profile scalar
+    python -m src.manage issue-token --team-id acme --hours 24
+"""
+import argparse
+from datetime import timedelta
+from src.lifecycle import resolve
+from src.vector_store import vector_store, QdrantVectorStore
+from src.utils.security import security_manager
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Vector store maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("setup", help="create the collection if it does not exist")
+    commands.add_parser("tenant-config",
+                        help="add payload indexes and per-team HNSW to an existing collection")
+
+    migrate = commands.add_parser(
+        "migrate",
+        help="copy points into a new collection at the current schema and switch the alias"
+    )
+    migrate.add_argument("--layout", choices=QdrantVectorStore.LAYOUTS,
+                         help="layout for the new collection (default: keep the current one)")
+    migrate.add_argument("--batch-size", type=int, default=256)
+
+    storage = commands.add_parser(
+        "storage-profile",
+        help="switch the existing collection to a storage profile in place"
+    )
+    storage.add_argument("--profile", choices=QdrantVectorStore.STORAGE_PROFILES,
+                         help="profile to apply (default: QDRANT_STORAGE_PROFILE)")
+
+    registry = commands.add_parser(
+        "rebuild-registry",
+        help="rebuild the per-team document registry from stored points"
+    )
+    registry.add_argument("--batch-size", type=int, default=1024)
+
+    token = commands.add_parser(
+        "issue-token",
+        help="sign a bearer token for a team with the current JWT signing key"
+    )
+    token.add_argument("--team-id", required=True)
+    token.add_argument("--hours", type=float, default=1.0)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "issue-token":
+        print(security_manager.create_jwt_token(args.team_id, timedelta(hours=args.hours)))
+        return
+
+    if args.command == "setup":
+        vector_store.setup_collection()
+        return
+
+    if args.command == "rebuild-registry":
+        count = vector_store.rebuild_document_registry(args.batch_size)
+        print(f"Registered {count} documents")
+        return
+
+    store = resolve(vector_store)
+    if not isinstance(store, QdrantVectorStore):
+        parser.error(f"'{args.command}' only applies to the Qdrant backend")
+
+    if args.command == "tenant-config":
+        store.apply_tenant_config()
+    elif args.command == "storage-profile":
+        store.apply_storage_profile(args.profile)
+    elif args.command == "migrate":
+        target = store.migrate(args.layout, args.batch_size)
+        print(f"'{store.collection_name}' now points to '{target}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+from src.config import config
+from src.lifecycle import lazy_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Fixed namespace so point ids are stable across processes and deploys
+POINT_NAMESPACE = uuid.UUID("3149ffc8-69bb-4bf3-b4e4-87eeea283d4f")
+
+# Keep IN (...) lists well under SQLite's host parameter limit
+_SQL_BATCH = 500
+
+
+def chunk_hash(text: str) -> str:
+    """Content hash of a chunk"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def point_id(team_id: str, document_id: str, page_number: int, digest: str) -> str:
+    """Deterministic point id for a chunk of a document page"""
+    return str(uuid.uuid5(POINT_NAMESPACE, f"{team_id}/{document_id}/{page_number}/{digest}"))
+
+
+class DocumentManifest:
+    """SQLite record of the chunks stored for each document
+
+    Every upserted point is recorded as (point id, page, chunk index,
+    chunk hash) under its team and document, so a re-upload can tell which
+    chunks are unchanged and which stored points have gone stale.
+    """
+
+    def __init__(self, db_path: str = config.MANIFEST_DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS documents (
+                team_id TEXT NOT NULL,
+                document_id TEXT NOT NULL,
+                doc_name TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (team_id, document_id)
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                team_id TEXT NOT NULL,
+                document_id TEXT NOT NULL,
+                point_id TEXT NOT NULL,
+                page_number INTEGER NOT NULL,
+                chunk_index INTEGER NOT NULL,
+                chunk_hash TEXT NOT NULL,
+                PRIMARY KEY (team_id, document_id, point_id)
+            )
+            """
+        )
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_doc_name(self, team_id: str, document_id: str) -> Optional[str]:
+        """Name the document was last ingested under, if any"""
+        row = self._connect().execute(
+            "SELECT doc_name FROM documents WHERE team_id = ? AND document_id = ?",
+            (team_id, document_id)
+        ).fetchone()
+        return row[0] if row else None
+
+    def get_chunks(self, team_id: str, document_id: str) -> Dict[str, int]:
+        """Map each stored point id of a document to its chunk index"""
+        rows = self._connect().execute(
+            "SELECT point_id, chunk_index FROM chunks WHERE team_id = ? AND document_id = ?",
+            (team_id, document_id)
+        )
+        return dict(rows)
+
+    def add_chunks(
+            self,
+            team_id: str,
+            document_id: str,
+            doc_name: str,
+            chunks: Iterable[Tuple[str, int, int, str]]
+    ) -> None:
+        """Record (point_id, page_number, chunk_index, chunk_hash) entries"""
+        conn = self._connect()
+        try:
+            conn.execute(
+                """
+                INSERT INTO documents (team_id, document_id, doc_name, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (team_id, document_id)
+                DO UPDATE SET doc_name = excluded.doc_name, updated_at = excluded.updated_at
+                """,
+                (team_id, document_id, doc_name, time.time())
+            )
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO chunks
+                    (team_id, document_id, point_id, page_number, chunk_index, chunk_hash)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                [(team_id, document_id, *chunk) for chunk in chunks]
+            )
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error writing document manifest: {str(e)}")
+            raise
+
+    def remove_chunks(self, team_id: str, document_id: str, point_ids: List[str]) -> None:
+        """Forget the given points of a document"""
+        conn = self._connect()
+        try:
+            for i in range(0, len(point_ids), _SQL_BATCH):
+                batch = point_ids[i:i + _SQL_BATCH]
+                conn.execute(
+                    f"DELETE FROM chunks WHERE team_id = ? AND document_id = ? "
+                    f"AND point_id IN ({','.join('?' * len(batch))})",
+                    (team_id, document_id, *batch)
+                )
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error writing document manifest: {str(e)}")
+            raise
+
+    def delete(self, team_id: str, document_id: str) -> None:
+        """Drop a document's manifest, e.g. after its vectors are deleted"""
+        conn = self._connect()
+        conn.execute(
+            "DELETE FROM chunks WHERE team_id = ? AND document_id = ?",
+            (team_id, document_id)
+        )
+        conn.execute(
+            "DELETE FROM documents WHERE team_id = ? AND document_id = ?",
+            (team_id, document_id)
+        )
+        conn.commit()
+
+
+# Initialize global document manifest
+document_manifest = lazy_service("document_manifest", DocumentManifest)
@@ -0,0 +1,55 @@
+import threading
+from typing import Any, Dict, Tuple
+from src.config import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Loaded models by (kind, name); shared by every service in the process
+_models: Dict[Tuple[str, str], Any] = {}
+_lock = threading.Lock()
+
+
+def sentence_transformer(name: str) -> Any:
+    """The SentenceTransformer ``name``, loaded once per process"""
+    return _load("sentence_transformer", name)
+
+
+def cross_encoder(name: str) -> Any:
+    """The CrossEncoder ``name``, loaded once per process"""
+    return _load("cross_encoder", name)
+
+
+def preload_models() -> None:
+    """Load the configured model weights without running them
+
+    Meant for a pre-fork server process: workers forked afterwards share
+    the weights copy-on-write. Nothing here starts threads or opens
+    connections, and no forward pass runs before the fork.
+    """
+    sentence_transformer(config.EMBEDDING_MODEL_NAME)
+    if config.RERANK_ENABLED:
+        cross_encoder(config.RERANK_MODEL)
+
+
+def _load(kind: str, name: str) -> Any:
+    key = (kind, name)
+    with _lock:
+        model = _models.get(key)
+        if model is None:
+            try:
+                # torch and transformers are only imported when a model is needed
+                if kind == "sentence_transformer":
+                    from sentence_transformers import SentenceTransformer
+
+                    model = SentenceTransformer(name)
+                else:
+                    from sentence_transformers import CrossEncoder
+
+                    model = CrossEncoder(name)
+            except Exception as e:
+                logger.error(f"Error loading model '{name}': {str(e)}")
+                raise
+            _models[key] = model
+            logger.info(f"Loaded {kind} '{name}'")
+        return model
@@ -0,0 +1,221 @@
+import os
+import shutil
+import tempfile
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Deque, Iterator, List, Optional, Tuple
+from src.config import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("pdfplumber", "pypdfium2", "pdfminer")
+
+
+def _extract_pdfplumber(path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    import pdfplumber
+
+    pages = []
+    with pdfplumber.open(path) as pdf:
+        for index in range(start, end):
+            page = pdf.pages[index]
+            pages.append((index + 1, page.extract_text() or ""))
+            page.flush_cache()
+    return pages
+
+
+def _extract_pypdfium2(path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    import pypdfium2 as pdfium
+
+    pages = []
+    pdf = pdfium.PdfDocument(path)
+    try:
+        for index in range(start, end):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            try:
+                pages.append((index + 1, textpage.get_text_range() or ""))
+            finally:
+                textpage.close()
+                page.close()
+    finally:
+        pdf.close()
+    return pages
+
+
+def _extract_pdfminer(path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    from pdfminer.converter import PDFPageAggregator
+    from pdfminer.layout import LAParams, LTTextContainer
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+
+    resources = PDFResourceManager(caching=True)
+    device = PDFPageAggregator(resources, laparams=LAParams())
+    interpreter = PDFPageInterpreter(resources, device)
+
+    pages = []
+    with open(path, "rb") as fp:
+        wanted = range(start, end)
+        for index, page in zip(wanted, PDFPage.get_pages(fp, pagenos=set(wanted))):
+            interpreter.process_page(page)
+            layout = device.get_result()
+            text = "".join(
+                element.get_text() for element in layout
+                if isinstance(element, LTTextContainer)
+            )
+            pages.append((index + 1, text.strip()))
+    return pages
+
+
+_EXTRACTORS = {
+    "pdfplumber": _extract_pdfplumber,
+    "pypdfium2": _extract_pypdfium2,
+    "pdfminer": _extract_pdfminer,
+}
+
+
+def extract_page_range(path: str, start: int, end: int, backend: str) -> List[Tuple[int, str]]:
+    """Extract text for pages [start, end) as (page_number, text) pairs
+
+    Module-level so it can be pickled into worker processes. Page numbers
+    are 1-based to match the ``page_number`` payload.
+    """
+    return _EXTRACTORS[backend](path, start, end)
+
+
+def count_pages(path: str, backend: str) -> int:
+    """Count pages without extracting any text"""
+    if backend == "pypdfium2":
+        import pypdfium2 as pdfium
+
+        pdf = pdfium.PdfDocument(path)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+    if backend == "pdfminer":
+        from pdfminer.pdfpage import PDFPage
+
+        with open(path, "rb") as fp:
+            return sum(1 for _ in PDFPage.get_pages(fp))
+
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+
+class PageExtractor:
+    """Page text extraction sharded across a process pool"""
+
+    def __init__(
+            self,
+            backend: str = config.PDF_EXTRACT_BACKEND,
+            workers: int = config.PDF_EXTRACT_WORKERS,
+            pages_per_task: int = config.PDF_EXTRACT_PAGES_PER_TASK
+    ):
+        if backend not in BACKENDS:
+            raise ValueError(
+                f"Unknown PDF extraction backend '{backend}', expected one of {BACKENDS}"
+            )
+        self.backend = backend
+        self.workers = workers if workers > 0 else min(4, os.cpu_count() or 1)
+        self.pages_per_task = max(1, pages_per_task)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Create the shared worker pool on first use"""
+        with self._lock:
+            if self._executor is None:
+                # spawn keeps workers free of the parent's threads and model memory
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+                logger.info(
+                    f"Started PDF extraction pool with {self.workers} workers "
+                    f"using backend '{self.backend}'"
+                )
+            return self._executor
+
+    def shutdown(self) -> None:
+        """Stop the worker pool"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def iter_pages(self, pdf_file: Any) -> Iterator[Tuple[int, str]]:
+        """Yield (page_number, text) for every page, in page order
+
+        Pages without text are yielded with an empty string so callers can
+        count them as processed.
+        """
+        path, is_temp = self._spool(pdf_file)
+        try:
+            total = count_pages(path, self.backend)
+            ranges = [
+                (start, min(start + self.pages_per_task, total))
+                for start in range(0, total, self.pages_per_task)
+            ]
+
+            if self.workers <= 1 or len(ranges) <= 1:
+                for start, end in ranges:
+                    yield from extract_page_range(path, start, end, self.backend)
+                return
+
+            yield from self._iter_parallel(path, ranges)
+
+        finally:
+            if is_temp:
+                os.unlink(path)
+
+    def _iter_parallel(self, path: str, ranges: List[Tuple[int, int]]) -> Iterator[Tuple[int, str]]:
+        """Fan page ranges out to the pool, keeping a bounded window in flight"""
+        executor = self._get_executor()
+        pending: Deque[Future] = deque()
+        remaining = iter(ranges)
+
+        def submit_next() -> None:
+            for start, end in remaining:
+                pending.append(executor.submit(extract_page_range, path, start, end, self.backend))
+                return
+
+        try:
+            for _ in range(self.workers * 2):
+                submit_next()
+
+            while pending:
+                pages = pending.popleft().result()
+                submit_next()
+                yield from pages
+        finally:
+            for future in pending:
+                future.cancel()
+            # The spooled file must outlive any range still being read
+            for future in pending:
+                if not future.cancelled():
+                    try:
+                        future.result()
+                    except Exception:
+                        pass
+
+    def _spool(self, pdf_file: Any) -> Tuple[str, bool]:
+        """Return a filesystem path for the PDF, spooling streams to disk"""
+        if isinstance(pdf_file, (str, os.PathLike)):
+            return os.fspath(pdf_file), False
+
+        if hasattr(pdf_file, "seek"):
+            pdf_file.seek(0)
+        stream = getattr(pdf_file, "stream", pdf_file)
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as spooled:
+            shutil.copyfileobj(stream, spooled)
+        return spooled.name, True
+
+
+# Initialize global page extractor
+page_extractor = PageExtractor()
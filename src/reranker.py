@@ -0,0 +1,122 @@
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from src.utils.metrics import Histogram
+from src.config import config
+from src.lifecycle import lazy_service
+from src.models import cross_encoder
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Reranker:
+    """Optional cross-encoder rerank stage for retrieved chunks
+
+    Scores (question, chunk) pairs with a sentence-transformers
+    CrossEncoder in one batched forward pass and keeps the ``top_k`` best.
+    Scores are cached per (question hash, point id), so repeated or
+    retried questions only score new candidates. Hits come back with the
+    cross-encoder score (0-1) as their ``score``.
+    """
+
+    def __init__(
+            self,
+            enabled: bool = config.RERANK_ENABLED,
+            model_name: str = config.RERANK_MODEL,
+            candidates: int = config.RERANK_CANDIDATES,
+            top_k: int = config.RERANK_TOP_K,
+            batch_size: int = config.RERANK_BATCH_SIZE,
+            cache_size: int = config.RERANK_CACHE_SIZE
+    ):
+        self.enabled = enabled
+        self.model_name = model_name
+        self.candidates = candidates
+        self.top_k = top_k
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.model = None
+        self.latency = Histogram("rerank_latency_ms")
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "pairs_scored": 0, "cache_hits": 0}
+
+        if self.enabled:
+            try:
+                self.model = cross_encoder(self.model_name)
+                self.model.predict([("warm up", "warm up")], show_progress_bar=False)
+                logger.info(f"Loaded rerank model '{self.model_name}'")
+            except Exception as e:
+                logger.error(f"Error loading rerank model: {str(e)}")
+                raise
+
+    def rerank(self, question: str, points: Sequence[Any]) -> List[Any]:
+        """Top ``top_k`` points by cross-encoder score"""
+        if not self.enabled or not points:
+            return list(points)
+
+        with self.latency.time():
+            question_key = hashlib.sha256(" ".join(question.split()).encode("utf-8")).hexdigest()
+            keys = [(question_key, str(point.id)) for point in points]
+            scores = self._cached_scores(keys)
+
+            missing = [i for i, score in enumerate(scores) if score is None]
+            if missing:
+                pairs = [(question, points[i].payload.get("text", "")) for i in missing]
+                predicted = self.model.predict(
+                    pairs,
+                    batch_size=self.batch_size,
+                    show_progress_bar=False
+                )
+                for i, score in zip(missing, predicted):
+                    scores[i] = float(score)
+                self._store_scores({keys[i]: scores[i] for i in missing})
+
+            with self._lock:
+                self._stats["requests"] += 1
+                self._stats["pairs_scored"] += len(missing)
+                self._stats["cache_hits"] += len(points) - len(missing)
+
+            ranked = sorted(zip(scores, range(len(points))), key=lambda item: -item[0])
+            return [
+                points[i].model_copy(update={"score": score})
+                for score, i in ranked[:self.top_k]
+            ]
+
+    async def arerank(self, question: str, points: Sequence[Any]) -> List[Any]:
+        """Rerank without blocking the event loop"""
+        if not self.enabled or not points:
+            return list(points)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.rerank, question, points)
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters and the latency histogram"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cache_entries"] = len(self._cache)
+        stats["enabled"] = self.enabled
+        stats["latency_ms"] = self.latency.snapshot()
+        return stats
+
+    def _cached_scores(self, keys: List[Tuple[str, str]]) -> List[Optional[float]]:
+        with self._lock:
+            scores = []
+            for key in keys:
+                score = self._cache.get(key)
+                if score is not None:
+                    self._cache.move_to_end(key)
+                scores.append(score)
+            return scores
+
+    def _store_scores(self, scores: Dict[Tuple[str, str], float]) -> None:
+        with self._lock:
+            self._cache.update(scores)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+
+# Initialize global reranker
+reranker = lazy_service("reranker", Reranker)
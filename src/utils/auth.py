@@ -1,38 +1,91 @@
 from functools import wraps
-from flask import request, jsonify
-import time
+from typing import Optional, Tuple
+from flask import g, request, jsonify
+from starlette.responses import JSONResponse
+from src.utils.security import security_manager
+from src.config import config
 
+_CHALLENGE = {"WWW-Authenticate": "Bearer"}
 
-class RateLimiter:
-    def __init__(self, window: int = 60, max_requests: int = 100):
-        self.window = window
-        self.max_requests = max_requests
-        self.requests = {}
 
-    def is_allowed(self, team_id: str) -> bool:
-        now = time.time()
-        team_requests = self.requests.get(team_id, [])
-        team_requests = [req_time for req_time in team_requests
-                         if now - req_time < self.window]
+def authorize_team(
+        authorization: Optional[str],
+        requested_team_id: Optional[str]
+) -> Tuple[Optional[str], Optional[Tuple[str, int]]]:
+    """The team a request acts for, or the (error, status) to reject it with
 
-        if len(team_requests) >= self.max_requests:
-            return False
+    With auth enabled the team comes from the bearer token's ``team_id``
+    claim; a ``team_id`` sent in the request must match it. Otherwise the
+    requested team is trusted as is.
+    """
+    if not config.AUTH_ENABLED:
+        if not requested_team_id:
+            return None, ("team_id is required", 401)
+        return requested_team_id, None
 
-        team_requests.append(now)
-        self.requests[team_id] = team_requests
-        return True
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        return None, ("Bearer token required", 401)
+
+    claims = security_manager.authenticate(token.strip())
+    if claims is None:
+        return None, ("Invalid or expired token", 401)
+
+    team_id = claims.get("team_id")
+    if not team_id:
+        return None, ("Token has no team_id claim", 403)
+    if requested_team_id and requested_team_id != team_id:
+        return None, ("Token is not valid for this team", 403)
+    return team_id, None
 
 
 def require_team_auth(f):
+    """Authorize the request and expose its team as ``g.team_id``"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        team_id = request.form.get('team_id') or request.json.get('team_id')
-
-        if not team_id:
-            return jsonify({"error": "team_id is required"}), 401
+        json_data = request.get_json(silent=True)
+        requested_team_id = (request.form.get('team_id')
+                             or request.args.get('team_id')
+                             or (json_data.get('team_id') if isinstance(json_data, dict) else None))
 
-        # Add your additional authorization checks here
+        team_id, error = authorize_team(request.headers.get('Authorization'), requested_team_id)
+        if error:
+            message, status = error
+            return jsonify({"error": message}), status, (_CHALLENGE if status == 401 else {})
 
+        g.team_id = team_id
         return f(*args, **kwargs)
 
-    return decorated_function
\ No newline at end of file
+    return decorated_function
+
+
+def require_team_auth_async(f):
+    """require_team_auth for Starlette endpoints; the team is ``request.state.team_id``"""
+    @wraps(f)
+    async def decorated_function(request, *args, **kwargs):
+        requested_team_id = request.query_params.get('team_id')
+        content_type = request.headers.get('content-type', '')
+
+        if not requested_team_id and content_type.startswith('application/json'):
+            try:
+                json_data = await request.json()
+            except ValueError:
+                json_data = None
+            if isinstance(json_data, dict):
+                requested_team_id = json_data.get('team_id')
+
+        if not requested_team_id and content_type.startswith(('multipart/form-data',
+                                                              'application/x-www-form-urlencoded')):
+            form = await request.form()
+            requested_team_id = form.get('team_id')
+
+        team_id, error = authorize_team(request.headers.get('authorization'), requested_team_id)
+        if error:
+            message, status = error
+            return JSONResponse({"error": message}, status_code=status,
+                                headers=_CHALLENGE if status == 401 else None)
+
+        request.state.team_id = team_id
+        return await f(request, *args, **kwargs)
+
+    return decorated_function
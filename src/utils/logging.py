@@ -1,79 +1,243 @@
-import logging
-import logging.config
+import atexit
 import json
-from datetime import datetime
-from typing import Dict, Any
+import logging
+import logging.handlers
 import os
+import queue
+import random
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from src.config import config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Attributes every record has; anything else was passed through ``extra``
+_RECORD_ATTRIBUTES = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", None, None))
+) | {"message", "asctime"}
+
+if orjson is not None:
+    def _dumps(data: Dict[str, Any]) -> str:
+        return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+else:
+    def _dumps(data: Dict[str, Any]) -> str:
+        return json.dumps(data, default=str)
+
+
+class JSONFormatter(logging.Formatter):
+    """JSON log formatter; every ``extra`` field is included"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        log_data = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno
+        }
+
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                log_data[key] = value
+
+        if record.exc_info:
+            log_data["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            log_data["exception"] = record.exc_text
+
+        return _dumps(log_data)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of records below WARNING; warnings and errors always pass
+
+    Kept records carry ``sample_rate`` so counts can be scaled back up.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1.0:
+            return True
+        if random.random() >= self.rate:
+            return False
+        record.sample_rate = self.rate
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to a bounded queue without blocking the caller for long
+
+    When the queue is full, records below WARNING are dropped at once and
+    warnings and errors wait up to ``block_seconds`` before being dropped.
+    The number dropped is logged once the queue has room again.
+    """
+
+    def __init__(self, log_queue: queue.Queue, block_seconds: float = 0.1):
+        super().__init__(log_queue)
+        self.block_seconds = block_seconds
+        self.dropped = 0
+        self.total_dropped = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args now, as they may change once the call returns; the
+        # listener does the formatting. Tracebacks become text so frames
+        # are not kept alive while queued.
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            if record.levelno >= logging.WARNING:
+                self.queue.put(record, timeout=self.block_seconds)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                self.total_dropped += 1
+            return
+
+        if self.dropped:
+            self._report_dropped()
+
+    def _report_dropped(self) -> None:
+        with self._lock:
+            dropped, self.dropped = self.dropped, 0
+        if not dropped:
+            return
+        try:
+            self.queue.put_nowait(logging.makeLogRecord({
+                "name": __name__,
+                "levelno": logging.WARNING,
+                "levelname": "WARNING",
+                "msg": f"Dropped {dropped} log records because the log queue was full",
+                "dropped": dropped
+            }))
+        except queue.Full:
+            with self._lock:
+                self.dropped += dropped
+
+
+_queue_handler: Optional[DroppingQueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+_handlers: List[logging.Handler] = []
+_setup_lock = threading.Lock()
 
 
 def setup_logging(
         level: str = "INFO",
         log_file: str = "app.log",
-        json_format: bool = True
+        json_format: bool = True,
+        queue_size: int = config.LOG_QUEUE_SIZE,
+        info_sample_rate: float = config.LOG_INFO_SAMPLE_RATE
 ) -> None:
-    """Setup application logging"""
+    """Setup application logging
 
-    class JSONFormatter(logging.Formatter):
-        """JSON log formatter"""
+    Callers only put records on a bounded queue; a background listener
+    formats them and writes to the console and the rotating log file, so
+    request threads never wait on file I/O or rotation. Calling it again
+    replaces the previous setup.
+    """
+    global _queue_handler, _handlers
 
-        def format(self, record: logging.LogRecord) -> str:
-            log_data = {
-                "timestamp": datetime.utcnow().isoformat(),
-                "level": record.levelname,
-                "message": record.getMessage(),
-                "module": record.module,
-                "function": record.funcName,
-                "line": record.lineno
-            }
+    stop_logging()
 
-            if hasattr(record, 'team_id'):
-                log_data["team_id"] = record.team_id
+    # Create logs directory if it doesn't exist
+    os.makedirs("logs", exist_ok=True)
 
-            if record.exc_info:
-                log_data["exception"] = self.formatException(record.exc_info)
+    if json_format:
+        formatter = JSONFormatter()
+    else:
+        formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s")
 
-            return json.dumps(log_data)
+    console = logging.StreamHandler()
+    file_handler = logging.handlers.RotatingFileHandler(
+        f"logs/{log_file}",
+        maxBytes=10485760,  # 10MB
+        backupCount=5
+    )
+    _handlers = [console, file_handler]
+    for handler in _handlers:
+        handler.setFormatter(formatter)
+        handler.setLevel(level)
 
-    # Create logs directory if it doesn't exist
-    os.makedirs("logs", exist_ok=True)
+    _queue_handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+    if info_sample_rate < 1.0:
+        _queue_handler.addFilter(SamplingFilter(info_sample_rate))
 
-    # Configure logging
-    config = {
-        "version": 1,
-        "disable_existing_loggers": False,
-        "formatters": {
-            "json": {
-                "()": JSONFormatter
-            },
-            "standard": {
-                "format": "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
-            }
-        },
-        "handlers": {
-            "console": {
-                "class": "logging.StreamHandler",
-                "formatter": "json" if json_format else "standard",
-                "level": level
-            },
-            "file": {
-                "class": "logging.handlers.RotatingFileHandler",
-                "filename": f"logs/{log_file}",
-                "maxBytes": 10485760,  # 10MB
-                "backupCount": 5,
-                "formatter": "json" if json_format else "standard",
-                "level": level
-            }
-        },
-        "loggers": {
-            "": {
-                "handlers": ["console", "file"],
-                "level": level,
-                "propagate": True
-            }
-        }
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+
+    _start_listener()
+
+
+def ensure_logging() -> None:
+    """setup_logging unless this process has configured logging already
+
+    For app entry points, which may run with or without gunicorn.conf.py
+    (e.g. ``uvicorn src.asgi:app`` or a bare ``gunicorn src.api:app``).
+    """
+    with _setup_lock:
+        if _queue_handler is None:
+            setup_logging()
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    for handler in _handlers:
+        handler.close()
+
+
+def logging_stats() -> Optional[Dict[str, Any]]:
+    """Queue depth and dropped records, or None before setup_logging"""
+    if _queue_handler is None:
+        return None
+    return {
+        "queued": _queue_handler.queue.qsize(),
+        "dropped": _queue_handler.total_dropped
     }
 
-    logging.config.dictConfig(config)
+
+def _start_listener() -> None:
+    global _listener
+    _listener = logging.handlers.QueueListener(
+        _queue_handler.queue, *_handlers, respect_handler_level=True
+    )
+    _listener.start()
+
+
+def _restart_after_fork() -> None:
+    """The listener thread does not survive fork (e.g. gunicorn workers)"""
+    if _listener is None:
+        return
+    # The old queue's lock may have been held by the parent's listener
+    _queue_handler.queue = queue.Queue(maxsize=_queue_handler.queue.maxsize)
+    _start_listener()
+
+
+atexit.register(stop_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_after_fork)
 
 
 def log_with_context(
@@ -93,7 +257,3 @@ def log_with_context(
         message,
         extra=log_data
     )
-
-
-# Initialize logging
-setup_logging()
\ No newline at end of file
@@ -0,0 +1,424 @@
+import atexit
+import bisect
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+from src.config import config
+
+logger = logging.getLogger(__name__)
+
+# Milliseconds; covers sub-millisecond cache hits up to multi-second model calls
+DEFAULT_LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class Histogram:
+    """Fixed-bucket histogram with percentile estimates
+
+    Buckets are upper bounds; observations above the last bound fall in an
+    overflow bucket. Percentiles are interpolated within buckets.
+    """
+
+    def __init__(self, name: str, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS_MS):
+        self.name = name
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._sum += value
+            self._count += 1
+            self._max = max(self._max, value)
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the wall time of the block in milliseconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe((time.perf_counter() - start) * 1000)
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            counts, total, maximum = list(self._counts), self._count, self._max
+        if not total:
+            return None
+
+        target = q / 100 * total
+        seen = 0
+        for i, count in enumerate(counts):
+            if count and seen + count >= target:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else maximum
+                return round(min(lower + (upper - lower) * (target - seen) / count, maximum), 3)
+            seen += count
+        return maximum
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counts per bucket plus summary statistics"""
+        with self._lock:
+            counts, total, value_sum, maximum = list(self._counts), self._count, self._sum, self._max
+        buckets = {str(bound): count for bound, count in zip(self.buckets, counts)}
+        buckets["+Inf"] = counts[-1]
+        return {
+            "count": total,
+            "sum": round(value_sum, 3),
+            "avg": round(value_sum / total, 3) if total else None,
+            "max": round(maximum, 3),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "buckets": buckets
+        }
+
+    def export(self) -> Tuple[Tuple[float, ...], List[int], float, int]:
+        """Bucket bounds, cumulative counts (including +Inf), sum and count"""
+        with self._lock:
+            counts, value_sum, total = list(self._counts), self._sum, self._count
+        cumulative = []
+        running = 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return self.buckets, cumulative, value_sum, total
+
+    def state(self) -> List[Any]:
+        """Raw bucket counts, sum, count and max, for sharing between processes"""
+        with self._lock:
+            return [list(self._counts), self._sum, self._count, self._max]
+
+    def merge(self, state: Sequence[Any]) -> None:
+        """Add the raw state of a histogram with the same buckets"""
+        counts, value_sum, total, maximum = state
+        if len(counts) != len(self._counts):
+            raise ValueError(f"Histogram {self.name} has different buckets")
+        with self._lock:
+            for i, count in enumerate(counts):
+                self._counts[i] += count
+            self._sum += value_sum
+            self._count += total
+            self._max = max(self._max, maximum)
+
+
+class RequestTrace:
+    """Milliseconds spent per stage while serving one request"""
+
+    __slots__ = ("stages",)
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+
+    def add(self, stage: str, elapsed_ms: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + elapsed_ms
+
+    def summary(self) -> Dict[str, float]:
+        return {stage: round(elapsed, 3) for stage, elapsed in self.stages.items()}
+
+
+# The trace object is shared (not copied) by threads and tasks spawned from the request
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metrics:
+    """Per-stage latency histograms and request counters for /metrics
+
+    Spans time a block into a histogram labelled by stage and team, and add
+    to the current request's trace so the request log shows where the time
+    went. Team labels are bounded: the first ``max_teams`` teams seen get
+    their own series, later ones share ``other``. Histograms are kept in
+    milliseconds and exported in seconds, as Prometheus expects.
+
+    With a ``directory``, a background thread writes each process's series
+    to ``<pid>.json`` there every ``flush_seconds`` when they have changed,
+    and /metrics sums every file, so a scrape of any gunicorn worker covers
+    all of them. Recording only marks the series dirty. Files of exited
+    workers are kept so counters never go down; clear the directory when
+    the server starts (gunicorn.conf.py does).
+    """
+
+    def __init__(
+            self,
+            prefix: str = config.METRICS_PREFIX,
+            enabled: bool = config.METRICS_ENABLED,
+            max_teams: int = config.METRICS_MAX_TEAMS,
+            buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS_MS,
+            directory: Optional[str] = config.METRICS_DIR,
+            flush_seconds: float = config.METRICS_FLUSH_SECONDS
+    ):
+        self.prefix = prefix
+        self.enabled = enabled
+        self.max_teams = max_teams
+        self.buckets = buckets
+        self.directory = directory or None
+        self.flush_seconds = flush_seconds
+        self._reset()
+
+    def _reset(self) -> None:
+        """Drop every series; the process's file keeps what was flushed"""
+        self._stages: Dict[Tuple[str, str], Histogram] = {}
+        self._requests: Dict[Tuple[str, str], Histogram] = {}
+        self._responses: Dict[Tuple[str, str, str, str], int] = {}
+        self._teams: Set[str] = set()
+        self._overflowed = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._dirty = False
+        # Started on the first change, so a forking master never owns one
+        self._flusher: Optional[threading.Thread] = None
+
+    def team_label(self, team_id: Optional[str]) -> str:
+        """Label value for a team, bounded to ``max_teams`` distinct values"""
+        if not team_id:
+            return "none"
+        if team_id in self._teams:
+            return team_id
+        with self._lock:
+            if team_id in self._teams:
+                return team_id
+            if len(self._teams) < self.max_teams:
+                self._teams.add(team_id)
+                return team_id
+            self._overflowed += 1
+        return "other"
+
+    def observe(self, stage: str, elapsed_ms: float, team_id: Optional[str] = None) -> None:
+        """Record time spent in a stage"""
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(stage, elapsed_ms)
+        if not self.enabled:
+            return
+        self._histogram(self._stages, (stage, self.team_label(team_id))).observe(elapsed_ms)
+        self._changed()
+
+    @contextmanager
+    def span(self, stage: str, team_id: Optional[str] = None) -> Iterator[None]:
+        """Time the block as ``stage``; failures are timed too"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, (time.perf_counter() - start) * 1000, team_id)
+
+    def start_trace(self) -> RequestTrace:
+        """Begin collecting stage timings for the current request"""
+        trace = RequestTrace()
+        _current_trace.set(trace)
+        return trace
+
+    def current_trace(self) -> Optional[RequestTrace]:
+        return _current_trace.get()
+
+    def record_request(self, route: str, method: str, status_code: int,
+                       elapsed_ms: float, team_id: Optional[str] = None) -> None:
+        """Count a response and time it by route"""
+        if not self.enabled:
+            return
+        self._histogram(self._requests, (route, method)).observe(elapsed_ms)
+        key = (route, method, str(status_code), self.team_label(team_id))
+        with self._lock:
+            self._responses[key] = self._responses.get(key, 0) + 1
+        self._changed()
+
+    def stage_stats(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Summary statistics per stage and team label, without buckets"""
+        with self._lock:
+            stages = sorted(self._stages.items())
+        stats: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for (stage, team), histogram in stages:
+            snapshot = histogram.snapshot()
+            del snapshot["buckets"]
+            stats.setdefault(stage, {})[team] = snapshot
+        return stats
+
+    def flush(self, wait: bool = True) -> None:
+        """Write this process's series to the shared directory, if changed"""
+        if not self.directory or not self._flush_lock.acquire(blocking=wait):
+            return
+        try:
+            if not self._dirty:
+                return
+            self._dirty = False
+            path = os.path.join(self.directory, f"{os.getpid()}.json")
+            os.makedirs(self.directory, exist_ok=True)
+            with open(f"{path}.tmp", "w") as f:
+                json.dump(self._state(), f)
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            self._dirty = True
+            logger.warning(f"Error writing metrics to {self.directory}: {str(e)}")
+        finally:
+            self._flush_lock.release()
+
+    def clear_directory(self) -> None:
+        """Remove every process's series from the shared directory"""
+        if not self.directory:
+            return
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            os.remove(path)
+
+    def render_prometheus(self) -> str:
+        """All series in the Prometheus text exposition format (0.0.4)"""
+        lines: List[str] = []
+        stages, requests, responses, teams, overflowed = self._collect()
+        team_count = len(teams)
+
+        self._render_histograms(
+            lines, "stage_duration_seconds",
+            "Time spent in each answer and ingestion stage", ("stage", "team"), stages
+        )
+        self._render_histograms(
+            lines, "http_request_duration_seconds",
+            "Time to produce a response, by route", ("route", "method"), requests
+        )
+
+        name = f"{self.prefix}_http_responses_total"
+        lines.append(f"# HELP {name} Responses by route, status and team")
+        lines.append(f"# TYPE {name} counter")
+        for values, count in responses:
+            lines.append(f"{name}{_labels(('route', 'method', 'status', 'team'), values)} {count}")
+
+        name = f"{self.prefix}_team_labels"
+        lines.append(f"# HELP {name} Teams with their own label (others are reported as 'other')")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {team_count}")
+        name = f"{self.prefix}_team_label_overflow_total"
+        lines.append(f"# HELP {name} Observations folded into the 'other' team label")
+        lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name} {overflowed}")
+        return "\n".join(lines) + "\n"
+
+    def _changed(self) -> None:
+        self._dirty = True
+        if self.directory and self._flusher is None:
+            self._start_flusher()
+
+    def _start_flusher(self) -> None:
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flush_periodically,
+                                             name="metrics-flush", daemon=True)
+            self._flusher.start()
+
+    def _flush_periodically(self) -> None:
+        while True:
+            time.sleep(self.flush_seconds)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"Error flushing metrics: {str(e)}")
+
+    def _state(self) -> Dict[str, Any]:
+        """This process's series as plain JSON-serializable values"""
+        with self._lock:
+            stages = list(self._stages.items())
+            requests = list(self._requests.items())
+            responses = list(self._responses.items())
+            teams, overflowed = sorted(self._teams), self._overflowed
+        return {
+            "stages": [[list(key), histogram.state()] for key, histogram in stages],
+            "requests": [[list(key), histogram.state()] for key, histogram in requests],
+            "responses": [[list(key), count] for key, count in responses],
+            "teams": teams,
+            "overflowed": overflowed
+        }
+
+    def _collect(self) -> Tuple[list, list, list, Set[str], int]:
+        """Series summed over this process or, with a directory, every process"""
+        if self.directory:
+            self.flush()
+            states = []
+            for path in glob.glob(os.path.join(self.directory, "*.json")):
+                try:
+                    with open(path) as f:
+                        states.append(json.load(f))
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Skipping metrics file {path}: {str(e)}")
+        else:
+            states = [self._state()]
+
+        stages: Dict[Tuple[str, ...], Histogram] = {}
+        requests: Dict[Tuple[str, ...], Histogram] = {}
+        responses: Dict[Tuple[str, ...], int] = {}
+        teams: Set[str] = set()
+        overflowed = 0
+        for state in states:
+            for merged, name in ((stages, "stages"), (requests, "requests")):
+                for key, histogram_state in state[name]:
+                    key = tuple(key)
+                    histogram = merged.setdefault(key, Histogram("_".join(key), self.buckets))
+                    try:
+                        histogram.merge(histogram_state)
+                    except ValueError as e:
+                        logger.warning(f"Skipping metrics series: {str(e)}")
+            for key, count in state["responses"]:
+                responses[tuple(key)] = responses.get(tuple(key), 0) + count
+            teams.update(state["teams"])
+            overflowed += state["overflowed"]
+        return (sorted(stages.items()), sorted(requests.items()),
+                sorted(responses.items()), teams, overflowed)
+
+    def _histogram(self, series: Dict[Any, Histogram], key: Tuple[str, ...]) -> Histogram:
+        histogram = series.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = series.setdefault(key, Histogram("_".join(key), self.buckets))
+        return histogram
+
+    def _render_histograms(
+            self,
+            lines: List[str],
+            metric: str,
+            help_text: str,
+            label_names: Sequence[str],
+            series: List[Tuple[Tuple[str, ...], Histogram]]
+    ) -> None:
+        name = f"{self.prefix}_{metric}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        inf = 'le="+Inf"'
+        for values, histogram in series:
+            bounds, cumulative, value_sum, total = histogram.export()
+            for bound, count in zip(bounds, cumulative):
+                le = f'le="{_number(bound / 1000)}"'
+                lines.append(f"{name}_bucket{_labels(label_names, values, le)} {count}")
+            lines.append(f"{name}_bucket{_labels(label_names, values, inf)} {cumulative[-1]}")
+            lines.append(f"{name}_sum{_labels(label_names, values)} {_number(value_sum / 1000)}")
+            lines.append(f"{name}_count{_labels(label_names, values)} {total}")
+
+
+# Shared by the WSGI and ASGI apps and the ingestion workers
+metrics = Metrics()
+
+atexit.register(metrics.flush)
+if hasattr(os, "register_at_fork"):
+    # A forked worker starts empty, with no flush thread; anything recorded
+    # before the fork is in the parent's file
+    os.register_at_fork(after_in_child=metrics._reset)
@@ -0,0 +1,270 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from src.config import config
+from src.lifecycle import lazy_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _window_state(
+        stored_window: Optional[int],
+        current: int,
+        previous: int,
+        window: int
+) -> Tuple[int, int]:
+    """Counts for ``window`` given the counts stored for ``stored_window``"""
+    if stored_window == window:
+        return current, previous
+    if stored_window == window - 1:
+        return 0, current
+    return 0, 0
+
+
+def _estimate(current: int, previous: int, elapsed: float) -> float:
+    """Sliding-window estimate: the previous window weighted by its overlap"""
+    return previous * (1.0 - elapsed) + current
+
+
+class BaseRateLimitBackend(ABC):
+    """Sliding-window counters keyed by (action, team)
+
+    Each key keeps the request count of the current and the previous fixed
+    window; a check is a constant number of reads and writes regardless of
+    the limit. Rejected requests are not counted.
+    """
+
+    @abstractmethod
+    def hit(self, key: str, limit: int, window_seconds: float, now: float) -> bool:
+        """Count a request against ``key`` if it is under ``limit``"""
+        pass
+
+    def close(self) -> None:
+        """Release connections"""
+
+
+class MemoryRateLimitBackend(BaseRateLimitBackend):
+    """Per-process counters; keys idle for two windows are evicted"""
+
+    def __init__(self):
+        # key -> [window, current, previous, last_seen], least recently seen first
+        self._counters: "OrderedDict[str, List[Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, window_seconds: float, now: float) -> bool:
+        window = int(now // window_seconds)
+        elapsed = now / window_seconds - window
+
+        with self._lock:
+            self._evict(now - 2 * window_seconds)
+            counter = self._counters.get(key)
+            if counter is None:
+                current, previous = 0, 0
+            else:
+                current, previous = _window_state(counter[0], counter[1], counter[2], window)
+
+            allowed = _estimate(current, previous, elapsed) + 1 <= limit
+            if allowed:
+                current += 1
+            self._counters[key] = [window, current, previous, now]
+            self._counters.move_to_end(key)
+            return allowed
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+    def _evict(self, cutoff: float) -> None:
+        # A counter untouched for two windows no longer affects any check
+        while self._counters:
+            key, counter = next(iter(self._counters.items()))
+            if counter[3] >= cutoff:
+                break
+            del self._counters[key]
+
+
+class SQLiteRateLimitBackend(BaseRateLimitBackend):
+    """Counters in a SQLite file shared by every process on the host
+
+    Each check is one immediate transaction (a primary-key read and an
+    upsert), which serializes concurrent workers on the same key. Put the
+    file on tmpfs (e.g. /dev/shm) to keep it in shared memory.
+    """
+
+    # Purge idle counters every this many checks
+    EVICT_EVERY = 1000
+
+    def __init__(self, db_path: str = config.RATE_LIMIT_DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._checks = 0
+        self._checks_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                key TEXT PRIMARY KEY,
+                window INTEGER NOT NULL,
+                current INTEGER NOT NULL,
+                previous INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS rate_limits_updated ON rate_limits (updated_at)")
+
+    def hit(self, key: str, limit: int, window_seconds: float, now: float) -> bool:
+        window = int(now // window_seconds)
+        elapsed = now / window_seconds - window
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT window, current, previous FROM rate_limits WHERE key = ?", (key,)
+            ).fetchone()
+            current, previous = _window_state(*row, window) if row else (0, 0)
+
+            allowed = _estimate(current, previous, elapsed) + 1 <= limit
+            if allowed:
+                current += 1
+            conn.execute(
+                """
+                INSERT INTO rate_limits (key, window, current, previous, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET window = excluded.window,
+                    current = excluded.current, previous = excluded.previous,
+                    updated_at = excluded.updated_at
+                """,
+                (key, window, current, previous, now)
+            )
+
+            with self._checks_lock:
+                self._checks += 1
+                evict = self._checks % self.EVICT_EVERY == 0
+            if evict:
+                conn.execute("DELETE FROM rate_limits WHERE updated_at < ?",
+                             (now - 2 * window_seconds,))
+            conn.execute("COMMIT")
+            return allowed
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode; hit() manages its own transaction
+            conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+
+class RedisRateLimitBackend(BaseRateLimitBackend):
+    """Counters in Redis, shared by every process and host
+
+    Uses only GET, INCR, DECR and PEXPIRE in one pipeline, so any client
+    with the redis-py interface works, including in-process stand-ins such
+    as fakeredis. Counters expire on their own after two windows.
+    """
+
+    def __init__(self, url: str = config.RATE_LIMIT_REDIS_URL, client: Any = None,
+                 prefix: str = "ratelimit"):
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise ImportError(
+                    "RATE_LIMIT_BACKEND=redis requires the redis package"
+                ) from e
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def hit(self, key: str, limit: int, window_seconds: float, now: float) -> bool:
+        window = int(now // window_seconds)
+        elapsed = now / window_seconds - window
+        current_key = f"{self.prefix}:{key}:{window}"
+
+        pipe = self.client.pipeline()
+        pipe.get(f"{self.prefix}:{key}:{window - 1}")
+        pipe.incr(current_key)
+        pipe.pexpire(current_key, int(math.ceil(2 * window_seconds * 1000)))
+        previous, current, _ = pipe.execute()
+
+        # The increment is undone when over the limit, so rejections are not counted
+        if _estimate(current - 1, int(previous or 0), elapsed) + 1 > limit:
+            self.client.decr(current_key)
+            return False
+        return True
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class RateLimiter:
+    """Per-team, per-action request limits over a sliding window"""
+
+    def __init__(
+            self,
+            backend: BaseRateLimitBackend,
+            window_seconds: float = config.RATE_LIMIT_WINDOW_SECONDS,
+            limits: Optional[Dict[str, int]] = None
+    ):
+        self.backend = backend
+        self.window_seconds = window_seconds
+        self.limits = limits or {
+            "answer": config.RATE_LIMIT_ANSWER_REQUESTS,
+            "upload": config.RATE_LIMIT_UPLOAD_REQUESTS
+        }
+
+    def is_allowed(self, team_id: str, action: str = "answer") -> bool:
+        """Count a request by ``team_id`` and say whether it is within the limit
+
+        A backend failure lets the request through rather than failing it.
+        """
+        limit = self.limits[action]
+        if limit <= 0:
+            return True
+        try:
+            return self.backend.hit(f"{action}:{team_id}", limit, self.window_seconds, time.time())
+        except Exception as e:
+            logger.error(f"Error checking rate limit: {str(e)}", extra={"team_id": team_id})
+            return True
+
+    def close(self) -> None:
+        self.backend.close()
+
+
+def create_rate_limiter(backend: str = config.RATE_LIMIT_BACKEND) -> RateLimiter:
+    """Build the rate limiter on the configured backend"""
+    if backend == "memory":
+        return RateLimiter(MemoryRateLimitBackend())
+    if backend == "sqlite":
+        return RateLimiter(SQLiteRateLimitBackend())
+    if backend == "redis":
+        return RateLimiter(RedisRateLimitBackend())
+    raise ValueError(
+        f"Unknown rate limit backend '{backend}', expected 'memory', 'sqlite' or 'redis'"
+    )
+
+
+# Shared by the WSGI and ASGI apps
+rate_limiter = lazy_service(
+    "rate_limiter", create_rate_limiter,
+    close=lambda limiter: limiter.close()
+)
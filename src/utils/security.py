@@ -1,24 +1,60 @@
-import secrets
-import string
-from typing import Optional
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
 from jose import jwt, JWTError
 from datetime import datetime, timedelta
+from src.config import config
+from src.lifecycle import lazy_service
 import logging
 
 logger = logging.getLogger(__name__)
 
 
 class SecurityManager:
-    """Security utilities for the application"""
+    """Bearer token validation against a configured key set
 
-    def __init__(self, secret_key: Optional[str] = None):
-        """Initialize with optional secret key"""
-        self.secret_key = secret_key or self._generate_secret_key()
+    Keys come from ``JWT_SECRET_KEYS`` (``kid:secret`` pairs, the first one
+    signs) and from ``JWT_KEYS_FILE`` (a JSON object of kid to secret),
+    which is re-read when it changes so keys can be rotated without a
+    restart. Every key verifies, so tokens signed with a retiring key stay
+    valid until it is removed.
 
-    def _generate_secret_key(self, length: int = 32) -> str:
-        """Generate a secure secret key"""
-        alphabet = string.ascii_letters + string.digits + string.punctuation
-        return ''.join(secrets.choice(alphabet) for _ in range(length))
+    Validated tokens are cached with their claims until the earlier of the
+    cache TTL and the token's own expiry, so repeat requests skip signature
+    checks and JSON decoding. The cache is cleared whenever the key set
+    changes.
+    """
+
+    def __init__(
+            self,
+            secret_keys: str = config.JWT_SECRET_KEYS,
+            keys_file: Optional[str] = config.JWT_KEYS_FILE,
+            algorithm: str = config.JWT_ALGORITHM,
+            cache_size: int = config.AUTH_CACHE_SIZE,
+            cache_ttl: float = config.AUTH_CACHE_TTL_SECONDS,
+            keys_reload_seconds: float = config.JWT_KEYS_RELOAD_SECONDS
+    ):
+        """Initialize with the configured keys"""
+        self.algorithm = algorithm
+        self.keys_file = keys_file
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.keys_reload_seconds = keys_reload_seconds
+        self._static_keys = self._parse_keys(secret_keys)
+        self._keys: Dict[str, str] = dict(self._static_keys)
+        self._keys_mtime: Optional[float] = None
+        self._next_reload = 0.0
+        # token -> (claims, expires_at), least recently used first
+        self._cache: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "rejected": 0}
+
+        self._reload_keys(force=True)
+        if not self._keys:
+            logger.warning("No JWT keys configured; every authenticated request will be rejected")
 
     def create_jwt_token(
             self,
@@ -27,6 +63,10 @@ class SecurityManager:
     ) -> str:
         """Create JWT token for team authentication"""
         try:
+            self._reload_keys()
+            if not self._keys:
+                raise ValueError("No JWT signing key configured")
+            kid, key = next(iter(self._keys.items()))
             expire = datetime.utcnow() + expires_delta
             to_encode = {
                 "team_id": team_id,
@@ -34,8 +74,9 @@ class SecurityManager:
             }
             return jwt.encode(
                 to_encode,
-                self.secret_key,
-                algorithm="HS256"
+                key,
+                algorithm=self.algorithm,
+                headers={"kid": kid}
             )
         except Exception as e:
             logger.error(f"Error creating JWT token: {str(e)}")
@@ -43,22 +84,114 @@ class SecurityManager:
 
     def validate_jwt_token(self, token: str) -> Optional[str]:
         """Validate JWT token and return team_id"""
-        try:
-            payload = jwt.decode(
-                token,
-                self.secret_key,
-                algorithms=["HS256"]
-            )
-            return payload.get("team_id")
-        except JWTError as e:
-            logger.error(f"Error validating JWT token: {str(e)}")
+        claims = self.authenticate(token)
+        return claims.get("team_id") if claims else None
+
+    def authenticate(self, token: str) -> Optional[Dict[str, Any]]:
+        """Claims of a valid token, or None"""
+        now = time.time()
+        self._reload_keys(now)
+
+        with self._lock:
+            cached = self._cache.get(token)
+            if cached is not None:
+                if cached[1] > now:
+                    self._cache.move_to_end(token)
+                    self._stats["hits"] += 1
+                    return cached[0]
+                del self._cache[token]
+            self._stats["misses"] += 1
+
+        claims = self._decode(token)
+        if claims is None:
+            with self._lock:
+                self._stats["rejected"] += 1
             return None
 
+        # Never cache past the token's own expiry
+        expires_at = now + self.cache_ttl
+        if isinstance(claims.get("exp"), (int, float)):
+            expires_at = min(expires_at, claims["exp"])
+        with self._lock:
+            self._cache[token] = (claims, expires_at)
+            self._cache.move_to_end(token)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return claims
+
+    def stats(self) -> Dict[str, Any]:
+        """Token cache counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cache_entries"] = len(self._cache)
+        stats["keys"] = len(self._keys)
+        return stats
+
     def sanitize_input(self, input_str: str) -> str:
         """Sanitize user input"""
         # Add your sanitization rules here
         return input_str.strip()
 
+    def _decode(self, token: str) -> Optional[Dict[str, Any]]:
+        """Verify the signature and expiry; the key is picked by ``kid``"""
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+        except JWTError as e:
+            logger.warning(f"Rejected malformed JWT token: {str(e)}")
+            return None
+
+        keys = self._keys
+        candidates = [keys[kid]] if kid in keys else list(keys.values())
+        error = None
+        for key in candidates:
+            try:
+                return jwt.decode(token, key, algorithms=[self.algorithm])
+            except JWTError as e:
+                error = e
+        if error is not None:
+            logger.warning(f"Rejected JWT token: {str(error)}")
+        return None
+
+    def _reload_keys(self, now: Optional[float] = None, force: bool = False) -> None:
+        """Pick up changes to the keys file, checking at most every few seconds"""
+        if not self.keys_file:
+            return
+        now = time.time() if now is None else now
+        if not force and now < self._next_reload:
+            return
+        self._next_reload = now + self.keys_reload_seconds
+
+        try:
+            mtime = os.path.getmtime(self.keys_file)
+            if mtime == self._keys_mtime:
+                return
+            with open(self.keys_file) as fp:
+                file_keys = json.load(fp)
+        except Exception as e:
+            logger.error(f"Error loading JWT keys file: {str(e)}")
+            return
+
+        keys = dict(self._static_keys)
+        keys.update({str(kid): str(secret) for kid, secret in file_keys.items()})
+        with self._lock:
+            self._keys = keys
+            self._keys_mtime = mtime
+            # Tokens signed with a removed key must not outlive it in the cache
+            self._cache.clear()
+        logger.info(f"Loaded {len(keys)} JWT keys")
+
+    @staticmethod
+    def _parse_keys(secret_keys: str) -> Dict[str, str]:
+        """``kid:secret,kid:secret``; a secret without a kid gets ``default``"""
+        keys: Dict[str, str] = {}
+        for entry in filter(None, (item.strip() for item in (secret_keys or "").split(","))):
+            kid, sep, secret = entry.partition(":")
+            if sep:
+                keys[kid] = secret
+            else:
+                keys["default"] = entry
+        return keys
+
 
 # Initialize global security manager
-security_manager = SecurityManager()
\ No newline at end of file
+security_manager = lazy_service("security_manager", SecurityManager)
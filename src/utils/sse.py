@@ -0,0 +1,13 @@
+import json
+from typing import Any, Dict, Iterable, Iterator, Tuple
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Format a single server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream_sse(events: Iterable[Tuple[str, Dict[str, Any]]]) -> Iterator[str]:
+    """Format (event, data) pairs as a server-sent event stream"""
+    for event, data in events:
+        yield format_sse(event, data)
@@ -1,92 +1,992 @@
 # src/vector_store.py
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.http.models import NamedVector
 from qdrant_client.models import PointStruct, Distance, VectorParams, models
-from typing import List, Optional
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
 from src.config import config
+from src.lifecycle import lazy_service
+from src.hybrid import sparse_encoder
+import asyncio
 import logging
+import re
+import time
+import uuid
 
 logger = logging.getLogger(__name__)
 
+VECTOR_NAME = "custom_vector"
+SPARSE_VECTOR_NAME = "bm25"
 
-class VectorStore:
-    """Secure vector storage management with team isolation"""
+# Registry point ids are derived from (team_id, document_id)
+_REGISTRY_NAMESPACE = uuid.UUID("b7d3a0a6-5f0e-4d8e-9a51-1c2f6e0d4b93")
+# Registry point that holds writes while migrate() switches collections
+_MIGRATION_LOCK_ID = str(uuid.uuid5(_REGISTRY_NAMESPACE, "migration-lock"))
 
-    def __init__(self):
+
+def _missing_shard_key(error: Exception) -> bool:
+    """Whether Qdrant rejected a request for a shard key that was never created"""
+    message = str(error).lower()
+    return "shard key" in message and ("not found" in message or "does not exist" in message)
+
+
+def _missing_collection(error: Exception) -> bool:
+    """Whether Qdrant rejected a request for a collection that does not exist"""
+    message = str(error).lower()
+    return "collection" in message and (
+        "not found" in message or "doesn't exist" in message or "does not exist" in message
+    )
+
+
+class BaseVectorStore(ABC):
+    """Interface shared by the vector store backends
+
+    Every operation is scoped to a team. Search results expose ``id``,
+    ``score`` and ``payload`` like Qdrant's ``ScoredPoint``.
+    """
+
+    embedding_dim = 384  # Dimension for all-MiniLM-L6-v2
+
+    @abstractmethod
+    def setup_collection(self) -> bool:
+        """Prepare backend storage"""
+
+    @abstractmethod
+    def search_vectors(
+            self,
+            team_id: str,
+            query_vector: List[float],
+            limit: int = 10,
+            query_text: Optional[str] = None,
+            with_vectors: bool = False
+    ) -> List[Any]:
+        """Search vectors within team's authorization scope
+
+        With ``query_text`` and RETRIEVAL_MODE=hybrid, backends that store
+        sparse vectors fuse dense and BM25 results. ``with_vectors`` returns
+        each hit's dense vector under VECTOR_NAME.
+        """
+
+    @abstractmethod
+    def upsert_points(self, points: List[PointStruct]) -> bool:
+        """Insert or update points"""
+
+    @abstractmethod
+    def delete_points(self, team_id: str, point_ids: List[str]) -> None:
+        """Delete points by id within a team's scope"""
+
+    @abstractmethod
+    def health_check(self) -> None:
+        """Raise if the backend is unavailable"""
+
+    def delete_document(self, team_id: str, document_id: str) -> int:
+        """Delete a document's vectors and return how many were removed"""
+        raise NotImplementedError(f"{type(self).__name__} does not support deleting documents")
+
+    def get_team_documents(self, team_id: str) -> List[Dict[str, Any]]:
+        """List the documents stored for a team"""
+        raise NotImplementedError(f"{type(self).__name__} does not support listing documents")
+
+    def supports_sparse(self) -> bool:
+        """Whether upserted points may carry a SPARSE_VECTOR_NAME vector"""
+        return False
+
+    def register_document(
+            self,
+            team_id: str,
+            document_id: str,
+            doc_name: str,
+            page_count: int,
+            chunk_count: int
+    ) -> None:
+        """Record a document in the team's registry after ingestion"""
+
+    def rebuild_document_registry(self, batch_size: int = 1024) -> int:
+        """Rebuild the document registry from stored points"""
+        raise NotImplementedError(f"{type(self).__name__} has no document registry")
+
+    async def asearch_vectors(
+            self,
+            team_id: str,
+            query_vector: List[float],
+            limit: int = 10,
+            query_text: Optional[str] = None,
+            with_vectors: bool = False
+    ) -> List[Any]:
+        """Search without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, self.search_vectors, team_id, query_vector, limit, query_text, with_vectors
+        )
+
+    async def ahealth_check(self) -> None:
+        """Health check without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.health_check)
+
+    async def aclose(self) -> None:
+        """Release async resources"""
+
+
+class QdrantVectorStore(BaseVectorStore):
+    """Secure vector storage management with team isolation
+
+    Two collection layouts are supported:
+
+    - ``shared``: all teams in one collection with a tenant-optimized
+      ``team_id`` payload index and per-tenant HNSW graphs (``payload_m``)
+      instead of a global graph, so search cost follows the team's size.
+    - ``shard_key``: custom sharding with one shard key per team, so each
+      search only touches the team's own shard.
+
+    Storage profiles trade RAM for disk reads:
+
+    - ``memory``: float32 vectors and payload in RAM.
+    - ``on_disk``: original vectors and payload (including chunk text) on disk.
+    - ``scalar``: as ``on_disk``, plus int8 scalar-quantized vectors in RAM
+      (4x smaller); candidates are rescored with the original vectors.
+    - ``product``: as ``scalar`` but with x16 product quantization.
+    """
+
+    LAYOUTS = ("shared", "shard_key")
+    STORAGE_PROFILES = ("memory", "on_disk", "scalar", "product")
+
+    # Bump when the collection config changes; see migrate()
+    # v2: BM25 sparse vectors for hybrid retrieval
+    SCHEMA_VERSION = 2
+
+    # While migrate() holds writes: how long writers wait before failing, how
+    # long a lock left by a crashed migration is honoured, how long a writer
+    # trusts its last look at the lock, and how long migrate() waits for
+    # writes that passed the check before it was taken (longer than the last)
+    MIGRATION_WAIT_SECONDS = 60
+    MIGRATION_LOCK_TTL_SECONDS = 600
+    MIGRATION_CHECK_SECONDS = 1
+    MIGRATION_GRACE_SECONDS = 3
+
+    def __init__(
+            self,
+            layout: str = config.QDRANT_LAYOUT,
+            storage_profile: str = config.QDRANT_STORAGE_PROFILE
+    ):
+        if layout not in self.LAYOUTS:
+            raise ValueError(f"Unknown Qdrant layout '{layout}', expected one of {self.LAYOUTS}")
+        if storage_profile not in self.STORAGE_PROFILES:
+            raise ValueError(f"Unknown storage profile '{storage_profile}', "
+                             f"expected one of {self.STORAGE_PROFILES}")
         self.client = QdrantClient(
             host=config.QDRANT_HOST,
             port=config.QDRANT_PORT,
             api_key=config.QDRANT_API_KEY,
             https=config.QDRANT_HTTPS
         )
-        self.collection_name = "pdf_embeddings"
-        self.embedding_dim = 384  # Dimension for all-MiniLM-L6-v2
+        self.async_client = AsyncQdrantClient(
+            host=config.QDRANT_HOST,
+            port=config.QDRANT_PORT,
+            api_key=config.QDRANT_API_KEY,
+            https=config.QDRANT_HTTPS
+        )
+        self.collection_name = config.QDRANT_COLLECTION_NAME
+        # One small point per document, so listing never touches chunk points
+        self.registry_name = f"{self.collection_name}_documents"
+        self.layout = layout
+        self.storage_profile = storage_profile
+        self._shard_keys = set()
+        self._sparse_enabled: Optional[bool] = None
+        # Monotonic time until which writes skip the migration lock check
+        self._unlocked_until = 0.0
 
     def setup_collection(self) -> bool:
-        """Create or recreate the vector collection"""
+        """Create the collection if needed, keeping any existing data
+
+        The configured collection name is an alias for a physical
+        collection named ``<name>_v<schema version>``. An existing
+        collection is kept when its vector config matches; a stale schema
+        version is reported so it can be migrated with ``migrate``.
+        """
         try:
-            # Remove existing collection if it exists
-            collections = self.client.get_collections().collections
-            if any(collection.name == self.collection_name for collection in collections):
-                self.client.delete_collection(self.collection_name)
-                logger.info(f"Deleted existing collection '{self.collection_name}'")
+            self._setup_registry()
+            self._sparse_enabled = None
+            physical, is_alias = self._resolve_collection()
 
-            # Create new collection
-            self.client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config={
-                    "custom_vector": VectorParams(
-                        size=self.embedding_dim,
-                        distance=Distance.COSINE
+            if physical is None:
+                physical = self._physical_name(self.SCHEMA_VERSION)
+                self._create_collection(physical, self.layout)
+                self.client.update_collection_aliases(change_aliases_operations=[
+                    models.CreateAliasOperation(create_alias=models.CreateAlias(
+                        collection_name=physical, alias_name=self.collection_name
+                    ))
+                ])
+                logger.info(f"Created alias '{self.collection_name}' -> '{physical}'")
+                return True
+
+            if not self._schema_matches(physical):
+                raise RuntimeError(
+                    f"Collection '{physical}' does not match the expected vector schema; "
+                    f"run 'python -m src.manage migrate' to rebuild it without re-embedding"
+                )
+
+            self.layout = self._detect_layout(physical)
+            self.ensure_payload_indexes(physical)
+
+            version = self._schema_version(physical) if is_alias else 0
+            if version < self.SCHEMA_VERSION:
+                logger.warning(
+                    f"Collection '{physical}' is at schema version {version}, expected "
+                    f"{self.SCHEMA_VERSION}; run 'python -m src.manage migrate'"
+                )
+            else:
+                logger.info(f"Using existing collection '{physical}' "
+                            f"(schema v{version}, '{self.layout}' layout)")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error setting up collection: {str(e)}")
+            raise
+
+    def _setup_registry(self) -> None:
+        if self.client.collection_exists(self.registry_name):
+            return
+        self.client.create_collection(collection_name=self.registry_name, vectors_config={})
+        self.client.create_payload_index(
+            collection_name=self.registry_name,
+            field_name="team_id",
+            field_schema=models.KeywordIndexParams(
+                type=models.KeywordIndexType.KEYWORD,
+                is_tenant=True
+            ),
+            wait=True
+        )
+        logger.info(f"Created document registry '{self.registry_name}'")
+
+    def _physical_name(self, version: int, suffix: Optional[str] = None) -> str:
+        name = f"{self.collection_name}_v{version}"
+        return f"{name}_{suffix}" if suffix else name
+
+    def _schema_version(self, physical: str) -> int:
+        match = re.search(r"_v(\d+)(?:_\d+)?$", physical)
+        return int(match.group(1)) if match else 0
+
+    def _resolve_collection(self) -> Tuple[Optional[str], bool]:
+        """Physical collection behind the configured name, and whether it is an alias"""
+        for alias in self.client.get_aliases().aliases:
+            if alias.alias_name == self.collection_name:
+                return alias.collection_name, True
+        if self.client.collection_exists(self.collection_name):
+            # Created before schema versioning; migrate moves it behind an alias
+            return self.collection_name, False
+        return None, False
+
+    def _schema_matches(self, physical: str) -> bool:
+        """Whether a collection's vector config matches what the service writes"""
+        vectors = self.client.get_collection(physical).config.params.vectors
+        params = vectors.get(VECTOR_NAME) if isinstance(vectors, dict) else None
+        return (params is not None
+                and params.size == self.embedding_dim
+                and params.distance == Distance.COSINE)
+
+    def _detect_layout(self, physical: str) -> str:
+        params = self.client.get_collection(physical).config.params
+        if params.sharding_method == models.ShardingMethod.CUSTOM:
+            return "shard_key"
+        return "shared"
+
+    def migrate(self, layout: Optional[str] = None, batch_size: int = 256) -> str:
+        """Rebuild the collection at the current schema version without downtime
+
+        Points are copied with their stored vectors (nothing is
+        re-embedded) into a new physical collection while the service keeps
+        writing to the old one. A sync pass then carries over points
+        inserted, changed or deleted during the copy. Writes are held for
+        a final sync, the counts are checked, and only then is the alias
+        switched atomically. An old versioned collection is kept for
+        rollback; a pre-versioning one is dropped just before its name
+        becomes the alias. Returns the new physical collection name.
+        """
+        try:
+            source, is_alias = self._resolve_collection()
+            if source is None:
+                raise RuntimeError(f"Collection '{self.collection_name}' does not exist")
+
+            layout = layout or self._detect_layout(source)
+            target = self._physical_name(self.SCHEMA_VERSION, str(int(time.time())))
+            self._create_collection(target, layout)
+
+            copied = self._copy_points(source, target, layout, batch_size)
+            # Most of what changed during the copy, while writes continue
+            copied += self._sync_points(source, target, layout, batch_size)
+
+            self._lock_writes()
+            try:
+                time.sleep(self.MIGRATION_GRACE_SECONDS)
+                copied += self._sync_points(source, target, layout, batch_size)
+
+                expected = self.client.count(collection_name=source, exact=True).count
+                actual = self.client.count(collection_name=target, exact=True).count
+                if actual != expected:
+                    raise RuntimeError(f"'{target}' has {actual} points after the final sync, "
+                                       f"expected {expected}; the alias was not switched")
+
+                if is_alias:
+                    self.client.update_collection_aliases(change_aliases_operations=[
+                        models.DeleteAliasOperation(delete_alias=models.DeleteAlias(
+                            alias_name=self.collection_name
+                        )),
+                        models.CreateAliasOperation(create_alias=models.CreateAlias(
+                            collection_name=target, alias_name=self.collection_name
+                        ))
+                    ])
+                else:
+                    # An alias cannot shadow a real collection, so a pre-versioning
+                    # collection is dropped right before its name becomes an alias
+                    self.client.delete_collection(source)
+                    self.client.update_collection_aliases(change_aliases_operations=[
+                        models.CreateAliasOperation(create_alias=models.CreateAlias(
+                            collection_name=target, alias_name=self.collection_name
+                        ))
+                    ])
+            finally:
+                self._unlock_writes()
+
+            self.layout = layout
+            self._sparse_enabled = None
+            logger.info(f"Migrated {copied} points from '{source}' to '{target}'; "
+                        f"'{self.collection_name}' now points to '{target}'")
+            return target
+
+        except Exception as e:
+            logger.error(f"Error migrating collection: {str(e)}")
+            raise
+
+    def _copy_points(self, source: str, target: str, layout: str, batch_size: int) -> int:
+        """Scroll ``source`` and upsert its points into ``target``"""
+        copied = 0
+        offset = None
+        while True:
+            records, offset = self.client.scroll(
+                collection_name=source,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True
+            )
+            if records:
+                self._upsert(target, layout, [
+                    PointStruct(id=record.id, vector=self._with_sparse(record), payload=record.payload)
+                    for record in records
+                ])
+                copied += len(records)
+                logger.info(f"Copied {copied} points to '{target}'")
+            if offset is None:
+                return copied
+
+    def _sync_points(self, source: str, target: str, layout: str, batch_size: int) -> int:
+        """Make ``target`` match ``source``; returns the points copied or deleted
+
+        Point ids derive from the chunk text, so a point whose payload is
+        unchanged has the same vectors; only new or changed points are
+        re-read with their vectors.
+        """
+        changed = 0
+        offset = None
+        while True:
+            records, offset = self.client.scroll(
+                collection_name=source,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=False
+            )
+            if records:
+                present = {
+                    point.id: point.payload for point in self.client.retrieve(
+                        collection_name=target,
+                        ids=[record.id for record in records],
+                        with_payload=True,
+                        with_vectors=False
                     )
                 }
+                stale = [record.id for record in records if present.get(record.id) != record.payload]
+                if stale:
+                    self._upsert(target, layout, [
+                        PointStruct(id=record.id, vector=self._with_sparse(record),
+                                    payload=record.payload)
+                        for record in self.client.retrieve(
+                            collection_name=source, ids=stale,
+                            with_payload=True, with_vectors=True
+                        )
+                    ])
+                    changed += len(stale)
+            if offset is None:
+                break
+
+        # Replay deletes: drop target points that are gone from the source
+        offset = None
+        while True:
+            records, offset = self.client.scroll(
+                collection_name=target,
+                limit=batch_size,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False
             )
-            logger.info(f"Created collection '{self.collection_name}'")
-            return True
+            if records:
+                kept = {
+                    point.id for point in self.client.retrieve(
+                        collection_name=source,
+                        ids=[record.id for record in records],
+                        with_payload=False,
+                        with_vectors=False
+                    )
+                }
+                deleted = [record.id for record in records if record.id not in kept]
+                if deleted:
+                    self.client.delete(
+                        collection_name=target,
+                        points_selector=models.PointIdsList(points=deleted)
+                    )
+                    changed += len(deleted)
+            if offset is None:
+                break
+
+        if changed:
+            logger.info(f"Synced {changed} changed points to '{target}'")
+        return changed
+
+    def _lock_writes(self) -> None:
+        """Hold the service's writes until _unlock_writes"""
+        self.client.upsert(
+            collection_name=self.registry_name,
+            points=[PointStruct(id=_MIGRATION_LOCK_ID, vector={},
+                                payload={"locked_at": time.time()})]
+        )
 
+    def _unlock_writes(self) -> None:
+        self.client.delete(
+            collection_name=self.registry_name,
+            points_selector=models.PointIdsList(points=[_MIGRATION_LOCK_ID])
+        )
+
+    def _wait_for_migration(self) -> None:
+        """Block a write while migrate() is switching collections
+
+        An unlocked result is trusted for ``MIGRATION_CHECK_SECONDS``, so
+        batches of writes cost one registry lookup per interval.
+        """
+        if time.monotonic() < self._unlocked_until:
+            return
+        deadline = time.monotonic() + self.MIGRATION_WAIT_SECONDS
+        while True:
+            checked_at = time.monotonic()
+            if not self._writes_locked():
+                self._unlocked_until = checked_at + self.MIGRATION_CHECK_SECONDS
+                return
+            if time.monotonic() > deadline:
+                raise RuntimeError("Timed out waiting for a collection migration to finish")
+            time.sleep(0.25)
+
+    def _writes_locked(self) -> bool:
+        try:
+            lock = self.client.retrieve(
+                collection_name=self.registry_name,
+                ids=[_MIGRATION_LOCK_ID],
+                with_payload=True
+            )
         except Exception as e:
-            logger.error(f"Error setting up collection: {str(e)}")
+            # No registry yet (setup_collection not run), so no migration either
+            if _missing_collection(e):
+                return False
             raise
+        return bool(lock) and time.time() - lock[0].payload["locked_at"] <= self.MIGRATION_LOCK_TTL_SECONDS
+
+    def _with_sparse(self, record: models.Record) -> Dict[str, Any]:
+        """A record's vectors, adding the sparse vector if it predates them"""
+        vectors = dict(record.vector)
+        if SPARSE_VECTOR_NAME not in vectors:
+            vectors[SPARSE_VECTOR_NAME] = sparse_encoder.encode_document(
+                record.payload.get("text", "")
+            )
+        return vectors
+
+    def _create_collection(self, collection_name: str, layout: str) -> None:
+        """Create a collection and its payload indexes for a layout"""
+        if layout == "shard_key":
+            self.client.create_collection(
+                collection_name=collection_name,
+                vectors_config=self._vectors_config(),
+                sparse_vectors_config=self._sparse_vectors_config(),
+                sharding_method=models.ShardingMethod.CUSTOM,
+                on_disk_payload=self.storage_profile != "memory",
+                quantization_config=self._quantization_config(self.storage_profile)
+            )
+        else:
+            self.client.create_collection(
+                collection_name=collection_name,
+                vectors_config=self._vectors_config(),
+                sparse_vectors_config=self._sparse_vectors_config(),
+                # Build HNSW graphs per team instead of one global graph
+                hnsw_config=models.HnswConfigDiff(
+                    m=0,
+                    payload_m=config.QDRANT_PAYLOAD_M
+                ),
+                on_disk_payload=self.storage_profile != "memory",
+                quantization_config=self._quantization_config(self.storage_profile)
+            )
+        self.ensure_payload_indexes(collection_name)
+        logger.info(f"Created collection '{collection_name}' with '{layout}' layout "
+                    f"and '{self.storage_profile}' storage")
+
+    def _vectors_config(self) -> Dict[str, VectorParams]:
+        return {
+            VECTOR_NAME: VectorParams(
+                size=self.embedding_dim,
+                distance=Distance.COSINE,
+                on_disk=self.storage_profile != "memory"
+            )
+        }
+
+    def _sparse_vectors_config(self) -> Dict[str, models.SparseVectorParams]:
+        # Qdrant applies the corpus IDF at query time; points store BM25 term weights
+        return {
+            SPARSE_VECTOR_NAME: models.SparseVectorParams(
+                index=models.SparseIndexParams(on_disk=self.storage_profile != "memory"),
+                modifier=models.Modifier.IDF
+            )
+        }
+
+    def supports_sparse(self) -> bool:
+        """Whether the live collection has the BM25 sparse vector (schema v2+)"""
+        if self._sparse_enabled is None:
+            physical = self._resolve_collection()[0]
+            sparse = (self.client.get_collection(physical).config.params.sparse_vectors
+                      if physical else None)
+            self._sparse_enabled = bool(sparse and SPARSE_VECTOR_NAME in sparse)
+        return self._sparse_enabled
+
+    def _quantization_config(self, profile: str) -> Optional[models.QuantizationConfig]:
+        """Compressed in-RAM copy of the vectors for a storage profile"""
+        if profile == "scalar":
+            return models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=0.99,
+                always_ram=True
+            ))
+        if profile == "product":
+            return models.ProductQuantization(product=models.ProductQuantizationConfig(
+                compression=models.CompressionRatio.X16,
+                always_ram=True
+            ))
+        return None
+
+    def _search_params(self) -> Optional[models.SearchParams]:
+        """Rescore quantized candidates with the original vectors"""
+        if self._quantization_config(self.storage_profile) is None:
+            return None
+        return models.SearchParams(quantization=models.QuantizationSearchParams(
+            rescore=True,
+            oversampling=config.QDRANT_QUANTIZATION_OVERSAMPLING
+        ))
+
+    def apply_storage_profile(self, profile: Optional[str] = None) -> None:
+        """Switch an existing collection to a storage profile in place
+
+        Qdrant moves vectors and payload to or from disk and builds or
+        drops the quantized copy in the background while serving.
+        """
+        profile = profile or self.storage_profile
+        if profile not in self.STORAGE_PROFILES:
+            raise ValueError(f"Unknown storage profile '{profile}', "
+                             f"expected one of {self.STORAGE_PROFILES}")
+        try:
+            physical = self._resolve_collection()[0]
+            on_disk = profile != "memory"
+            self.client.update_collection(
+                collection_name=physical,
+                vectors_config={VECTOR_NAME: models.VectorParamsDiff(on_disk=on_disk)},
+                collection_params=models.CollectionParamsDiff(on_disk_payload=on_disk),
+                quantization_config=self._quantization_config(profile) or models.Disabled.DISABLED
+            )
+            self.storage_profile = profile
+            logger.info(f"Applied '{profile}' storage profile to '{physical}'")
+
+        except Exception as e:
+            logger.error(f"Error applying storage profile: {str(e)}")
+            raise
+
+    def ensure_payload_indexes(self, collection_name: Optional[str] = None) -> None:
+        """Create keyword indexes on team_id (tenant) and document_id
+
+        Safe to run against an existing collection; Qdrant treats
+        re-creating an identical index as a no-op.
+        """
+        collection_name = collection_name or self._resolve_collection()[0]
+        self.client.create_payload_index(
+            collection_name=collection_name,
+            field_name="team_id",
+            field_schema=models.KeywordIndexParams(
+                type=models.KeywordIndexType.KEYWORD,
+                is_tenant=True
+            ),
+            wait=True
+        )
+        self.client.create_payload_index(
+            collection_name=collection_name,
+            field_name="document_id",
+            field_schema=models.KeywordIndexParams(type=models.KeywordIndexType.KEYWORD),
+            wait=True
+        )
+
+    def apply_tenant_config(self) -> None:
+        """Bring an existing shared-layout collection up to date in place
+
+        Adds the payload indexes and switches HNSW to per-team graphs;
+        Qdrant rebuilds the index in the background while serving.
+        """
+        physical = self._resolve_collection()[0]
+        self.ensure_payload_indexes(physical)
+        if self.layout == "shared":
+            self.client.update_collection(
+                collection_name=physical,
+                hnsw_config=models.HnswConfigDiff(m=0, payload_m=config.QDRANT_PAYLOAD_M)
+            )
+        logger.info(f"Applied tenant configuration to '{physical}'")
 
     def search_vectors(
             self,
             team_id: str,
             query_vector: List[float],
-            limit: int = 10
-    ) -> List[PointStruct]:
+            limit: int = 10,
+            query_text: Optional[str] = None,
+            with_vectors: bool = False
+    ) -> List[models.ScoredPoint]:
         """Search vectors within team's authorization scope"""
         try:
-            team_filter = models.Filter(
-                must=[
-                    models.FieldCondition(
-                        key="team_id",
-                        match=models.MatchValue(value=team_id)
-                    )
-                ]
-            )
+            prefetch = self._hybrid_prefetch(team_id, query_vector, query_text)
+            if prefetch:
+                return self.client.query_points(
+                    collection_name=self.collection_name,
+                    prefetch=prefetch,
+                    query=models.FusionQuery(fusion=models.Fusion.RRF),
+                    limit=limit,
+                    with_vectors=[VECTOR_NAME] if with_vectors else False,
+                    shard_key_selector=self._shard_key(team_id)
+                ).points
 
             # Use NamedVector for the query
             return self.client.search(
                 collection_name=self.collection_name,
                 query_vector=NamedVector(
-                    name="custom_vector",
+                    name=VECTOR_NAME,
                     vector=query_vector
                 ),
-                query_filter=team_filter,
-                limit=limit
+                query_filter=self._team_filter(team_id),
+                limit=limit,
+                search_params=self._search_params(),
+                with_vectors=[VECTOR_NAME] if with_vectors else False,
+                shard_key_selector=self._shard_key(team_id)
             )
 
         except Exception as e:
+            if self.layout == "shard_key" and _missing_shard_key(e):
+                # The team has never uploaded, so its shard key does not exist yet
+                return []
             logger.error(f"Error searching vectors: {str(e)}")
             raise
 
-    def upsert_points(self, points: List[PointStruct]) -> bool:
-        """Insert or update points in the Qdrant collection"""
+    async def asearch_vectors(
+            self,
+            team_id: str,
+            query_vector: List[float],
+            limit: int = 10,
+            query_text: Optional[str] = None,
+            with_vectors: bool = False
+    ) -> List[models.ScoredPoint]:
+        """Search vectors within team's authorization scope without blocking"""
         try:
-            response = self.client.upsert(
+            prefetch = self._hybrid_prefetch(team_id, query_vector, query_text)
+            if prefetch:
+                response = await self.async_client.query_points(
+                    collection_name=self.collection_name,
+                    prefetch=prefetch,
+                    query=models.FusionQuery(fusion=models.Fusion.RRF),
+                    limit=limit,
+                    with_vectors=[VECTOR_NAME] if with_vectors else False,
+                    shard_key_selector=self._shard_key(team_id)
+                )
+                return response.points
+
+            return await self.async_client.search(
                 collection_name=self.collection_name,
-                points=points
+                query_vector=NamedVector(
+                    name=VECTOR_NAME,
+                    vector=query_vector
+                ),
+                query_filter=self._team_filter(team_id),
+                limit=limit,
+                search_params=self._search_params(),
+                with_vectors=[VECTOR_NAME] if with_vectors else False,
+                shard_key_selector=self._shard_key(team_id)
+            )
+
+        except Exception as e:
+            if self.layout == "shard_key" and _missing_shard_key(e):
+                # The team has never uploaded, so its shard key does not exist yet
+                return []
+            logger.error(f"Error searching vectors: {str(e)}")
+            raise
+
+    def _hybrid_prefetch(
+            self,
+            team_id: str,
+            query_vector: List[float],
+            query_text: Optional[str]
+    ) -> Optional[List[models.Prefetch]]:
+        """Dense and sparse candidate searches for RRF, or None for dense only"""
+        if not query_text or config.RETRIEVAL_MODE != "hybrid" or not self.supports_sparse():
+            return None
+        sparse_query = sparse_encoder.encode_query(query_text)
+        if not sparse_query.indices:
+            return None
+
+        team_filter = self._team_filter(team_id)
+        return [
+            models.Prefetch(
+                query=query_vector,
+                using=VECTOR_NAME,
+                filter=team_filter,
+                params=self._search_params(),
+                limit=config.HYBRID_PREFETCH_LIMIT
+            ),
+            models.Prefetch(
+                query=sparse_query,
+                using=SPARSE_VECTOR_NAME,
+                filter=team_filter,
+                limit=config.HYBRID_PREFETCH_LIMIT
+            )
+        ]
+
+    def health_check(self) -> None:
+        """Raise if Qdrant is unreachable"""
+        self.client.get_collections()
+
+    async def ahealth_check(self) -> None:
+        """Raise if Qdrant is unreachable"""
+        await self.async_client.get_collections()
+
+    async def aclose(self) -> None:
+        """Close the async client"""
+        await self.async_client.close()
+
+    def delete_document(self, team_id: str, document_id: str) -> int:
+        """Delete a document's vectors and return how many were removed
+
+        Counting and deleting both run on the payload indexes; no points
+        are loaded.
+        """
+        try:
+            document_filter = self._team_filter(team_id)
+            document_filter.must.append(models.FieldCondition(
+                key="document_id",
+                match=models.MatchValue(value=document_id)
+            ))
+            shard_key = self._shard_key(team_id)
+            self._wait_for_migration()
+
+            try:
+                deleted = self.client.count(
+                    collection_name=self.collection_name,
+                    count_filter=document_filter,
+                    exact=True,
+                    shard_key_selector=shard_key
+                ).count
+            except Exception as e:
+                if shard_key is None or not _missing_shard_key(e):
+                    raise
+                deleted = 0
+            if deleted:
+                self.client.delete(
+                    collection_name=self.collection_name,
+                    points_selector=models.FilterSelector(filter=document_filter),
+                    shard_key_selector=shard_key
+                )
+            self.client.delete(
+                collection_name=self.registry_name,
+                points_selector=models.PointIdsList(
+                    points=[self._registry_id(team_id, document_id)]
+                )
             )
+
+            logger.info(f"Deleted {deleted} points for document '{document_id}'",
+                        extra={"team_id": team_id})
+            return deleted
+
+        except Exception as e:
+            logger.error(f"Error deleting document: {str(e)}")
+            raise
+
+    def get_team_documents(self, team_id: str) -> List[Dict[str, Any]]:
+        """List the documents stored for a team from the registry"""
+        try:
+            documents = []
+            offset = None
+            while True:
+                records, offset = self.client.scroll(
+                    collection_name=self.registry_name,
+                    scroll_filter=self._team_filter(team_id),
+                    limit=256,
+                    offset=offset,
+                    with_payload=models.PayloadSelectorExclude(exclude=["team_id"]),
+                    with_vectors=False
+                )
+                documents.extend(record.payload for record in records)
+                if offset is None:
+                    break
+            return sorted(documents, key=lambda doc: doc["document_id"])
+
+        except Exception as e:
+            logger.error(f"Error listing documents: {str(e)}")
+            raise
+
+    def register_document(
+            self,
+            team_id: str,
+            document_id: str,
+            doc_name: str,
+            page_count: int,
+            chunk_count: int
+    ) -> None:
+        """Record a document in the team's registry after ingestion"""
+        try:
+            registry_id = self._registry_id(team_id, document_id)
+            existing = self.client.retrieve(
+                collection_name=self.registry_name,
+                ids=[registry_id],
+                with_payload=["uploaded_at"]
+            )
+            now = time.time()
+            self.client.upsert(
+                collection_name=self.registry_name,
+                points=[PointStruct(id=registry_id, vector={}, payload={
+                    "team_id": team_id,
+                    "document_id": document_id,
+                    "doc_name": doc_name,
+                    "page_count": page_count,
+                    "chunk_count": chunk_count,
+                    "uploaded_at": existing[0].payload["uploaded_at"] if existing else now,
+                    "updated_at": now
+                })]
+            )
+
+        except Exception as e:
+            logger.error(f"Error registering document: {str(e)}")
+            raise
+
+    def rebuild_document_registry(self, batch_size: int = 1024) -> int:
+        """Rebuild the registry with a payload-only scroll of all points
+
+        For collections that predate the registry. Upload times are
+        unknown for rebuilt entries and are set to the rebuild time.
+        Returns the number of documents registered.
+        """
+        try:
+            self._setup_registry()
+            documents: Dict[Tuple[str, str], Dict[str, Any]] = {}
+            offset = None
+            while True:
+                records, offset = self.client.scroll(
+                    collection_name=self.collection_name,
+                    limit=batch_size,
+                    offset=offset,
+                    with_payload=["team_id", "document_id", "doc_name", "page_number"],
+                    with_vectors=False
+                )
+                for record in records:
+                    payload = record.payload
+                    doc = documents.setdefault(
+                        (payload["team_id"], payload["document_id"]),
+                        {"doc_name": payload.get("doc_name"), "page_count": 0, "chunk_count": 0}
+                    )
+                    doc["page_count"] = max(doc["page_count"], payload.get("page_number", 0))
+                    doc["chunk_count"] += 1
+                if offset is None:
+                    break
+
+            now = time.time()
+            points = [
+                PointStruct(id=self._registry_id(team_id, document_id), vector={}, payload={
+                    "team_id": team_id,
+                    "document_id": document_id,
+                    **doc,
+                    "uploaded_at": now,
+                    "updated_at": now
+                })
+                for (team_id, document_id), doc in documents.items()
+            ]
+            for i in range(0, len(points), batch_size):
+                self.client.upsert(collection_name=self.registry_name,
+                                   points=points[i:i + batch_size])
+
+            # Drop entries for documents that no longer have points
+            keep = {str(point.id) for point in points} | {_MIGRATION_LOCK_ID}
+            offset = None
+            while True:
+                records, offset = self.client.scroll(
+                    collection_name=self.registry_name,
+                    limit=batch_size,
+                    offset=offset,
+                    with_payload=False,
+                    with_vectors=False
+                )
+                stale = [record.id for record in records if str(record.id) not in keep]
+                if stale:
+                    self.client.delete(
+                        collection_name=self.registry_name,
+                        points_selector=models.PointIdsList(points=stale)
+                    )
+                if offset is None:
+                    break
+
+            logger.info(f"Rebuilt document registry with {len(points)} documents")
+            return len(points)
+
+        except Exception as e:
+            logger.error(f"Error rebuilding document registry: {str(e)}")
+            raise
+
+    def _registry_id(self, team_id: str, document_id: str) -> str:
+        return str(uuid.uuid5(_REGISTRY_NAMESPACE, f"{team_id}/{document_id}"))
+
+    def _team_filter(self, team_id: str) -> models.Filter:
+        """Filter restricting results to a team's points"""
+        return models.Filter(
+            must=[
+                models.FieldCondition(
+                    key="team_id",
+                    match=models.MatchValue(value=team_id)
+                )
+            ]
+        )
+
+    def _shard_key(self, team_id: str) -> Optional[str]:
+        """Shard key selector for a team, or None for the shared layout"""
+        return team_id if self.layout == "shard_key" else None
+
+    def _ensure_shard_key(self, collection_name: str, team_id: str) -> None:
+        """Create the team's shard key the first time it is written to"""
+        if (collection_name, team_id) in self._shard_keys:
+            return
+        try:
+            self.client.create_shard_key(collection_name, shard_key=team_id)
+        except Exception as e:
+            if "already exists" not in str(e):
+                raise
+        self._shard_keys.add((collection_name, team_id))
+
+    def upsert_points(self, points: List[PointStruct]) -> bool:
+        """Insert or update points in the Qdrant collection"""
+        try:
+            self._wait_for_migration()
+            self._upsert(self.collection_name, self.layout, points)
             logger.info(f"Successfully upserted {len(points)} points")
             return True
 
@@ -94,6 +994,57 @@ class VectorStore:
             logger.error(f"Error upserting points: {str(e)}")
             raise
 
+    def delete_points(self, team_id: str, point_ids: List[str]) -> None:
+        """Delete points by id within a team's scope"""
+        if not point_ids:
+            return
+        try:
+            # Filtering on team_id as well keeps the delete inside the tenant
+            team_filter = self._team_filter(team_id)
+            team_filter.must.append(models.HasIdCondition(has_id=point_ids))
+            self._wait_for_migration()
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=models.FilterSelector(filter=team_filter),
+                shard_key_selector=self._shard_key(team_id)
+            )
+            logger.info(f"Deleted {len(point_ids)} points", extra={"team_id": team_id})
+
+        except Exception as e:
+            if self.layout == "shard_key" and _missing_shard_key(e):
+                return
+            logger.error(f"Error deleting points: {str(e)}")
+            raise
+
+    def _upsert(self, collection_name: str, layout: str, points: List[PointStruct]) -> None:
+        if layout != "shard_key":
+            self.client.upsert(collection_name=collection_name, points=points)
+            return
+
+        by_team: Dict[str, List[PointStruct]] = {}
+        for point in points:
+            by_team.setdefault(point.payload["team_id"], []).append(point)
+        for team_id, team_points in by_team.items():
+            self._ensure_shard_key(collection_name, team_id)
+            self.client.upsert(
+                collection_name=collection_name,
+                points=team_points,
+                shard_key_selector=team_id
+            )
+
+
+def create_vector_store(backend: str = config.VECTOR_STORE_BACKEND) -> BaseVectorStore:
+    """Build the configured vector store backend"""
+    if backend == "qdrant":
+        return QdrantVectorStore()
+    if backend == "local":
+        from src.local_vector_store import LocalVectorStore
+        return LocalVectorStore()
+    raise ValueError(f"Unknown vector store backend '{backend}', expected 'qdrant' or 'local'")
+
 
 # Initialize global vector store
-vector_store = VectorStore()
\ No newline at end of file
+vector_store = lazy_service(
+    "vector_store", create_vector_store,
+    aclose=lambda store: store.aclose()
+)
\ No newline at end of file
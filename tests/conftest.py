@@ -0,0 +1,123 @@
+"""Shared test setup
+
+Every service writes under a temporary directory, completions come from
+tools.fake_openai_server, and the embedding model and completion tokenizer
+are replaced with small deterministic stand-ins, so the suite runs offline
+without torch or downloaded weights. The settings are read when ``src`` is
+first imported, which is why they are set at import time here.
+"""
+import os
+import re
+import shutil
+import tempfile
+import zlib
+from typing import Any, Dict, List, Union
+import numpy as np
+import pytest
+from tools.fake_openai_server import start_server
+
+DATA_DIR = tempfile.mkdtemp(prefix="pdfqa-tests-")
+completions = start_server()
+
+os.environ.update({
+    "AZURE_OPENAI_ENDPOINT": completions.url,
+    "AZURE_OPENAI_API_KEY": "test",
+    "AZURE_DEPLOYMENT_NAME": "test",
+    "VECTOR_STORE_BACKEND": "local",
+    "LOCAL_VECTOR_STORE_PATH": os.path.join(DATA_DIR, "vectors"),
+    "EMBEDDING_CACHE_PATH": os.path.join(DATA_DIR, "embeddings.db"),
+    "MANIFEST_DB_PATH": os.path.join(DATA_DIR, "manifests.db"),
+    "JOB_DB_PATH": os.path.join(DATA_DIR, "jobs.db"),
+    "UPLOAD_SPOOL_DIR": os.path.join(DATA_DIR, "spool"),
+    "ANSWER_CACHE_DB_PATH": os.path.join(DATA_DIR, "answer_cache.db"),
+    "RATE_LIMIT_BACKEND": "memory",
+    "RATE_LIMIT_DB_PATH": os.path.join(DATA_DIR, "ratelimit.db"),
+    "METRICS_DIR": "",
+    "AUTH_ENABLED": "true",
+    "JWT_SECRET_KEYS": "test:test-secret",
+    "JWT_KEYS_FILE": "",
+    "WARMUP_ON_STARTUP": "false",
+    "PDF_EXTRACT_WORKERS": "1",
+    "ENABLE_HTTPS": "false",
+    "DEBUG": "false",
+})
+
+EMBEDDING_DIM = 384
+_WORD = re.compile(r"\w+|[^\w\s]")
+
+
+class WordTokenizer:
+    """The parts of a Hugging Face tokenizer the chunker uses; one token per word"""
+
+    model_max_length = 512
+
+    def __call__(self, texts: Union[str, List[str]], return_offsets_mapping: bool = False,
+                 **kwargs: Any) -> Dict[str, Any]:
+        if isinstance(texts, str):
+            spans = [(m.start(), m.end()) for m in _WORD.finditer(texts)]
+            encoding = {"input_ids": list(range(len(spans)))}
+            if return_offsets_mapping:
+                encoding["offset_mapping"] = spans
+            return encoding
+        return {"input_ids": [list(range(len(_WORD.findall(text)))) for text in texts]}
+
+
+class HashedWordEmbedder:
+    """Stand-in SentenceTransformer: a normalized bag of hashed words
+
+    Texts sharing words get similar vectors, so retrieval behaves sensibly.
+    """
+
+    max_seq_length = 256
+
+    def __init__(self):
+        self.tokenizer = WordTokenizer()
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return EMBEDDING_DIM
+
+    def encode(self, texts: Union[str, List[str]], **kwargs: Any) -> np.ndarray:
+        single = isinstance(texts, str)
+        vectors = np.zeros((1 if single else len(texts), EMBEDDING_DIM), dtype=np.float32)
+        for row, text in enumerate([texts] if single else texts):
+            for word in re.findall(r"\w+", text.lower()):
+                vectors[row, zlib.crc32(word.encode("utf-8")) % EMBEDDING_DIM] += 1.0
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors[0] if single else vectors
+
+
+class WordEncoding:
+    """Stand-in tiktoken encoding counting words and punctuation"""
+
+    def encode(self, text: str, **kwargs: Any) -> List[int]:
+        return [0] * len(_WORD.findall(text))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def offline_models():
+    """Install the stand-in models in place of downloaded ones"""
+    from src import models
+    from src.config import config
+    from src.context_builder import context_builder
+
+    models._models[("sentence_transformer", config.EMBEDDING_MODEL_NAME)] = HashedWordEmbedder()
+    context_builder._encoding = WordEncoding()
+    yield
+    from src.lifecycle import close_services
+
+    close_services()
+    completions.shutdown()
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def completion_server():
+    """The fake completion server, with its recorded requests cleared"""
+    completions.requests.clear()
+    return completions
+
+
+@pytest.fixture
+def word_tokenizer():
+    """The stand-in tokenizer, for components that take one directly"""
+    return WordTokenizer()
@@ -0,0 +1,145 @@
+import asyncio
+import time
+import pytest
+from werkzeug.datastructures import FileStorage
+from benchmarks.synthetic_pdf import write_pdf
+from src.answer_cache import AnswerCache, answer_cache
+from src.answer_generator import answer_generator
+from src.jobs import job_manager
+
+RESPONSE = {"answer": "42 units", "sources": [["report.pdf", 3]], "status": "success"}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "answer_cache.db")
+
+
+def _cache(db_path: str, **kwargs) -> AnswerCache:
+    options = dict(threshold=0.9, ttl=3600, max_entries=10, max_teams=10, enabled=True)
+    options.update(kwargs)
+    return AnswerCache(db_path=db_path, **options)
+
+
+def _upload(path: str, team_id: str, document_id: str) -> None:
+    """Ingest through the job queue, as the upload endpoints do"""
+    with open(path, "rb") as fp:
+        job = job_manager.submit_upload(FileStorage(fp, filename="cached.pdf"),
+                                        team_id, document_id)
+    deadline = time.monotonic() + 30
+    while job_manager.get_job(job["job_id"])["status"] in ("queued", "running"):
+        assert time.monotonic() < deadline, "upload job did not finish"
+        time.sleep(0.05)
+    assert job_manager.get_job(job["job_id"])["status"] == "completed"
+
+
+def test_similar_question_hits_and_dissimilar_one_misses(db_path):
+    cache = _cache(db_path)
+    cache.store("team-a", "What was the budget?", [1.0, 0.0, 0.0], RESPONSE,
+                cache.generation("team-a"))
+
+    hit = cache.lookup("team-a", [0.98, 0.05, 0.0])
+
+    assert hit["answer"] == "42 units"
+    assert hit["cached"] is True
+    assert cache.lookup("team-a", [0.0, 1.0, 0.0]) is None
+    assert cache.lookup("team-b", [1.0, 0.0, 0.0]) is None
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 2)
+
+
+def test_invalidation_reaches_every_worker(db_path):
+    upload_worker, answer_worker = _cache(db_path), _cache(db_path)
+    answer_worker.store("team-a", "q", [1.0, 0.0], RESPONSE, answer_worker.generation("team-a"))
+    assert answer_worker.lookup("team-a", [1.0, 0.0]) is not None
+
+    upload_worker.invalidate_team("team-a")
+
+    assert answer_worker.lookup("team-a", [1.0, 0.0]) is None
+    assert answer_worker.stats()["invalidations"] == 1
+    assert answer_worker.stats()["teams"] == 0
+
+
+def test_answer_generated_across_an_invalidation_is_not_stored(db_path):
+    cache = _cache(db_path)
+    generation = cache.generation("team-a")
+
+    cache.invalidate_team("team-a")
+    cache.store("team-a", "q", [1.0, 0.0], RESPONSE, generation)
+
+    assert cache.lookup("team-a", [1.0, 0.0]) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_entries_and_teams_are_bounded(db_path):
+    cache = _cache(db_path, max_entries=2, max_teams=2)
+    for i, vector in enumerate(([1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0])):
+        cache.store("team-a", f"q{i}", vector, RESPONSE, 0)
+
+    assert cache.lookup("team-a", [1.0, 0.0, 0.0]) is None
+    assert cache.lookup("team-a", [0.0, 0.0, 1.0]) is not None
+
+    cache.store("team-b", "q", [1.0, 0.0, 0.0], RESPONSE, 0)
+    cache.store("team-c", "q", [1.0, 0.0, 0.0], RESPONSE, 0)
+
+    assert cache.stats()["teams"] == 2
+    assert cache.lookup("team-a", [0.0, 0.0, 1.0]) is None
+
+
+def test_entries_expire(db_path):
+    cache = _cache(db_path, ttl=0.05)
+    cache.store("team-a", "q", [1.0, 0.0], RESPONSE, 0)
+
+    time.sleep(0.1)
+
+    assert cache.lookup("team-a", [1.0, 0.0]) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_disabled_cache_stores_nothing(db_path):
+    cache = _cache(db_path, enabled=False)
+    cache.store("team-a", "q", [1.0, 0.0], RESPONSE, 0)
+
+    assert cache.lookup("team-a", [1.0, 0.0]) is None
+    assert cache.generation("team-a") == 0
+
+
+def test_repeat_question_is_answered_from_the_cache_until_an_upload(tmp_path, completion_server):
+    path = str(tmp_path / "cached.pdf")
+    facts = write_pdf(path, pages=3, seed=11)
+    _upload(path, "team-cached", "cached")
+    question = facts[0].question
+
+    first = answer_generator.generate_answer("team-cached", question)
+    second = answer_generator.generate_answer("team-cached", question)
+
+    assert "cached" not in first and second["cached"] is True
+    assert second["answer"] == first["answer"]
+    assert len(completion_server.requests) == 1
+
+    invalidations = answer_cache.stats()["invalidations"]
+    write_pdf(path, pages=3, seed=12)
+    _upload(path, "team-cached", "cached")
+    third = answer_generator.generate_answer("team-cached", question)
+
+    assert "cached" not in third
+    assert len(completion_server.requests) == 2
+    assert answer_cache.stats()["invalidations"] == invalidations + 1
+
+
+def test_async_answers_share_the_cache(tmp_path, completion_server):
+    path = str(tmp_path / "async.pdf")
+    facts = write_pdf(path, pages=2, seed=13)
+    _upload(path, "team-async", "async")
+    question = facts[0].question
+
+    async def ask_twice():
+        first = await answer_generator.agenerate_answer("team-async", question)
+        events = [event async for event in answer_generator.astream_answer("team-async", question)]
+        return first, events
+
+    first, events = asyncio.run(ask_twice())
+
+    assert first["status"] == "success" and "cached" not in first
+    assert events[0] == ("sources", {"sources": first["sources"], "cached": True})
+    assert events[-1] == ("done", {"status": "success", "cached": True})
+    assert len(completion_server.requests) == 1
@@ -0,0 +1,107 @@
+import json
+import logging
+import time
+import pytest
+from benchmarks.synthetic_pdf import write_pdf
+from tools.fake_openai_server import DEFAULT_REPLY
+from src.api import app
+from src.utils.logging import DroppingQueueHandler, ensure_logging, logging_stats
+from src.utils.security import security_manager
+
+TEAM = "team-api"
+
+
+@pytest.fixture(scope="module")
+def client():
+    return app.test_client()
+
+
+@pytest.fixture(scope="module")
+def auth():
+    return {"Authorization": f"Bearer {security_manager.create_jwt_token(TEAM)}"}
+
+
+@pytest.fixture(scope="module")
+def facts(client, auth, tmp_path_factory):
+    """Upload a synthetic PDF and wait for its job to finish"""
+    path = tmp_path_factory.mktemp("upload") / "handbook.pdf"
+    facts = write_pdf(str(path), pages=5)
+    with open(path, "rb") as f:
+        response = client.post("/upload", headers=auth, data={
+            "file": (f, "handbook.pdf"),
+            "document_id": "handbook"
+        })
+    assert response.status_code == 202
+    job_id = response.get_json()["job_id"]
+
+    deadline = time.monotonic() + 30
+    while True:
+        job = client.get(f"/jobs/{job_id}", headers=auth).get_json()["job"]
+        if job["status"] not in ("queued", "running"):
+            break
+        assert time.monotonic() < deadline, "upload job did not finish"
+        time.sleep(0.05)
+    assert job["status"] == "completed", job["error"]
+    assert job["pages_done"] == 5
+    return facts
+
+
+def _events(body: str):
+    """(event, data) pairs of a server-sent event stream"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_answer_is_generated_from_retrieved_context(client, auth, facts, completion_server):
+    fact = facts[2]
+
+    response = client.post("/answer", headers=auth, json={"question": fact.question})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["status"] == "success"
+    assert body["answer"] == DEFAULT_REPLY
+    assert ["handbook.pdf", fact.page] in body["sources"]
+    prompt = json.dumps(completion_server.requests[-1]["messages"])
+    assert fact.answer in prompt
+
+
+def test_answer_streams_sources_then_tokens(client, auth, facts, completion_server):
+    response = client.post("/answer?stream=true", headers=auth,
+                           json={"question": facts[0].question + " (streamed)"})
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    events = _events(response.get_data(as_text=True))
+    names = [event for event, _ in events]
+    assert names[0] == "sources" and names[-1] == "done"
+    assert set(names[1:-1]) == {"token"}
+    assert "".join(data["text"] for event, data in events if event == "token") == DEFAULT_REPLY
+    assert events[-1][1]["status"] == "success"
+    assert completion_server.requests[-1]["stream"] is True
+
+
+def test_answer_rejects_a_token_for_another_team(client, auth):
+    response = client.post("/answer", headers=auth,
+                           json={"team_id": "someone-else", "question": "Anything?"})
+
+    assert response.status_code == 403
+
+
+def test_importing_the_app_configures_logging_once():
+    handlers = list(logging.getLogger().handlers)
+
+    ensure_logging()
+
+    assert logging_stats() is not None
+    assert any(isinstance(handler, DroppingQueueHandler) for handler in handlers)
+    assert logging.getLogger().handlers == handlers
+
+
+@pytest.mark.parametrize("body", [[1], "x", 3])
+def test_non_object_json_body_is_a_client_error(client, auth, body):
+    assert client.post("/answer", headers=auth, json=body).status_code == 400
+    assert client.get("/documents", headers=auth, json=body).status_code == 200
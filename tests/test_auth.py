@@ -0,0 +1,110 @@
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from jose import jwt
+from src.utils.auth import authorize_team
+from src.utils.security import SecurityManager, security_manager
+
+
+def _token(team_id: str, kid: str, secret: str, expires_in: float = 3600) -> str:
+    claims = {"team_id": team_id, "exp": datetime.utcnow() + timedelta(seconds=expires_in)}
+    return jwt.encode(claims, secret, algorithm="HS256", headers={"kid": kid})
+
+
+def _write_keys(path: str, keys: dict, mtime: float) -> None:
+    with open(path, "w") as fp:
+        json.dump(keys, fp)
+    # Keep the reload deterministic on filesystems with coarse timestamps
+    os.utime(path, (mtime, mtime))
+
+
+def test_valid_token_is_cached():
+    manager = SecurityManager("k1:secret-one", keys_file="")
+    token = manager.create_jwt_token("team-a")
+
+    assert manager.authenticate(token)["team_id"] == "team-a"
+    assert manager.authenticate(token)["team_id"] == "team-a"
+    assert manager.validate_jwt_token(token) == "team-a"
+
+    stats = manager.stats()
+    assert (stats["misses"], stats["hits"], stats["rejected"]) == (1, 2, 0)
+    assert stats["cache_entries"] == 1
+    assert jwt.get_unverified_header(token)["kid"] == "k1"
+
+
+def test_cache_is_bounded():
+    manager = SecurityManager("k1:secret-one", keys_file="", cache_size=2)
+
+    for team in ("team-a", "team-b", "team-c"):
+        manager.authenticate(manager.create_jwt_token(team))
+
+    assert manager.stats()["cache_entries"] == 2
+
+
+def test_invalid_tokens_are_rejected():
+    manager = SecurityManager("k1:secret-one", keys_file="")
+
+    assert manager.authenticate(_token("team-a", "k1", "secret-one", expires_in=-10)) is None
+    assert manager.authenticate(_token("team-a", "k1", "not-the-secret")) is None
+    assert manager.authenticate("not-a-jwt") is None
+    assert manager.stats()["rejected"] == 3
+    assert manager.stats()["cache_entries"] == 0
+
+
+def test_cached_claims_do_not_outlive_the_token():
+    manager = SecurityManager("k1:secret-one", keys_file="", cache_ttl=300)
+    exp = int(time.time()) + 1
+    token = jwt.encode({"team_id": "team-a", "exp": exp}, "secret-one",
+                       algorithm="HS256", headers={"kid": "k1"})
+
+    assert manager.authenticate(token) is not None
+    time.sleep(exp - time.time() + 0.1)
+    manager.authenticate(token)
+
+    # The cache entry expired with the token, so it was verified again
+    assert (manager.stats()["misses"], manager.stats()["hits"]) == (2, 0)
+
+
+def test_keys_are_rotated_through_the_keys_file(tmp_path):
+    path = str(tmp_path / "keys.json")
+    _write_keys(path, {"k1": "secret-one"}, mtime=1000)
+    manager = SecurityManager("", keys_file=path, keys_reload_seconds=0)
+    old_token = manager.create_jwt_token("team-a")
+
+    # Add a new signing key; tokens under the retiring one stay valid
+    _write_keys(path, {"k2": "secret-two", "k1": "secret-one"}, mtime=2000)
+    new_token = manager.create_jwt_token("team-a")
+
+    assert jwt.get_unverified_header(new_token)["kid"] == "k2"
+    assert manager.authenticate(new_token)["team_id"] == "team-a"
+    assert manager.authenticate(old_token)["team_id"] == "team-a"
+    assert manager.stats()["keys"] == 2
+
+    # Retire the old key; its cached token must not survive the reload
+    _write_keys(path, {"k2": "secret-two"}, mtime=3000)
+
+    assert manager.authenticate(old_token) is None
+    assert manager.authenticate(new_token)["team_id"] == "team-a"
+    assert manager.stats()["keys"] == 1
+
+
+def test_keys_file_is_checked_at_most_every_reload_interval(tmp_path):
+    path = str(tmp_path / "keys.json")
+    _write_keys(path, {"k1": "secret-one"}, mtime=1000)
+    manager = SecurityManager("", keys_file=path, keys_reload_seconds=3600)
+
+    _write_keys(path, {"k2": "secret-two"}, mtime=2000)
+
+    assert manager.authenticate(_token("team-a", "k1", "secret-one")) is not None
+    assert manager.authenticate(_token("team-a", "k2", "secret-two")) is None
+
+
+def test_token_must_match_the_requested_team():
+    token = security_manager.create_jwt_token("team-a")
+
+    assert authorize_team(f"Bearer {token}", None) == ("team-a", None)
+    assert authorize_team(f"Bearer {token}", "team-a") == ("team-a", None)
+    assert authorize_team(f"Bearer {token}", "team-b")[1][1] == 403
+    assert authorize_team(None, "team-a")[1][1] == 401
+    assert authorize_team("Bearer not-a-jwt", None)[1][1] == 401
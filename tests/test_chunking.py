@@ -0,0 +1,128 @@
+import pytest
+from src.chunking import CharacterChunker, ParagraphChunker, SentenceChunker, create_chunker
+
+
+def _sentence(tag: str, tokens: int = 10) -> str:
+    """A sentence of exactly ``tokens`` stand-in tokens, the full stop included"""
+    return " ".join([f"S{tag}"] + [f"w{tag}_{k}" for k in range(tokens - 2)]) + "."
+
+
+def _paragraph(tag: str, sentences: int, tokens: int = 10) -> str:
+    return " ".join(_sentence(f"{tag}_{i}", tokens) for i in range(sentences))
+
+
+def _tokens(tokenizer, text: str) -> int:
+    return len(tokenizer(text)["input_ids"])
+
+
+def test_chunks_fit_the_limit_and_overlap_by_whole_sentences(word_tokenizer):
+    chunker = SentenceChunker(word_tokenizer, max_tokens=40, overlap_tokens=12,
+                              min_tokens=0, across_pages=False)
+    sentences = [_sentence(str(i)) for i in range(20)]
+
+    chunks = list(chunker.iter_chunks([(1, " ".join(sentences))]))
+
+    assert len(chunks) > 1
+    assert all(_tokens(word_tokenizer, chunk.text) <= 40 for chunk in chunks)
+    assert [chunk.index for chunk in chunks] == list(range(len(chunks)))
+    for previous, current in zip(chunks, chunks[1:]):
+        # One 10-token sentence fits in the 12-token overlap, two do not
+        last = previous.text.rsplit(". ", 1)[-1]
+        assert current.text.startswith(last)
+        assert not current.text.startswith(previous.text.rsplit(". ", 2)[-2])
+    assert chunks[0].text.startswith(sentences[0])
+    assert chunks[-1].text.endswith(sentences[-1])
+
+
+def test_limit_is_capped_by_the_model_sequence_length(word_tokenizer):
+    chunker = SentenceChunker(word_tokenizer, max_seq_length=32, max_tokens=1000,
+                              overlap_tokens=500)
+
+    assert chunker.max_tokens == 30
+    assert chunker.overlap_tokens == 15
+
+
+def test_overlong_sentence_is_cut_at_token_boundaries(word_tokenizer):
+    chunker = SentenceChunker(word_tokenizer, max_tokens=30, overlap_tokens=0,
+                              min_tokens=0, across_pages=False)
+    sentence = _sentence("long", tokens=100)
+
+    chunks = list(chunker.iter_chunks([(1, sentence)]))
+
+    assert [_tokens(word_tokenizer, chunk.text) for chunk in chunks] == [30, 30, 30, 10]
+    assert " ".join(chunk.text for chunk in chunks) == sentence
+
+
+def test_sentence_broken_by_a_page_break_is_joined(word_tokenizer):
+    chunker = SentenceChunker(word_tokenizer, max_tokens=60, overlap_tokens=0,
+                              min_tokens=0, across_pages=True)
+    pages = [
+        (1, _paragraph("a", 3) + " The budget was"),
+        (2, "approved in March. " + _paragraph("b", 3)),
+    ]
+
+    chunks = list(chunker.iter_chunks(pages))
+
+    spanning = [chunk for chunk in chunks if "The budget was approved in March." in chunk.text]
+    assert len(spanning) == 1
+    assert (spanning[0].page_start, spanning[0].page_end) == (1, 2)
+    assert all("The budget was" not in chunk.text for chunk in chunks if chunk is not spanning[0])
+
+
+def test_short_page_is_carried_into_the_next_one(word_tokenizer):
+    pages = [(1, _sentence("a")), (2, _paragraph("b", 2))]
+
+    carried = list(SentenceChunker(word_tokenizer, max_tokens=60, overlap_tokens=0,
+                                   min_tokens=20, across_pages=True).iter_chunks(pages))
+    per_page = list(SentenceChunker(word_tokenizer, max_tokens=60, overlap_tokens=0,
+                                    min_tokens=20, across_pages=False).iter_chunks(pages))
+
+    assert [(c.page_start, c.page_end) for c in carried] == [(1, 2)]
+    assert carried[0].text.startswith(_sentence("a"))
+    assert [(c.page_start, c.page_end, c.index) for c in per_page] == [(1, 1, 0), (2, 2, 0)]
+
+
+def test_chunks_are_numbered_per_page(word_tokenizer):
+    chunker = SentenceChunker(word_tokenizer, max_tokens=30, overlap_tokens=0,
+                              min_tokens=0, across_pages=False)
+    page_two = (2, _paragraph("b", 6))
+
+    before = list(chunker.iter_chunks([(1, _paragraph("a", 3)), page_two]))
+    after = list(chunker.iter_chunks([(1, _paragraph("a", 9)), page_two]))
+
+    assert [c for c in before if c.page_start == 2] == [c for c in after if c.page_start == 2]
+    assert [c.index for c in after if c.page_start == 2] == [0, 1]
+
+
+def test_paragraph_chunker_starts_chunks_at_paragraphs(word_tokenizer):
+    paragraphs = [_paragraph(str(i), 3) for i in range(6)]
+    text = "\n\n".join(paragraphs)
+    options = dict(max_tokens=50, overlap_tokens=10, min_tokens=10, across_pages=False)
+
+    by_paragraph = list(ParagraphChunker(word_tokenizer, **options).iter_chunks([(1, text)]))
+    by_sentence = list(SentenceChunker(word_tokenizer, **options).iter_chunks([(1, text)]))
+
+    # A 30-token paragraph never fits after another one in 50 tokens
+    assert [chunk.text for chunk in by_paragraph] == paragraphs
+    assert any(not any(chunk.text.startswith(p) for p in paragraphs) for chunk in by_sentence)
+
+
+def test_paragraph_chunker_packs_an_overlong_paragraph_by_sentence(word_tokenizer):
+    chunker = ParagraphChunker(word_tokenizer, max_tokens=40, overlap_tokens=10,
+                               min_tokens=10, across_pages=False)
+
+    chunks = list(chunker.iter_chunks([(1, _paragraph("a", 8))]))
+
+    assert len(chunks) == 3
+    assert all(_tokens(word_tokenizer, chunk.text) <= 40 for chunk in chunks)
+    assert chunks[1].text.startswith(_sentence("a_3"))
+
+
+def test_create_chunker(word_tokenizer):
+    assert isinstance(create_chunker(strategy="fixed"), CharacterChunker)
+    assert type(create_chunker(word_tokenizer, strategy="sentence")) is SentenceChunker
+    assert type(create_chunker(word_tokenizer, strategy="paragraph")) is ParagraphChunker
+    with pytest.raises(ValueError):
+        create_chunker(strategy="sentence")
+    with pytest.raises(ValueError):
+        create_chunker(word_tokenizer, strategy="semantic")
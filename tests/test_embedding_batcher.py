@@ -0,0 +1,72 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+import numpy as np
+import pytest
+from src.embedding_batcher import BatchingEmbedder
+
+
+def _encode(texts):
+    return np.asarray([[float(len(text))] for text in texts], dtype=np.float32)
+
+
+def test_concurrent_texts_are_encoded_together():
+    batches = []
+    batcher = BatchingEmbedder(lambda texts: batches.append(len(texts)) or _encode(texts),
+                               max_batch_size=8, max_wait_ms=50)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        vectors = list(pool.map(batcher.embed, ["a" * n for n in range(1, 9)]))
+
+    assert [float(vector[0]) for vector in vectors] == [float(n) for n in range(1, 9)]
+    assert sum(batches) == 8 and len(batches) < 8
+    assert batcher.stats()["items"] == 8
+    batcher.shutdown()
+
+
+def test_encode_errors_reach_every_caller():
+    def fail(texts):
+        raise ValueError("model exploded")
+
+    batcher = BatchingEmbedder(fail, max_wait_ms=1)
+
+    with pytest.raises(ValueError):
+        batcher.embed("text")
+    assert batcher.stats()["errors"] == 1
+    batcher.shutdown()
+
+
+def test_submit_after_shutdown_is_refused():
+    batcher = BatchingEmbedder(_encode)
+    batcher.shutdown()
+
+    with pytest.raises(RuntimeError):
+        batcher.submit("text")
+
+
+class _ShutdownDuringPut(queue.Queue):
+    """Runs a shutdown in another thread just before the first put lands"""
+
+    def __init__(self, batcher: BatchingEmbedder):
+        super().__init__()
+        self.batcher = batcher
+        self.shutdown_thread = None
+
+    def put(self, item, *args, **kwargs):
+        if self.shutdown_thread is None:
+            self.shutdown_thread = threading.Thread(target=self.batcher.shutdown)
+            self.shutdown_thread.start()
+            # Let the shutdown finish first, unless it has to wait for this submit
+            self.shutdown_thread.join(timeout=1.5)
+        super().put(item, *args, **kwargs)
+
+
+def test_submit_racing_shutdown_is_never_left_pending():
+    batcher = BatchingEmbedder(_encode, max_wait_ms=1)
+    batcher._queue = _ShutdownDuringPut(batcher)
+
+    future = batcher.submit("text")
+    batcher._queue.shutdown_thread.join()
+
+    done, pending = wait([future], timeout=10)
+    assert not pending
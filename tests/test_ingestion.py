@@ -0,0 +1,64 @@
+from benchmarks.synthetic_pdf import write_pdf
+from src.document_processor import document_processor
+from src.manifest import document_manifest
+from src.vector_store import vector_store
+from src.ai_service import ai_service
+
+
+def test_pdf_is_chunked_embedded_and_stored(tmp_path):
+    path = str(tmp_path / "report.pdf")
+    facts = write_pdf(path, pages=6, words_per_page=300)
+
+    progress = document_processor.process_pdf(path, "team-ingest", "report.pdf", "report")
+
+    assert progress.stage == "completed"
+    assert progress.pages_done == 6
+    assert progress.chunks_created > 6
+    assert progress.points_upserted == progress.chunks_embedded == progress.chunks_created
+    assert progress.upsert_batches >= 1
+
+    documents = vector_store.get_team_documents("team-ingest")
+    assert [doc["document_id"] for doc in documents] == ["report"]
+    assert documents[0]["page_count"] == 6
+    assert documents[0]["chunk_count"] == progress.points_upserted
+
+    fact = facts[3]
+    hits = vector_store.search_vectors("team-ingest", ai_service.get_embedding(fact.question),
+                                       limit=3, query_text=fact.question)
+    assert hits[0].payload["page_number"] == fact.page
+    assert fact.answer in hits[0].payload["text"]
+    assert vector_store.search_vectors("other-team", ai_service.get_embedding(fact.question)) == []
+
+
+def test_unchanged_upload_is_not_embedded_again(tmp_path):
+    path = str(tmp_path / "same.pdf")
+    write_pdf(path, pages=4)
+    first = document_processor.process_pdf(path, "team-reupload", "same.pdf", "same")
+
+    second = document_processor.process_pdf(path, "team-reupload", "same.pdf", "same")
+
+    assert second.chunks_embedded == 0
+    assert second.chunks_skipped == first.chunks_created
+    assert second.points_deleted == 0
+    assert len(document_manifest.get_chunks("team-reupload", "same")) == first.points_upserted
+
+
+def test_changed_upload_replaces_stale_chunks(tmp_path):
+    old_path, new_path = str(tmp_path / "old.pdf"), str(tmp_path / "new.pdf")
+    write_pdf(old_path, pages=4, seed=1)
+    new_facts = write_pdf(new_path, pages=3, seed=2)
+    first = document_processor.process_pdf(old_path, "team-changed", "doc.pdf", "doc")
+
+    second = document_processor.process_pdf(new_path, "team-changed", "doc.pdf", "doc")
+
+    assert second.chunks_embedded > 0
+    assert second.points_deleted == first.points_upserted - second.chunks_skipped
+    stored = document_manifest.get_chunks("team-changed", "doc")
+    assert len(stored) == second.chunks_created
+    assert vector_store.get_team_documents("team-changed")[0]["page_count"] == 3
+
+    fact = new_facts[1]
+    hits = vector_store.search_vectors("team-changed", ai_service.get_embedding(fact.question),
+                                       limit=50)
+    assert len(hits) == len(stored)
+    assert {str(hit.id) for hit in hits} == set(stored)
@@ -0,0 +1,123 @@
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+import pytest
+from benchmarks.synthetic_pdf import write_pdf
+from src.jobs import COMPLETED, QUEUED, RUNNING, JobManager, JobStore, _owner_alive
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.db"))
+
+
+@pytest.fixture
+def spool(tmp_path):
+    return str(tmp_path / "spool")
+
+
+def _dead_owner() -> str:
+    """An owner id for a process on this host that has exited"""
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return f"{socket.gethostname()}:{process.pid}"
+
+
+def _manager(store: JobStore, spool: str, owner: str) -> JobManager:
+    manager = JobManager(store=store, spool_dir=spool, workers=1, lease_seconds=60)
+    manager.owner = owner
+    return manager
+
+
+def _spooled_job(store: JobStore, spool: str, tmp_path, name: str):
+    path = str(tmp_path / f"{name}.pdf")
+    write_pdf(path, pages=2, seed=3)
+    os.makedirs(spool, exist_ok=True)
+    spooled = os.path.join(spool, f"{name}.pdf")
+    shutil.copy(path, spooled)
+    return store.create("team-jobs", name, f"{name}.pdf", spooled)
+
+
+def _wait_finished(store: JobStore, job_id: str) -> dict:
+    deadline = time.monotonic() + 30
+    while store.get(job_id)["status"] in (QUEUED, RUNNING):
+        assert time.monotonic() < deadline, "job did not finish"
+        time.sleep(0.05)
+    return store.get(job_id)
+
+
+def test_only_one_process_claims_a_job(store):
+    job = store.create("team-a", "doc", "doc.pdf", "/nonexistent.pdf")
+
+    assert store.claim(job["job_id"], "host:1")
+    assert not store.claim(job["job_id"], "host:2")
+
+    claimed = store.get(job["job_id"])
+    assert (claimed["status"], claimed["owner"], claimed["attempts"]) == (RUNNING, "host:1", 1)
+
+
+def test_release_requires_the_current_owner(store):
+    job = store.create("team-a", "doc", "doc.pdf", "/nonexistent.pdf")
+    store.claim(job["job_id"], "host:1")
+
+    assert not store.release(job["job_id"], "host:2")
+    assert store.release(job["job_id"], "host:1")
+    assert (store.get(job["job_id"])["status"], store.get(job["job_id"])["owner"]) == (QUEUED, None)
+
+
+def test_owner_liveness():
+    now = time.time()
+    this_process = f"{socket.gethostname()}:{os.getpid()}"
+
+    assert _owner_alive(this_process, now, lease_seconds=60)
+    assert not _owner_alive(this_process, now - 120, lease_seconds=60)
+    assert not _owner_alive(None, now, lease_seconds=60)
+    assert not _owner_alive(_dead_owner(), now, lease_seconds=60)
+    # Processes on other hosts are trusted while their lease is fresh
+    assert _owner_alive("elsewhere.example:1", now, lease_seconds=60)
+
+
+def test_job_queued_by_every_worker_runs_once(store, spool, tmp_path):
+    job = _spooled_job(store, spool, tmp_path, "shared")
+    workers = [_manager(store, spool, f"worker:{i}") for i in range(3)]
+
+    for worker in workers:
+        worker.resume_pending()
+    finished = _wait_finished(store, job["job_id"])
+
+    assert finished["status"] == COMPLETED
+    assert finished["attempts"] == 1
+    assert not os.path.exists(job["file_path"])
+    for worker in workers:
+        worker.shutdown()
+
+
+def test_only_abandoned_running_jobs_are_resumed(store, spool, tmp_path):
+    abandoned = _spooled_job(store, spool, tmp_path, "abandoned")
+    store.claim(abandoned["job_id"], _dead_owner())
+    owned = _spooled_job(store, spool, tmp_path, "owned")
+    store.claim(owned["job_id"], "elsewhere.example:1")
+    manager = _manager(store, spool, "worker:1")
+
+    assert manager.resume_pending() == 1
+    finished = _wait_finished(store, abandoned["job_id"])
+
+    assert (finished["status"], finished["attempts"]) == (COMPLETED, 2)
+    assert store.get(owned["job_id"])["status"] == RUNNING
+    assert os.path.exists(owned["file_path"])
+    manager.shutdown()
+
+
+def test_missing_spool_file_fails_the_job(store, spool):
+    job = store.create("team-a", "doc", "doc.pdf", os.path.join(spool, "gone.pdf"))
+    manager = _manager(store, spool, "worker:1")
+
+    manager.resume_pending()
+    finished = _wait_finished(store, job["job_id"])
+
+    assert finished["status"] == "failed"
+    assert finished["error"] == "Spooled upload is missing"
+    manager.shutdown()
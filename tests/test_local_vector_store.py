@@ -0,0 +1,121 @@
+import uuid
+from typing import List
+import numpy as np
+import pytest
+from qdrant_client.models import PointStruct
+from src.config import config
+from src.local_vector_store import LocalVectorStore
+from src.vector_store import VECTOR_NAME
+
+DIM = LocalVectorStore.embedding_dim
+
+
+@pytest.fixture(params=["brute_force", "hnsw"])
+def index_kind(request, monkeypatch):
+    if request.param == "hnsw":
+        pytest.importorskip("hnswlib")
+        monkeypatch.setattr(config, "LOCAL_HNSW_MIN_POINTS", 1)
+    else:
+        monkeypatch.setattr(config, "LOCAL_HNSW_MIN_POINTS", 0)
+    return request.param
+
+
+@pytest.fixture
+def store(index_kind, tmp_path):
+    return LocalVectorStore(str(tmp_path / "vectors"))
+
+
+def _vectors(n: int, seed: int) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _points(team_id: str, document_id: str, vectors: np.ndarray, tag: str = "") -> List[PointStruct]:
+    return [
+        PointStruct(
+            id=str(uuid.uuid5(uuid.NAMESPACE_URL, f"{team_id}/{document_id}/{tag}{i}")),
+            vector={VECTOR_NAME: vector.tolist()},
+            payload={"team_id": team_id, "document_id": document_id, "doc_name": f"{document_id}.pdf",
+                     "page_number": i // 10 + 1, "text": f"{tag}chunk {i}"}
+        )
+        for i, vector in enumerate(vectors)
+    ]
+
+
+def _search_ids(store: LocalVectorStore, team_id: str, vector: np.ndarray, limit: int = 5) -> List[str]:
+    return [str(hit.id) for hit in store.search_vectors(team_id, vector.tolist(), limit=limit)]
+
+
+def test_upserted_points_are_searchable_per_team(store, index_kind):
+    vectors = _vectors(40, seed=1)
+    points = _points("team-a", "doc-1", vectors[:20]) + _points("team-a", "doc-2", vectors[20:])
+    store.upsert_points(points)
+
+    hits = store.search_vectors("team-a", vectors[25].tolist(), limit=5)
+
+    assert len(hits) == 5
+    assert str(hits[0].id) == str(points[25].id)
+    assert hits[0].score == pytest.approx(1.0, abs=1e-4)
+    assert hits[0].payload["document_id"] == "doc-2"
+    assert [hit.score for hit in hits] == sorted((hit.score for hit in hits), reverse=True)
+    assert store.search_vectors("team-b", vectors[25].tolist()) == []
+    assert (store._teams["team-a"].hnsw is not None) == (index_kind == "hnsw")
+
+
+def test_upsert_of_an_existing_id_replaces_it_in_place(store):
+    vectors = _vectors(11, seed=2)
+    points = _points("team-a", "doc-1", vectors[:10])
+    store.upsert_points(points)
+
+    moved = points[3].model_copy(update={"vector": {VECTOR_NAME: vectors[10].tolist()}})
+    moved.payload = dict(moved.payload, text="updated")
+    store.upsert_points([moved])
+
+    assert store._teams["team-a"].count == 10
+    hits = store.search_vectors("team-a", vectors[10].tolist(), limit=1)
+    assert str(hits[0].id) == str(points[3].id)
+    assert hits[0].payload["text"] == "updated"
+    assert str(points[3].id) not in _search_ids(store, "team-a", vectors[3], limit=1)
+
+
+def test_deleted_points_are_not_returned(store):
+    vectors = _vectors(30, seed=3)
+    doc_1, doc_2 = _points("team-a", "doc-1", vectors[:20]), _points("team-a", "doc-2", vectors[20:])
+    store.upsert_points(doc_1 + doc_2)
+
+    assert store.delete_document("team-a", "doc-1") == 20
+    store.delete_points("team-a", [str(doc_2[0].id)])
+
+    remaining = _search_ids(store, "team-a", vectors[0], limit=50)
+    assert sorted(remaining) == sorted(str(point.id) for point in doc_2[1:])
+    assert store.delete_document("team-a", "doc-1") == 0
+    assert store.delete_document("team-b", "doc-2") == 0
+
+
+def test_deleted_rows_are_reused(store):
+    store.upsert_points(_points("team-a", "doc-1", _vectors(50, seed=4)))
+
+    for version in range(1, 5):
+        store.delete_document("team-a", "doc-1")
+        vectors = _vectors(50, seed=4 + version)
+        points = _points("team-a", "doc-1", vectors, tag=f"v{version}-")
+        store.upsert_points(points)
+
+        assert store._teams["team-a"].count == 50
+        assert _search_ids(store, "team-a", vectors[7], limit=1) == [str(points[7].id)]
+        assert set(_search_ids(store, "team-a", vectors[7], limit=100)) == {str(p.id) for p in points}
+
+
+def test_store_is_reopened_from_disk(store, index_kind):
+    vectors = _vectors(20, seed=9)
+    points = _points("team-a", "doc-1", vectors)
+    store.upsert_points(points)
+    store.delete_points("team-a", [str(points[0].id)])
+    store.register_document("team-a", "doc-1", "doc-1.pdf", page_count=2, chunk_count=19)
+
+    reopened = LocalVectorStore(store.root)
+
+    assert _search_ids(reopened, "team-a", vectors[5], limit=1) == [str(points[5].id)]
+    assert str(points[0].id) not in _search_ids(reopened, "team-a", vectors[0], limit=20)
+    assert reopened.get_team_documents("team-a")[0]["chunk_count"] == 19
+    assert (reopened._teams["team-a"].hnsw is not None) == (index_kind == "hnsw")
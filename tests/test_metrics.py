@@ -0,0 +1,64 @@
+import json
+import os
+import threading
+import time
+from src.utils.metrics import Metrics
+
+
+def _wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def test_series_are_flushed_by_a_background_thread(tmp_path):
+    metrics = Metrics(directory=str(tmp_path), flush_seconds=0.2)
+    flushed_by = []
+    flush = metrics.flush
+
+    def recording_flush(wait: bool = True) -> None:
+        flushed_by.append(threading.current_thread().name)
+        flush(wait)
+
+    metrics.flush = recording_flush
+    path = tmp_path / f"{os.getpid()}.json"
+
+    metrics.observe("embed_query", 12.0, "team-a")
+    metrics.record_request("/answer", "POST", 200, 40.0, "team-a")
+
+    assert not path.exists()
+    assert _wait_for(path.exists)
+    assert set(flushed_by) == {"metrics-flush"}
+    state = json.loads(path.read_text())
+    assert state["stages"][0][0] == ["embed_query", "team-a"]
+    assert state["responses"] == [[["/answer", "POST", "200", "team-a"], 1]]
+
+
+def test_scrape_sums_every_process(tmp_path):
+    other = Metrics(directory=None)
+    other.record_request("/answer", "POST", 200, 40.0, "team-a")
+    (tmp_path / "999999.json").write_text(json.dumps(other._state()))
+    metrics = Metrics(prefix="t", directory=str(tmp_path), flush_seconds=60)
+
+    metrics.record_request("/answer", "POST", 200, 30.0, "team-a")
+    text = metrics.render_prometheus()
+
+    assert 't_http_responses_total{route="/answer",method="POST",status="200",team="team-a"} 2' in text
+    assert 't_http_request_duration_seconds_count{route="/answer",method="POST"} 2' in text
+
+    metrics.clear_directory()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_without_a_directory_nothing_is_written(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    metrics = Metrics(directory="")
+
+    metrics.observe("embed_query", 1.0)
+
+    assert metrics._flusher is None
+    assert list(tmp_path.iterdir()) == []
+    assert "embed_query" in metrics.render_prometheus()
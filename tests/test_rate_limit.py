@@ -0,0 +1,156 @@
+from typing import Any, Dict, List, Optional
+import pytest
+from src.utils.rate_limit import (
+    MemoryRateLimitBackend,
+    RateLimiter,
+    RedisRateLimitBackend,
+    SQLiteRateLimitBackend
+)
+
+
+class FakeRedis:
+    """The slice of the redis-py client RedisRateLimitBackend uses"""
+
+    def __init__(self):
+        self.values: Dict[str, int] = {}
+        self.expiry_ms: Dict[str, int] = {}
+        self.closed = False
+
+    def pipeline(self) -> "FakePipeline":
+        return FakePipeline(self)
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self.values.get(key)
+        return None if value is None else str(value).encode()
+
+    def incr(self, key: str) -> int:
+        self.values[key] = self.values.get(key, 0) + 1
+        return self.values[key]
+
+    def decr(self, key: str) -> int:
+        self.values[key] = self.values.get(key, 0) - 1
+        return self.values[key]
+
+    def pexpire(self, key: str, ms: int) -> bool:
+        self.expiry_ms[key] = ms
+        return key in self.values
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class FakePipeline:
+    def __init__(self, client: FakeRedis):
+        self.client = client
+        self.calls: List[Any] = []
+
+    def __getattr__(self, name: str):
+        def queue(*args: Any) -> None:
+            self.calls.append((name, args))
+        return queue
+
+    def execute(self) -> List[Any]:
+        return [getattr(self.client, name)(*args) for name, args in self.calls]
+
+
+class FailingBackend(MemoryRateLimitBackend):
+    def hit(self, key: str, limit: int, window_seconds: float, now: float) -> bool:
+        raise ConnectionError("backend is down")
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        backend = MemoryRateLimitBackend()
+    elif request.param == "sqlite":
+        backend = SQLiteRateLimitBackend(str(tmp_path / "ratelimit.db"))
+    else:
+        backend = RedisRateLimitBackend(client=FakeRedis())
+    yield backend
+    backend.close()
+
+
+def _hits(backend, count: int, now: float, key: str = "answer:team-a") -> List[bool]:
+    return [backend.hit(key, 5, 10, now) for _ in range(count)]
+
+
+def test_limit_is_enforced_within_a_window(backend):
+    assert _hits(backend, 7, now=100.0) == [True] * 5 + [False] * 2
+    assert _hits(backend, 1, now=109.9) == [False]
+
+
+def test_previous_window_is_weighted_by_its_overlap(backend):
+    _hits(backend, 5, now=100.0)
+
+    # At the window start the previous window still counts in full
+    assert _hits(backend, 3, now=110.0) == [False] * 3
+    # Halfway through it counts 5 * 0.5; the rejections above were not counted
+    assert _hits(backend, 3, now=115.0) == [True, True, False]
+    # The next window carries 2 * 0.5 from this one
+    assert _hits(backend, 5, now=125.0) == [True] * 4 + [False]
+    # Two windows later nothing is left
+    assert _hits(backend, 6, now=140.0) == [True] * 5 + [False]
+
+
+def test_keys_are_counted_separately(backend):
+    _hits(backend, 5, now=100.0)
+
+    assert _hits(backend, 1, now=100.0) == [False]
+    assert _hits(backend, 5, now=100.0, key="answer:team-b") == [True] * 5
+    assert _hits(backend, 5, now=100.0, key="upload:team-a") == [True] * 5
+
+
+def test_sqlite_counters_are_shared_between_processes(tmp_path):
+    path = str(tmp_path / "ratelimit.db")
+    first, second = SQLiteRateLimitBackend(path), SQLiteRateLimitBackend(path)
+
+    assert _hits(first, 3, now=100.0) == [True] * 3
+    assert _hits(second, 3, now=100.0) == [True, True, False]
+    first.close()
+    second.close()
+
+
+def test_redis_counters_expire_after_two_windows():
+    client = FakeRedis()
+    backend = RedisRateLimitBackend(client=client, prefix="rl")
+
+    _hits(backend, 6, now=100.0)
+
+    assert client.values == {"rl:answer:team-a:10": 5}
+    assert client.expiry_ms == {"rl:answer:team-a:10": 20000}
+    backend.close()
+    assert client.closed
+
+
+def test_idle_memory_counters_are_evicted():
+    backend = MemoryRateLimitBackend()
+    _hits(backend, 1, now=100.0, key="answer:idle")
+    _hits(backend, 1, now=115.0, key="answer:active")
+
+    _hits(backend, 1, now=125.0, key="answer:active")
+
+    assert len(backend) == 1
+
+
+def test_limiter_keys_by_action_and_team():
+    limiter = RateLimiter(MemoryRateLimitBackend(), window_seconds=60,
+                          limits={"answer": 2, "upload": 1})
+
+    assert [limiter.is_allowed("team-a", "answer") for _ in range(3)] == [True, True, False]
+    assert [limiter.is_allowed("team-a", "upload") for _ in range(2)] == [True, False]
+    assert limiter.is_allowed("team-b", "answer")
+
+
+def test_limiter_without_a_limit_allows_everything():
+    limiter = RateLimiter(MemoryRateLimitBackend(), window_seconds=60,
+                          limits={"answer": 0, "upload": 1})
+
+    assert all(limiter.is_allowed("team-a", "answer") for _ in range(100))
+    assert len(limiter.backend) == 0
+
+
+def test_limiter_fails_open_when_the_backend_fails():
+    limiter = RateLimiter(FailingBackend(), window_seconds=60, limits={"answer": 1})
+
+    assert limiter.is_allowed("team-a", "answer")
+    assert limiter.is_allowed("team-a", "answer")
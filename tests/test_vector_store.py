@@ -0,0 +1,76 @@
+import uuid
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct
+from src.vector_store import VECTOR_NAME, QdrantVectorStore
+
+
+class CountingClient:
+    """Forwards to an in-process Qdrant, counting registry lookups"""
+
+    def __init__(self, client: QdrantClient):
+        self.client = client
+        self.retrieves = 0
+
+    def retrieve(self, *args, **kwargs):
+        self.retrieves += 1
+        return self.client.retrieve(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+@pytest.fixture
+def store():
+    store = QdrantVectorStore(layout="shared", storage_profile="memory")
+    store.client = CountingClient(QdrantClient(":memory:"))
+    store.embedding_dim = 4
+    store.setup_collection()
+    return store
+
+
+def _points(n: int, start: int = 0):
+    return [
+        PointStruct(id=str(uuid.UUID(int=start + i + 1)),
+                    vector={VECTOR_NAME: [1.0, float(i), 0.0, 1.0]},
+                    payload={"team_id": "team-a", "document_id": "doc", "text": f"chunk {i}"})
+        for i in range(n)
+    ]
+
+
+def _count(store: QdrantVectorStore) -> int:
+    return store.client.count(collection_name=store.collection_name, exact=True).count
+
+
+def test_writes_check_the_migration_lock_once_per_interval(store):
+    for batch in range(3):
+        store.upsert_points(_points(5, start=batch * 5))
+    store.delete_points("team-a", [str(uuid.UUID(int=1))])
+
+    assert _count(store) == 14
+    assert store.client.retrieves == 1
+
+    store._unlocked_until = 0.0
+    store.upsert_points(_points(1, start=100))
+    assert store.client.retrieves == 2
+
+
+def test_writes_wait_for_a_running_migration(store, monkeypatch):
+    monkeypatch.setattr(QdrantVectorStore, "MIGRATION_WAIT_SECONDS", 0.3)
+    store._lock_writes()
+
+    with pytest.raises(RuntimeError, match="migration"):
+        store.upsert_points(_points(1))
+
+    store._unlock_writes()
+    store.upsert_points(_points(1))
+    assert _count(store) == 1
+
+
+def test_writes_work_without_a_document_registry(store):
+    store.client.delete_collection(store.registry_name)
+
+    store.upsert_points(_points(3))
+    store.delete_points("team-a", [str(uuid.UUID(int=1))])
+
+    assert _count(store) == 2
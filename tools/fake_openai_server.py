@@ -0,0 +1,210 @@
+"""Local stand-in for an OpenAI-compatible chat completions API
+
+Serves ``POST .../chat/completions`` for both the Azure deployment path
+(``/openai/deployments/<name>/chat/completions``) and the plain
+``/v1/chat/completions`` path, streamed or not, with configurable latency.
+Point ``AZURE_OPENAI_ENDPOINT`` at it to run the service without Azure:
+
+    python -m tools.fake_openai_server --port 8081 --first-token-latency 0.3
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_REPLY = (
+    "This is a canned answer from the fake completion server "
+    "[Document: fake.pdf, Page: 1]."
+)
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Request handler; settings live on the server instance"""
+
+    server_version = "FakeOpenAI/1.0"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_POST(self) -> None:
+        path = self.path.split("?", 1)[0]
+        if not path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {path}"}})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        self.server.record_request(body)
+
+        reply = self.server.reply
+        tokens = _tokenize(reply)
+        max_tokens = body.get("max_tokens")
+        if max_tokens:
+            tokens = tokens[:max_tokens]
+
+        time.sleep(self.server.first_token_latency)
+
+        if body.get("stream"):
+            self._stream(body, tokens)
+        else:
+            time.sleep(self.server.token_delay * len(tokens))
+            self._send_json(200, _completion(body, "".join(tokens)))
+
+    def _stream(self, body: Dict[str, Any], tokens: List[str]) -> None:
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(self.server.token_delay)
+            self._write_event(_chunk(body, completion_id, {"content": token}, None))
+        self._write_event(_chunk(body, completion_id, {}, "stop"))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+    def _write_event(self, payload: Dict[str, Any]) -> None:
+        self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the fake's settings and request log"""
+
+    daemon_threads = True
+
+    def __init__(
+            self,
+            address: Tuple[str, int],
+            reply: str = DEFAULT_REPLY,
+            first_token_latency: float = 0.0,
+            token_delay: float = 0.0,
+            verbose: bool = False
+    ):
+        super().__init__(address, FakeOpenAIHandler)
+        self.reply = reply
+        self.first_token_latency = first_token_latency
+        self.token_delay = token_delay
+        self.verbose = verbose
+        self.requests: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record_request(self, body: Dict[str, Any]) -> None:
+        with self._lock:
+            self.requests.append(body)
+
+
+def start_server(
+        host: str = "127.0.0.1",
+        port: int = 0,
+        reply: str = DEFAULT_REPLY,
+        first_token_latency: float = 0.0,
+        token_delay: float = 0.0,
+        verbose: bool = False
+) -> FakeOpenAIServer:
+    """Start the fake server in a daemon thread; port 0 picks a free port"""
+    server = FakeOpenAIServer(
+        (host, port),
+        reply=reply,
+        first_token_latency=first_token_latency,
+        token_delay=token_delay,
+        verbose=verbose
+    )
+    thread = threading.Thread(target=server.serve_forever, name="fake-openai", daemon=True)
+    thread.start()
+    return server
+
+
+def _tokenize(text: str) -> List[str]:
+    """Split into word-sized tokens that concatenate back to ``text``"""
+    words = text.split(" ")
+    return [word if i == 0 else f" {word}" for i, word in enumerate(words)]
+
+
+def _completion(body: Dict[str, Any], content: str) -> Dict[str, Any]:
+    prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in body.get("messages", []))
+    completion_tokens = len(content.split())
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model") or "fake-model",
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+    }
+
+
+def _chunk(
+        body: Dict[str, Any],
+        completion_id: str,
+        delta: Dict[str, Any],
+        finish_reason: Optional[str]
+) -> Dict[str, Any]:
+    return {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": body.get("model") or "fake-model",
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--reply", default=DEFAULT_REPLY)
+    parser.add_argument("--first-token-latency", type=float, default=0.0,
+                        help="seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.0,
+                        help="seconds between tokens")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(
+        (args.host, args.port),
+        reply=args.reply,
+        first_token_latency=args.first_token_latency,
+        token_delay=args.token_delay,
+        verbose=args.verbose
+    )
+    print(f"Fake OpenAI server listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()